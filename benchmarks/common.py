@@ -0,0 +1,26 @@
+"""Shared synthetic structures for the benchmark suite."""
+
+from pathlib import Path
+from pymatgen.core import Structure
+
+SPINEL_FILE = Path(__file__).parents[1] / "examples" / "POSCAR_SPINEL.vasp"
+
+# Supercell multiples of the 56-site spinel cell used to scale the benchmarks.
+SUPERCELLS = [1, 2, 4, 6]
+
+RCUT = 4.0
+ELEMENTS = {"Mg"}
+
+
+def spinel_supercell(supercell: int) -> Structure:
+    """Return the spinel unit cell scaled to a supercell x supercell x supercell cell."""
+    structure = Structure.from_file(str(SPINEL_FILE))
+    structure.make_supercell([supercell, supercell, supercell])
+    return structure
+
+
+def spinel_sublattice(supercell: int) -> Structure:
+    """Return the folded Mg sublattice of a spinel supercell, as analysed by the pipeline."""
+    structure = spinel_supercell(supercell)
+    structure.remove_species([spec for spec in structure.symbol_set if spec not in ELEMENTS])
+    return Structure.from_sites(structure.sites, to_unit_cell=True)
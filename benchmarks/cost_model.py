@@ -0,0 +1,107 @@
+"""Calibration of the run time model in crystal_torture.cost.
+
+Times the whole file -> graph -> tortuosity pipeline (batch.analyse_file)
+with each engine on spinel supercells, over a spread of cut-offs and element
+sets, and fits the cost model to the timings. Run as a script to print the
+fitted coefficients for cost.DEFAULT_COEFFICIENTS:
+
+    python -m benchmarks.cost_model
+
+The track_* benchmark reports the worst relative error of the default
+coefficients on the calibration structures, so asv flags drift in the model.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from crystal_torture import tort
+from crystal_torture.batch import analyse_file
+from crystal_torture.cost import CostModel, ENGINES, structure_features
+
+from .common import spinel_supercell
+
+# (supercell, rcut, elements) of the calibration runs.
+CALIBRATION_CASES = [
+    (supercell, rcut, elements)
+    for supercell in (1, 2, 3)
+    for rcut, elements in ((4.0, {"Mg"}), (3.0, {"Al"}), (3.5, {"Mg", "Al"}))
+]
+
+# The pure Python engine is only timed on structures where it finishes promptly.
+MAX_PYTHON_SUPERCELL = 2
+
+
+def _cases(engine: str) -> list[tuple[int, float, set[str]]]:
+    if engine == "python":
+        return [case for case in CALIBRATION_CASES if case[0] <= MAX_PYTHON_SUPERCELL]
+    return CALIBRATION_CASES
+
+
+def calibrate(repeat: int = 3) -> CostModel:
+    """Time the pipeline on the calibration cases and fit a CostModel.
+
+    Args:
+        repeat: Number of timings per case; the fastest is kept.
+
+    Returns:
+        CostModel fitted to the engines available here.
+    """
+    engines = [engine for engine in ENGINES if engine != "fortran" or tort.tort_mod is not None]
+    samples: dict[str, list] = {engine: [] for engine in engines}
+    with tempfile.TemporaryDirectory() as tmp:
+        for supercell in sorted({case[0] for case in CALIBRATION_CASES}):
+            spinel_supercell(supercell).to(filename=str(Path(tmp) / f"POSCAR_{supercell}.vasp"))
+        for engine in engines:
+            for supercell, rcut, elements in _cases(engine):
+                filename = Path(tmp) / f"POSCAR_{supercell}.vasp"
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    analyse_file(filename, rcut, elements, engine=engine)
+                    timings.append(time.perf_counter() - started)
+                features = structure_features(spinel_supercell(supercell), rcut, elements)
+                samples[engine].append((features, min(timings)))
+    return CostModel.fit(samples)
+
+
+class CostModelAccuracy:
+    """Relative error of the default cost model on the calibration structures."""
+
+    timeout = 600
+
+    def setup(self) -> None:
+        self.model = CostModel()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = {}
+        for supercell in sorted({case[0] for case in CALIBRATION_CASES}):
+            filename = Path(self.tmp.name) / f"POSCAR_{supercell}.vasp"
+            spinel_supercell(supercell).to(filename=str(filename))
+            self.files[supercell] = filename
+        # Pay the import and first-call costs outside the timings.
+        analyse_file(self.files[1], 4.0, {"Mg"})
+
+    def teardown(self) -> None:
+        self.tmp.cleanup()
+
+    def track_fortran_relative_error(self) -> float:
+        return self._worst_error("fortran")
+
+    def track_python_relative_error(self) -> float:
+        return self._worst_error("python")
+
+    def _worst_error(self, engine: str) -> float:
+        worst = 0.0
+        for supercell, rcut, elements in _cases(engine):
+            started = time.perf_counter()
+            analyse_file(self.files[supercell], rcut, elements, engine=engine)
+            measured = time.perf_counter() - started
+            features = structure_features(spinel_supercell(supercell), rcut, elements)
+            worst = max(worst, abs(self.model.estimate(features, engine) - measured) / measured)
+        return worst
+
+
+if __name__ == "__main__":
+    model = calibrate()
+    for engine, coefficients in model.coefficients.items():
+        print(f"{engine!r}: ({', '.join(f'{c:.3g}' for c in coefficients)}),")
@@ -0,0 +1,80 @@
+"""Benchmarks for the doping helpers in crystal_torture.pymatgen_doping."""
+
+from pymatgen.core import Structure
+from crystal_torture.array_interface import analyse_arrays
+from crystal_torture.fingerprint import array_fingerprint
+from crystal_torture.pymatgen_doping import dope_structure_ensemble, sort_structure
+from crystal_torture.topology import NeighbourTopology
+
+from .common import RCUT, SUPERCELLS, spinel_supercell
+
+
+def _sort_structure_loop(structure: Structure, order: list[str]) -> Structure:
+    """Reference per-symbol, per-site append implementation of sort_structure."""
+    structure_sorted = Structure(lattice=structure.lattice, species=[], coords=[])
+    for symbol in order:
+        for site in structure.sites:
+            if site.species_string == symbol:
+                structure_sorted.append(
+                    symbol,
+                    site.coords,
+                    coords_are_cartesian=True,
+                    properties=site.properties,
+                )
+    return structure_sorted
+
+
+class TimeSortStructure:
+    """Compare bulk argsort sort_structure against the per-site append loop."""
+
+    params = SUPERCELLS
+    param_names = ["supercell"]
+
+    def setup(self, supercell: int) -> None:
+        structure = spinel_supercell(supercell)
+        # Interleave species so the sort has real work to do.
+        self.structure = Structure.from_sites(structure.sites[::2] + structure.sites[1::2])
+        self.order = sorted(self.structure.symbol_set)
+
+    def time_sort_structure(self, supercell: int) -> None:
+        sort_structure(self.structure, self.order)
+
+    def time_sort_structure_loop(self, supercell: int) -> None:
+        _sort_structure_loop(self.structure, self.order)
+
+
+class DopedEnsembleAnalysis:
+    """Compare a full neighbour search per doped sample against a shared host topology."""
+
+    params = SUPERCELLS
+    param_names = ["supercell"]
+
+    def setup(self, supercell: int) -> None:
+        self.structure = spinel_supercell(supercell)
+        self.samples = list(
+            dope_structure_ensemble(
+                self.structure, 4, "Mg", ["Li"], conc=0.5, seed=0, species_only=True
+            )
+        )
+        self.topology = NeighbourTopology.from_structure(self.structure, RCUT)
+
+    def time_analyse_arrays(self, supercell: int) -> None:
+        for species in self.samples:
+            analyse_arrays(
+                self.structure.lattice.matrix, self.structure.frac_coords, species, RCUT, {"Li"}
+            )
+
+    def time_topology_analyse(self, supercell: int) -> None:
+        for species in self.samples:
+            self.topology.analyse(species, {"Li"})
+
+    def time_array_fingerprint(self, supercell: int) -> None:
+        for species in self.samples:
+            keep = species == "Li"
+            array_fingerprint(
+                self.structure.lattice.matrix, self.structure.frac_coords[keep], species[keep]
+            )
+
+    def peakmem_share_topology(self, supercell: int) -> None:
+        with self.topology.share() as shared:
+            shared.attach()
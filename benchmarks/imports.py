@@ -0,0 +1,17 @@
+"""Import-time benchmarks, each run in a fresh interpreter."""
+
+
+def timeraw_import_crystal_torture():
+    return "import crystal_torture"
+
+
+def timeraw_import_pymatgen_interface():
+    return "import crystal_torture; crystal_torture.graph_from_structure"
+
+
+def timeraw_load_fortran_libraries():
+    return """
+    from crystal_torture import dist, tort
+    tort.tort_mod
+    dist.shift_index(0, [0, 0, 0])
+    """
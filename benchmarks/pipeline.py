@@ -0,0 +1,161 @@
+"""Stage-by-stage benchmarks of the structure -> graph -> tortuosity pipeline.
+
+Each stage is timed (time_*) and memory-profiled (peakmem_*) separately on
+scaled spinel supercells, with the inputs of a stage prepared in setup.
+"""
+
+from copy import deepcopy
+
+from crystal_torture import tort
+from crystal_torture.cluster import clusters_from_nodes
+from crystal_torture.graph import Graph
+from crystal_torture.pymatgen_interface import (
+    create_halo,
+    get_all_neighbors_and_image,
+    graph_from_structure,
+    halo_neighbours,
+    nodes_from_structure,
+    set_fort_nodes,
+)
+
+from .common import ELEMENTS, RCUT, SUPERCELLS, spinel_sublattice, spinel_supercell
+
+
+class _Stage:
+    """Common parameters: each sample runs the stage once on fresh inputs."""
+
+    params = SUPERCELLS
+    param_names = ["supercell"]
+    number = 1
+    repeat = (3, 10, 20.0)
+    warmup_time = 0.0
+    timeout = 600
+
+
+class NeighbourSearch(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.structure = spinel_sublattice(supercell)
+
+    def time_get_all_neighbors_and_image(self, supercell: int) -> None:
+        get_all_neighbors_and_image(self.structure, RCUT, include_index=True)
+
+    def peakmem_get_all_neighbors_and_image(self, supercell: int) -> None:
+        get_all_neighbors_and_image(self.structure, RCUT, include_index=True)
+
+
+class Halo(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.structure = spinel_sublattice(supercell)
+        self.structure.add_site_property("UC_index", [str(i) for i in range(len(self.structure))])
+        self.neighbours = get_all_neighbors_and_image(self.structure, RCUT, include_index=True)
+        # create_halo turns the structure into its supercell in place.
+        self.working = deepcopy(self.structure)
+
+    def time_create_halo(self, supercell: int) -> None:
+        create_halo(self.working, self.neighbours)
+
+    def peakmem_create_halo(self, supercell: int) -> None:
+        create_halo(self.working, self.neighbours)
+
+    def time_halo_neighbours(self, supercell: int) -> None:
+        halo_neighbours(self.neighbours)
+
+    def peakmem_halo_neighbours(self, supercell: int) -> None:
+        halo_neighbours(self.neighbours)
+
+
+class Nodes(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.structure = spinel_sublattice(supercell)
+
+    def time_nodes_from_structure(self, supercell: int) -> None:
+        nodes_from_structure(self.structure, RCUT, get_halo=True)
+
+    def peakmem_nodes_from_structure(self, supercell: int) -> None:
+        nodes_from_structure(self.structure, RCUT, get_halo=True)
+
+
+class Clustering(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.nodes = nodes_from_structure(spinel_sublattice(supercell), RCUT, get_halo=True)
+
+    def time_clusters_from_nodes(self, supercell: int) -> None:
+        clusters_from_nodes(self.nodes)
+
+    def peakmem_clusters_from_nodes(self, supercell: int) -> None:
+        clusters_from_nodes(self.nodes)
+
+
+class FortranUpload(_Stage):
+    def setup(self, supercell: int) -> None:
+        if tort.tort_mod is None:
+            raise NotImplementedError("Fortran extensions not available")
+        self.nodes = nodes_from_structure(spinel_sublattice(supercell), RCUT, get_halo=True)
+
+    def teardown(self, supercell: int) -> None:
+        tort.tort_mod.tear_down()
+
+    def time_set_fort_nodes(self, supercell: int) -> None:
+        set_fort_nodes(self.nodes)
+
+    def peakmem_set_fort_nodes(self, supercell: int) -> None:
+        set_fort_nodes(self.nodes)
+
+
+class Torture(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.graph = graph_from_structure(spinel_supercell(supercell), RCUT, ELEMENTS)
+
+    def teardown(self, supercell: int) -> None:
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def time_torture(self, supercell: int) -> None:
+        if tort.tort_mod is None:
+            raise NotImplementedError("Fortran extensions not available")
+        self.graph.torture()
+
+    def peakmem_torture(self, supercell: int) -> None:
+        if tort.tort_mod is None:
+            raise NotImplementedError("Fortran extensions not available")
+        self.graph.torture()
+
+    def time_torture_py(self, supercell: int) -> None:
+        self.graph.torture_py()
+
+    def peakmem_torture_py(self, supercell: int) -> None:
+        self.graph.torture_py()
+
+
+class MinimalClusters(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.graph = graph_from_structure(spinel_supercell(supercell), RCUT, ELEMENTS)
+        self.graph.torture_py()
+
+    def time_set_minimal_clusters(self, supercell: int) -> None:
+        self.graph.set_minimal_clusters()
+
+    def peakmem_set_minimal_clusters(self, supercell: int) -> None:
+        self.graph.set_minimal_clusters()
+
+
+class FullPipeline(_Stage):
+    def setup(self, supercell: int) -> None:
+        self.structure = spinel_supercell(supercell)
+
+    def teardown(self, supercell: int) -> None:
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def time_graph_from_structure(self, supercell: int) -> None:
+        graph_from_structure(self.structure, RCUT, ELEMENTS)
+
+    def peakmem_graph_from_structure(self, supercell: int) -> None:
+        graph_from_structure(self.structure, RCUT, ELEMENTS)
+
+    def time_graph_from_structure_and_torture(self, supercell: int) -> None:
+        graph = graph_from_structure(self.structure, RCUT, ELEMENTS)
+        if tort.tort_mod is not None:
+            graph.torture()
+        else:
+            graph.torture_py()
@@ -1,7 +1,62 @@
-from .pymatgen_interface import (
-    graph_from_structure,
-    graph_from_file,
-    clusters_from_structure,
-    clusters_from_file
-)
+"""Crystal structure percolation and tortuosity analysis.
+
+Public functions are imported lazily on first attribute access (PEP 562), so
+``import crystal_torture`` does not pull in pymatgen or load the Fortran
+extensions until they are needed.
+"""
+import importlib
+
 from .version import __version__
+
+# Lazily imported attribute name -> submodule that defines it.
+_LAZY_ATTRIBUTES = {
+    "graph_from_structure": "pymatgen_interface",
+    "graph_from_file": "pymatgen_interface",
+    "clusters_from_structure": "pymatgen_interface",
+    "clusters_from_file": "pymatgen_interface",
+    "graph_from_arrays": "array_interface",
+    "analyse_arrays": "array_interface",
+    "analyse_trajectory": "trajectory",
+    "profile_stages": "profiling",
+    "openmp_settings": "tort",
+}
+
+_SUBMODULES = {
+    "array_interface",
+    "async_interface",
+    "batch",
+    "cli",
+    "cluster",
+    "cost",
+    "dist",
+    "exceptions",
+    "fingerprint",
+    "graph",
+    "graph_io",
+    "minimal_cluster",
+    "node",
+    "pymatgen_doping",
+    "profiling",
+    "pymatgen_interface",
+    "topology",
+    "tort",
+    "trajectory",
+}
+
+__all__ = [*_LAZY_ATTRIBUTES, "__version__"]
+
+
+def __getattr__(name: str):
+    """Import public functions and submodules on first access."""
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _SUBMODULES)
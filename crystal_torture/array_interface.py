@@ -0,0 +1,721 @@
+"""Functions for setting up nodes, clusters and graphs from lattice, coordinate and species arrays.
+
+Nothing here imports pymatgen, so screening pipelines that already hold their
+cells as NumPy arrays can skip building pymatgen Structures (see analyse_arrays).
+pymatgen_interface builds on these functions.
+"""
+
+from crystal_torture.node import Node
+from crystal_torture.cluster import DEFAULT_HALO, Cluster, clusters_from_nodes
+from crystal_torture.graph import Graph
+from crystal_torture.exceptions import FortranNotAvailableError
+import numpy as np
+import functools
+import itertools
+import math
+import warnings
+from crystal_torture.profiling import active_profile, stage
+from types import ModuleType
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from crystal_torture.pymatgen_interface import VerletList
+
+# Module variables with proper type hints
+dist: ModuleType | None
+tort: ModuleType | None
+
+try:
+    from . import dist
+except ImportError:
+    dist = None
+
+try:
+    from . import tort
+except ImportError:
+    tort = None
+
+
+def _dist_available() -> bool:
+    """Return whether the compiled dist library is loaded, loading it if needed."""
+    if dist is None:
+        return False
+    dist._load_library()
+    return dist._DIST_AVAILABLE
+
+
+def _python_dist(coord1: npt.NDArray[np.floating], coord2: npt.NDArray[np.floating], n: int) -> npt.NDArray[np.floating]:
+    """Pure Python fallback for distance calculation when Fortran dist module is not available.
+    
+    Args:
+        coord1: Array of coordinates.
+        coord2: Array of coordinates.  
+        n: Number of coordinates.
+        
+    Returns:
+        Distance matrix.
+    """
+    # Use numpy broadcasting for vectorized calculation
+    # coord1[:, None, :] creates shape (n, 1, 3)
+    # coord2[None, :, :] creates shape (1, n, 3)  
+    # Subtraction creates shape (n, n, 3)
+    # np.linalg.norm computes distances along axis=2
+    return np.linalg.norm(coord1[:, None, :] - coord2[None, :, :], axis=2)
+
+
+def _python_shift_index(index_n: int, shift: list[int]) -> int:
+    """Pure Python fallback for index shifting when Fortran dist module is not available.
+    
+    Args:
+        index_n: Original index (must be non-negative).
+        shift: Shift vector [x, y, z].
+        
+    Returns:
+        New shifted index.
+        
+    Raises:
+        ValueError: If index_n is negative.
+    """
+    if index_n < 0:
+        raise ValueError(f"shift_index received negative index: {index_n}. This indicates an upstream bug.")
+        
+    new_x = (int(index_n // 9) % 3 + shift[0]) % 3
+    new_y = (int(index_n // 3) % 3 + shift[1]) % 3  
+    new_z = (index_n % 3 + shift[2]) % 3
+    
+    new_index = int(27 * int(index_n // 27) + (new_x % 3) * 9 + (new_y % 3) * 3 + (new_z % 3))
+    return new_index
+
+
+def _python_shift_indices(
+    index_n: npt.NDArray[np.integer],
+    shift: npt.NDArray[np.integer],
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> npt.NDArray[np.int64]:
+    """NumPy fallback for array-valued index shifting when Fortran dist module is not available.
+
+    Args:
+        index_n: Array of original indices (must be non-negative).
+        shift: Array of shift vectors (n x 3), or a single shift vector [x, y, z].
+        halo: Number of images (n_x, n_y, n_z) along each axis of the halo.
+
+    Returns:
+        Array of new shifted indices.
+
+    Raises:
+        ValueError: If any index is negative.
+    """
+    index_n = np.asarray(index_n, dtype=np.int64)
+    if np.any(index_n < 0):
+        raise ValueError(
+            f"shift_index received negative index: {index_n.min()}. This indicates an upstream bug."
+        )
+    shift = np.asarray(shift, dtype=np.int64).reshape(-1, 3)
+    nx, ny, nz = halo
+    n_images = nx * ny * nz
+    new_x = (index_n // (ny * nz) % nx + shift[:, 0]) % nx
+    new_y = (index_n // nz % ny + shift[:, 1]) % ny
+    new_z = (index_n % nz + shift[:, 2]) % nz
+    return n_images * (index_n // n_images) + new_x * ny * nz + new_y * nz + new_z
+
+
+def map_index(
+    uc_neighbours: list[list[int]], 
+    uc_index: list[int], 
+    x_d: int, 
+    y_d: int, 
+    z_d: int
+) -> list[list[int]]:
+    """Take a list of neighbour indices for sites in the original unit cell and map them onto all supercell sites.
+    
+    Args:
+        uc_neighbours: List of lists containing neighbour indices for the nodes that are in the primitive cell.
+        uc_index: List of indices corresponding to the primitive cell nodes.
+        x_d: X dimension of supercell.
+        y_d: Y dimension of supercell.
+        z_d: Z dimension of supercell.
+    
+    Returns:
+        List of neighbour indices for all nodes.
+    """
+    shift_func = _python_shift_indices if dist is None else dist.shift_indices
+
+    # Shift every unit cell neighbour index by every supercell shift in one call.
+    counts = [len(uc_neighbours[i]) for i in range(len(uc_index))]
+    offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+    n_flat = offsets[-1]
+    flat = np.fromiter(
+        (neighbour for i in range(len(uc_index)) for neighbour in uc_neighbours[i]),
+        dtype=np.int64,
+        count=n_flat,
+    )
+    shifts = np.array(
+        [[x, y, z] for x in range(x_d) for y in range(y_d) for z in range(z_d)], dtype=np.int64
+    )
+    shifted = shift_func(
+        np.tile(flat, len(shifts)), np.repeat(shifts, n_flat, axis=0), (x_d, y_d, z_d)
+    ).tolist()
+    shift_offsets = range(0, len(shifts) * n_flat, n_flat) if n_flat else [0] * len(shifts)
+
+    neigh: list[list[int]] = []
+    append = neigh.append
+    for i in range(len(uc_index)):
+        start, end = offsets[i], offsets[i + 1]
+        for offset in shift_offsets:
+            append(shifted[offset + start:offset + end])
+    return neigh
+
+
+@functools.lru_cache(maxsize=32)
+def _lattice_image_set(
+    matrix_key: bytes, nmin: tuple[int, int, int], nmax: tuple[int, int, int]
+) -> tuple[list[tuple[float, ...]], npt.NDArray[np.floating]]:
+    """Build (and cache) the image shifts and their Cartesian translations for a lattice."""
+    matrix = np.frombuffer(matrix_key, dtype=np.float64).reshape(3, 3)
+    all_ranges = [np.arange(x, y) for x, y in zip(nmin, nmax)]
+    images = list(itertools.product(*all_ranges))
+    translations = np.dot(np.array(images, dtype=np.float64).reshape(-1, 3), matrix)
+    return images, translations
+
+
+def lattice_images(
+    matrix: npt.ArrayLike, frac_coords: npt.ArrayLike, r: float
+) -> tuple[list[tuple[float, ...]], npt.NDArray[np.floating]]:
+    """Get the lattice images needed to find all neighbours of sites out to a distance r.
+
+    The image shifts and their Cartesian translations only depend on the lattice,
+    r and the range spanned by the fractional coordinates, so they are cached and
+    reused when the same cell is analysed repeatedly (e.g. trajectory frames).
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates of the sites.
+        r: Radius of sphere.
+
+    Returns:
+        Tuple containing:
+            - images: List of image shifts (as tuples of floats).
+            - translations: Array of Cartesian translations for each image.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    frac_coords = np.asarray(frac_coords, dtype=np.float64)
+    recp_len = np.linalg.norm(2 * math.pi * np.linalg.inv(matrix).T, axis=1)
+    maxr = np.ceil((r + 0.15) * recp_len / (2 * math.pi))
+    nmin = np.floor(np.min(frac_coords, axis=0)) - maxr
+    nmax = np.ceil(np.max(frac_coords, axis=0)) + maxr
+    return _lattice_image_set(
+        matrix.tobytes(), tuple(nmin.tolist()), tuple(nmax.tolist())
+    )
+
+
+def _image_pairs(
+    matrix: npt.ArrayLike, frac_coords: npt.ArrayLike, r: float
+) -> Iterator[tuple[tuple[float, ...], npt.NDArray[np.floating], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.floating]]]:
+    """Find the pairs of sites within r, one lattice image at a time.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates of the sites.
+        r: Radius of sphere.
+
+    Yields:
+        For each lattice image: the image shift, the Cartesian coordinates of
+        the image sites and the image site index j, site index i and distance
+        of each pair within r, ordered by j.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    frac_coords = np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3)
+    images, image_translations = lattice_images(matrix, frac_coords, r)
+
+    coords_in_cell = np.dot(np.mod(frac_coords, 1), matrix)
+    site_coords = np.dot(frac_coords, matrix)
+
+    for image, translation in zip(images, image_translations):
+        coords = translation + coords_in_cell
+        if dist is None:
+            all_dists = _python_dist(coords, site_coords, len(coords))
+            pair_j, pair_i = np.nonzero((all_dists <= r) & (all_dists > 1e-8))
+            pair_d = all_dists[pair_j, pair_i]
+        else:
+            # Only the pairs within r are returned, ordered by image site j.
+            pair_j, pair_i, pair_d = dist.dist_pairs(coords, site_coords, r, rmin=1e-8)
+        yield image, coords, pair_j, pair_i, pair_d
+
+
+def neighbour_pairs(
+    matrix: npt.ArrayLike, frac_coords: npt.ArrayLike, r: float
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.floating]]:
+    """Get the neighbours of each site out to a distance r as flat arrays.
+
+    Array version of get_all_neighbors_and_image, for use without pymatgen sites.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates of the sites.
+        r: Radius of sphere.
+
+    Returns:
+        Tuple containing, for each pair (ordered by site i, then in the order
+        of get_all_neighbors_and_image):
+            - pair_i: Index of the site.
+            - pair_j: Index of the neighbouring site in the unit cell.
+            - images: Lattice image (n x 3) of the neighbour.
+            - distances: Distance between the site and the neighbour.
+    """
+    # Stacking every image is only worthwhile with the compiled library; the
+    # NumPy fallback would hold the distances to all images at once.
+    if _dist_available():
+        return _stacked_neighbour_pairs(matrix, frac_coords, r)
+
+    pair_i: list[npt.NDArray[np.int64]] = []
+    pair_j: list[npt.NDArray[np.int64]] = []
+    images: list[npt.NDArray[np.int64]] = []
+    distances: list[npt.NDArray[np.floating]] = []
+    for image, _, j, i, d in _image_pairs(matrix, frac_coords, r):
+        pair_i.append(np.asarray(i, dtype=np.int64))
+        pair_j.append(np.asarray(j, dtype=np.int64))
+        images.append(np.tile(np.array(image, dtype=np.int64), (len(i), 1)))
+        distances.append(np.asarray(d, dtype=np.float64))
+    if not pair_i:
+        return (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty((0, 3), dtype=np.int64),
+            np.empty(0, dtype=np.float64),
+        )
+    order = np.argsort(np.concatenate(pair_i), kind="stable")
+    return (
+        np.concatenate(pair_i)[order],
+        np.concatenate(pair_j)[order],
+        np.concatenate(images)[order],
+        np.concatenate(distances)[order],
+    )
+
+
+def _stacked_neighbour_pairs(
+    matrix: npt.ArrayLike, frac_coords: npt.ArrayLike, r: float
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.floating]]:
+    """neighbour_pairs with the sites of every lattice image in a single dist_pairs call.
+
+    One call instead of one per image avoids the per-call overhead for small cells.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    frac_coords = np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3)
+    images, image_translations = lattice_images(matrix, frac_coords, r)
+    n_sites = len(frac_coords)
+
+    coords_in_cell = np.dot(np.mod(frac_coords, 1), matrix)
+    site_coords = np.dot(frac_coords, matrix)
+    # Image-major, so ordering by the stacked index j matches the per-image search.
+    image_coords = (image_translations[:, None, :] + coords_in_cell[None, :, :]).reshape(-1, 3)
+    stacked_j, pair_i, pair_d = dist.dist_pairs(image_coords, site_coords, r, rmin=1e-8)
+
+    order = np.argsort(pair_i, kind="stable")
+    stacked_j = stacked_j[order]
+    image_array = np.array(images, dtype=np.int64).reshape(-1, 3)
+    return (
+        pair_i[order],
+        stacked_j % n_sites,
+        image_array[stacked_j // n_sites],
+        pair_d[order],
+    )
+
+
+def _check_halo(halo: tuple[int, int, int]) -> tuple[int, int, int]:
+    """Return halo as a tuple of three ints, raising ValueError if it is not valid."""
+    if len(halo) != 3 or any(int(n) != n or n < 1 for n in halo):
+        raise ValueError(f"halo must be three positive integers, got {halo}")
+    return (int(halo[0]), int(halo[1]), int(halo[2]))
+
+
+def _max_image(images: npt.NDArray[np.integer]) -> npt.NDArray[np.int64]:
+    """Return the largest absolute image offset along each axis over all neighbour images."""
+    if not len(images):
+        return np.zeros(3, dtype=np.int64)
+    return np.abs(np.asarray(images, dtype=np.int64).reshape(-1, 3)).max(axis=0)
+
+
+def _halo_neighbours_from_pairs(
+    no_sites: int,
+    pair_i: npt.NDArray[np.int64],
+    pair_j: npt.NDArray[np.int64],
+    images: npt.NDArray[np.int64],
+    halo: tuple[int, int, int],
+) -> list[list[int]]:
+    """halo_neighbours for the pair arrays of neighbour_pairs (ordered by pair_i)."""
+    x, y, z = _check_halo(halo)
+    n_images = x * y * z
+    shift_func = _python_shift_indices if dist is None else dist.shift_indices
+
+    too_small = _max_image(images) > (np.array([x, y, z]) - 1) // 2
+    if np.any(too_small):
+        warnings.warn(
+            f"Halo {halo} is too small for the neighbour images of this structure; "
+            "clusters may be wrongly connected. Use minimum_halo to choose the halo.",
+            stacklevel=3,
+        )
+
+    counts = np.bincount(pair_i, minlength=no_sites)
+    offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+    shifted = shift_func(n_images * pair_j, images, (x, y, z)).tolist()
+    new_neighbours: list[list[int]] = [
+        shifted[offsets[i]:offsets[i + 1]] for i in range(no_sites)
+    ]
+
+    uc_index = [((site * n_images)) for site in range(no_sites)]
+    return map_index(new_neighbours, uc_index, x, y, z)
+
+
+def halo_sites(
+    species_codes: npt.ArrayLike,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+    """Return the metadata of every site in the halo supercell from the unit cell arrays.
+
+    Sites are numbered as in halo_neighbours, and the unit cell is the central image.
+
+    Args:
+        species_codes: Integer species code of each unit cell site.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector.
+
+    Returns:
+        Tuple containing, for each supercell site:
+            - uc_index: Index of the unit cell site it is an image of.
+            - species: Species code of the site.
+            - image: Image offset (n x 3) of the site relative to the unit cell.
+            - is_halo: False for the unit cell sites, True for their images.
+
+    Raises:
+        ValueError: If halo is not three positive integers.
+    """
+    nx, ny, nz = _check_halo(halo)
+    n_images = nx * ny * nz
+    species_codes = np.asarray(species_codes, dtype=np.int64)
+    index = np.arange(len(species_codes) * n_images, dtype=np.int64)
+    uc_index = index // n_images
+    position = index % n_images
+    image = np.stack(
+        (position // (ny * nz) - nx // 2, position // nz % ny - ny // 2, position % nz - nz // 2),
+        axis=1,
+    )
+    centre = (nx // 2) * ny * nz + (ny // 2) * nz + nz // 2
+    return uc_index, species_codes[uc_index], image, position != centre
+
+
+def nodes_from_arrays(
+    matrix: npt.ArrayLike,
+    frac_coords: npt.ArrayLike,
+    species: npt.ArrayLike,
+    rcut: float,
+    get_halo: bool = False,
+    verlet: 'VerletList | None' = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> set[Node]:
+    """Convert a lattice, fractional coordinates and species to Nodes for interrogation.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates (n x 3) of the sites.
+        species: Species of each site, as strings or integer codes. Node.element
+            is set to the string form.
+        rcut: Cut-off radii for node-node connections.
+        get_halo: Whether to build the halo of periodic images.
+        verlet: Optional VerletList to reuse neighbours from a previous call.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the
+            halo. The unit cell nodes are the central image.
+
+    Returns:
+        Set of Node objects.
+    """
+    species = np.asarray(species).astype(str).tolist()
+    with stage("neighbour_search"):
+        if verlet is None:
+            pair_i, pair_j, images, _ = neighbour_pairs(matrix, frac_coords, rcut)
+        else:
+            pair_i, pair_j, images, _ = verlet.pairs(matrix, frac_coords, species, rcut)
+    return nodes_from_pairs(species, pair_i, pair_j, images, get_halo=get_halo, halo=halo)
+
+
+def nodes_from_pairs(
+    species: npt.ArrayLike,
+    pair_i: npt.NDArray[np.int64],
+    pair_j: npt.NDArray[np.int64],
+    images: npt.NDArray[np.int64],
+    get_halo: bool = False,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> set[Node]:
+    """Convert site species and precomputed neighbour pairs to Nodes.
+
+    Args:
+        species: Species of each site, as strings or integer codes.
+        pair_i: Index of the site of each pair, in ascending order.
+        pair_j: Index of the neighbouring site in the unit cell.
+        images: Lattice image (n x 3) of the neighbour.
+        get_halo: Whether to build the halo of periodic images.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+    Returns:
+        Set of Node objects.
+    """
+    species = np.asarray(species).astype(str)
+    nodes: list[Node] = []
+    
+    no_nodes = len(species)
+    species_names, species_codes = np.unique(species, return_inverse=True)
+    if get_halo == True:
+        with stage("halo_creation"):
+            neighbours_mapped = _halo_neighbours_from_pairs(no_nodes, pair_i, pair_j, images, halo)
+            uc_index, species_index, _, is_halo = halo_sites(species_codes, halo)
+    else:
+        uc_index = np.arange(no_nodes)
+        species_index = species_codes
+        is_halo = np.zeros(no_nodes, dtype=bool)
+        counts = np.bincount(pair_i, minlength=no_nodes)
+        offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).tolist()
+        flat_j = pair_j.tolist()
+        neighbours_mapped = [flat_j[offsets[i]:offsets[i + 1]] for i in range(no_nodes)]
+    
+    with stage("node_construction"):
+        append = nodes.append
+        elements = species_names[species_index].tolist()
+    
+        for index, (element, site_uc_index, halo_node) in enumerate(
+            zip(elements, uc_index.tolist(), is_halo.tolist())
+        ):
+            node_neighbours_ind = set(neighbours_mapped[index])
+            append(
+                Node(
+                    index=index,
+                    element=element,
+                    uc_index=site_uc_index,
+                    is_halo=halo_node,
+                    neighbours_ind=node_neighbours_ind,
+                )
+            )
+    
+        for node in nodes:
+            node.neighbours = set()
+            for neighbour_ind in node.neighbours_ind:
+                node.neighbours.add(nodes[neighbour_ind])
+    
+    return set(nodes)
+
+
+def set_fort_nodes(nodes: set[Node]) -> None:
+    """Set up a copy of the nodes and the neighbour indices in the tort.f90 Fortran module.
+    
+    This allows access if using the Fortran tortuosity routines.
+    
+    Args:
+       nodes: Set of Node objects to set up in Fortran module.
+       
+    Sets:
+       tort.tort_mod.nodes: Allocates space to hold node indices for full graph.
+       tort.tort_mod.uc_tort: Allocates space to hold unit cell node tortuosity for full graph.
+       tort.tort_mod.owner: A unit cell node from nodes, marking them as the uploaded graph.
+       
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+    """
+    if tort is None:
+        raise FortranNotAvailableError()
+    
+    with tort.state_lock:
+        # Size by the largest index, so a subset of a graph's nodes (such as
+        # those in its clusters) can be set up.
+        tort.tort_mod.allocate_nodes(
+            max((node.index for node in nodes), default=-1) + 1,
+            len([node for node in nodes if node.is_halo == False]),
+        )
+        for node in nodes:
+            tort.tort_mod.set_neighbours(
+                node.index,
+                node.uc_index,
+                len(node.neighbours_ind),
+                [ind for ind in node.neighbours_ind],
+            )
+        tort.tort_mod.owner = next((node for node in nodes if not node.is_halo), None)
+
+
+def clusters_from_arrays(
+    matrix: npt.ArrayLike,
+    frac_coords: npt.ArrayLike,
+    species: npt.ArrayLike,
+    rcut: float,
+    elements: set,
+    verlet: 'VerletList | None' = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> set[Cluster]:
+    """Set up the clusters of the sites with species in elements.
+
+    Array version of pymatgen_interface.clusters_from_structure. The node
+    uc_index of a site is its position among the kept sites.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates (n x 3) of the sites.
+        species: Species of each site, as strings or integer codes.
+        rcut: Cut-off radii for node-node connections in forming clusters.
+        elements: Set of species (of the same kind as species) to include.
+        verlet: Optional VerletList to reuse neighbours from a previous call.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+    Returns:
+        Set of clusters.
+
+    Raises:
+        ValueError: If elements is empty or contains species not present in species.
+    """
+    with stage("structure_filter"):
+        keep = _species_mask(species, elements)
+        frac_coords = np.mod(np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3)[keep], 1)
+        kept_species = np.asarray(species)[keep]
+    nodes = nodes_from_arrays(
+        matrix, frac_coords, kept_species, rcut, get_halo=True, verlet=verlet, halo=halo
+    )
+    return _clusters_from_halo_nodes(nodes, halo)
+
+
+def _clusters_from_halo_nodes(nodes: set[Node], halo: tuple[int, int, int]) -> set[Cluster]:
+    """Upload the nodes to Fortran (if available) and group them into clusters."""
+    if tort is not None and tort.tort_mod is not None:
+        with stage("fortran_upload"):
+            set_fort_nodes(nodes)
+    with stage("clustering"):
+        clusters = clusters_from_nodes(nodes, halo=halo)
+    return clusters
+
+
+def graph_from_arrays(
+    matrix: npt.ArrayLike,
+    frac_coords: npt.ArrayLike,
+    species: npt.ArrayLike,
+    rcut: float,
+    elements: set,
+    verlet: 'VerletList | None' = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> Graph:
+    """Create a graph (without a structure) from lattice, coordinate and species arrays.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates (n x 3) of the sites.
+        species: Species of each site, as strings or integer codes.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of species (of the same kind as species) to include.
+        verlet: Optional VerletList to reuse neighbours from a previous call.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+    Returns:
+        Graph object containing the clusters. Its site indices refer to the
+        sites with species in elements, in their original order.
+    """
+    clusters = clusters_from_arrays(
+        matrix, frac_coords, species, rcut, elements, verlet=verlet, halo=halo
+    )
+    graph = Graph(clusters=clusters)
+    graph.profile = active_profile()
+    return graph
+
+
+def analyse_arrays(
+    matrix: npt.ArrayLike,
+    frac_coords: npt.ArrayLike,
+    species: npt.ArrayLike,
+    rcut: float,
+    elements: set,
+    torture: bool = True,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> dict[str, npt.NDArray | float]:
+    """Run the graph pipeline on array inputs and return the results as arrays.
+
+    Runs the neighbour search, halo, clustering and (optionally) tortuosity
+    analysis without pymatgen.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates (n x 3) of the sites.
+        species: Species of each site, as strings or integer codes.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of species (of the same kind as species) to include.
+        torture: Whether to calculate tortuosity for periodic clusters (Fortran
+            if available, otherwise pure Python).
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+    Returns:
+        Dict with keys:
+            - "frac_percolating": Fraction of the included sites in periodic clusters.
+            - "cluster": Index into the cluster arrays for each input site, -1
+              for sites not in elements.
+            - "tortuosity": Tortuosity of each input site, NaN if not calculated.
+            - "cluster_size": Number of unit cell sites in each cluster.
+            - "cluster_periodic": Periodicity (0-3) of each cluster.
+            - "cluster_tortuosity": Tortuosity of each cluster, NaN if not periodic
+              or not calculated.
+        Clusters are ordered by their lowest site index.
+
+    Example:
+        >>> results = analyse_arrays(lattice, frac_coords, codes, 4.0, {3})
+        >>> results["cluster_periodic"]
+    """
+    species = np.asarray(species)
+    graph = graph_from_arrays(matrix, frac_coords, species, rcut, elements, halo=halo)
+    return _graph_results(graph, species, elements, torture)
+
+
+def _graph_results(
+    graph: Graph, species: npt.NDArray, elements: set, torture: bool
+) -> dict[str, npt.NDArray | float]:
+    """Torture a graph built from the sites with species in elements and tabulate it.
+
+    See analyse_arrays for the returned dict.
+    """
+    if torture:
+        if tort is not None and tort.tort_mod is not None:
+            graph.torture()
+        else:
+            graph.torture_py()
+    else:
+        graph.set_minimal_clusters()
+
+    site_index = np.flatnonzero(_species_mask(species, elements))
+    min_clusters = sorted(graph.minimal_clusters, key=lambda c: min(c.site_indices))
+    cluster = np.full(len(species), -1, dtype=np.int64)
+    tortuosity = np.full(len(species), np.nan)
+    for index, min_clus in enumerate(min_clusters):
+        cluster[site_index[min_clus.site_indices]] = index
+    for uc_index, site_tortuosity in (graph.tortuosity or {}).items():
+        tortuosity[site_index[uc_index]] = site_tortuosity
+
+    return {
+        "frac_percolating": graph.return_frac_percolating(),
+        "cluster": cluster,
+        "tortuosity": tortuosity,
+        "cluster_size": np.array([c.size for c in min_clusters], dtype=np.int64),
+        "cluster_periodic": np.array([c.periodic or 0 for c in min_clusters], dtype=np.int64),
+        "cluster_tortuosity": np.array(
+            [
+                c.tortuosity if torture and c.periodic and c.tortuosity is not None else np.nan
+                for c in min_clusters
+            ],
+            dtype=np.float64,
+        ),
+    }
+
+
+def _species_mask(species: npt.ArrayLike, elements: set) -> npt.NDArray[np.bool_]:
+    """Return a mask of the sites with species in elements.
+
+    Raises:
+        ValueError: If elements is empty.
+        ValueError: If elements contains species not present in species.
+    """
+    if not elements:
+        raise ValueError("elements cannot be empty")
+    species = np.asarray(species)
+    invalid_species = [spec for spec in elements if not np.any(species == spec)]
+    if invalid_species:
+        raise ValueError(f"Species {invalid_species} not found in species")
+    return np.isin(species, list(elements))
@@ -0,0 +1,225 @@
+"""Asyncio interface for running the graph pipeline from an event loop.
+
+The neighbour search and torture block for seconds on large structures, so
+AsyncAnalyser runs them in an executor it manages and awaits the result,
+keeping the event loop free. A semaphore bounds how many calls run at once;
+calls past the bound wait without occupying the executor.
+
+Two executors are supported:
+
+* "thread" (the default): the Fortran module's node graph is process-wide
+  state serialised by tort.state_lock, so graphs can be built and tortured
+  from worker threads, and ctypes releases the GIL during each Fortran call.
+  Tortures still run one at a time, since the state is not re-entrant.
+  Graph objects are returned as they are, so graph_from_structure and
+  torture are available.
+* "process": each worker process has its own Fortran state, so tortures run
+  in parallel. Structures and results are pickled between processes, so only
+  analyse_structure and analyse_arrays, which return plain results, are
+  available.
+
+Cancelling an awaiting task drops a call that has not started yet. A call
+that is already running cannot be interrupted: it finishes in the background,
+its result is discarded, and it keeps its concurrency slot until it ends.
+
+Example:
+    >>> async with AsyncAnalyser(max_concurrency=4) as analyser:
+    ...     graph = await analyser.graph_from_structure(structure, 4.0, {"Li"})
+    ...     await analyser.torture(graph)
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+import numpy.typing as npt
+
+from crystal_torture.cluster import DEFAULT_HALO
+
+if TYPE_CHECKING:
+    from pymatgen.core import Structure
+
+    from crystal_torture.graph import Graph
+
+# Executors AsyncAnalyser can run calls in.
+EXECUTORS = ("thread", "process")
+
+
+def _torture(graph: 'Graph') -> 'Graph':
+    """Torture graph with the Fortran kernels if available, otherwise in pure Python."""
+    from crystal_torture import tort
+
+    if tort.tort_mod is not None:
+        graph.torture()
+    else:
+        graph.torture_py()
+    return graph
+
+
+class AsyncAnalyser:
+    """Run the graph pipeline in a managed executor, awaitable from asyncio."""
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
+        """Start the executor.
+
+        Args:
+            executor: "thread" or "process" (see the module docstring).
+            max_workers: Number of worker threads or processes. Defaults to
+                the number of available cores.
+            max_concurrency: Maximum number of calls running or queued in the
+                executor at once. Defaults to max_workers.
+
+        Raises:
+            ValueError: If executor is unknown, or max_workers or
+                max_concurrency is less than 1.
+        """
+        from crystal_torture.cost import available_cores
+
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {list(EXECUTORS)}")
+        if max_workers is None:
+            max_workers = available_cores()
+        if max_concurrency is None:
+            max_concurrency = max_workers
+        if max_workers < 1 or max_concurrency < 1:
+            raise ValueError("max_workers and max_concurrency must be at least 1")
+
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pool: concurrent.futures.Executor | None
+        if executor == "process":
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context()
+            )
+        else:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers, thread_name_prefix="crystal_torture"
+            )
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run func in the executor once a concurrency slot is free, and await its result."""
+        if self._pool is None:
+            raise RuntimeError("AsyncAnalyser is closed")
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        try:
+            future = self._pool.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # Release the slot when the call ends, not when the caller stops
+        # waiting, so cancelled calls still running count against the bound.
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        # Cancelling the wrapped future cancels the call if it has not started.
+        return await asyncio.wrap_future(future)
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            # The event loop has closed, so nothing is waiting for the slot.
+            pass
+
+    def _require_threads(self, name: str) -> None:
+        if self.executor != "thread":
+            raise ValueError(f"{name} returns Graph objects, so needs the thread executor")
+
+    async def graph_from_structure(
+        self,
+        structure: 'Structure',
+        rcut: float,
+        elements: set[str],
+        halo: tuple[int, int, int] = DEFAULT_HALO,
+    ) -> 'Graph':
+        """Create a graph from a pymatgen structure (see pymatgen_interface.graph_from_structure).
+
+        Raises:
+            ValueError: If the analyser uses the process executor.
+        """
+        from crystal_torture.pymatgen_interface import graph_from_structure
+
+        self._require_threads("graph_from_structure")
+        return await self._run(graph_from_structure, structure, rcut, elements, halo=halo)
+
+    async def torture(self, graph: 'Graph') -> 'Graph':
+        """Torture a graph, with Fortran if available, otherwise in pure Python.
+
+        Args:
+            graph: Graph from graph_from_structure.
+
+        Returns:
+            The same graph, with tortuosity and minimal clusters set.
+
+        Raises:
+            ValueError: If the analyser uses the process executor.
+        """
+        self._require_threads("torture")
+        return await self._run(_torture, graph)
+
+    async def analyse_structure(
+        self,
+        structure: 'Structure',
+        rcut: float,
+        elements: set[str],
+        torture: bool = True,
+        halo: tuple[int, int, int] = DEFAULT_HALO,
+        engine: str | None = None,
+    ) -> dict:
+        """Run the whole pipeline on a structure (see batch.analyse_structure).
+
+        Returns:
+            Dict with keys "frac_percolating" and "clusters".
+        """
+        from crystal_torture.batch import analyse_structure
+
+        return await self._run(
+            analyse_structure, structure, rcut, elements, torture=torture, halo=halo, engine=engine
+        )
+
+    async def analyse_arrays(
+        self,
+        matrix: npt.ArrayLike,
+        frac_coords: npt.ArrayLike,
+        species: npt.ArrayLike,
+        rcut: float,
+        elements: set[str],
+        torture: bool = True,
+        halo: tuple[int, int, int] = DEFAULT_HALO,
+    ) -> dict[str, npt.NDArray | float]:
+        """Run the array pipeline on a structure (see array_interface.analyse_arrays)."""
+        from crystal_torture.array_interface import analyse_arrays
+
+        return await self._run(
+            analyse_arrays, matrix, frac_coords, species, rcut, elements,
+            torture=torture, halo=halo,
+        )
+
+    def close(self, wait: bool = True) -> None:
+        """Shut the executor down, cancelling calls that have not started.
+
+        Args:
+            wait: Whether to block until running calls finish.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    async def aclose(self) -> None:
+        """Shut the executor down without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self) -> 'AsyncAnalyser':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
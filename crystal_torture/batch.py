@@ -0,0 +1,829 @@
+"""Batch percolation and tortuosity runs over many structure files.
+
+Results are streamed to an append-only JSON Lines or SQLite store (or, for
+Parquet output, a JSON Lines journal turned into a Parquet table on close) as
+each structure finishes, with one record per structure, so long runs can be
+resumed from a partial output file. Structures are analysed
+in worker processes, so a structure that raises, hangs past its timeout or
+kills its worker (for example by running out of memory) is recorded as a
+failure and the run carries on.
+"""
+
+import glob
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from crystal_torture.cluster import DEFAULT_HALO
+
+if TYPE_CHECKING:
+    from pymatgen.core import Structure
+
+    from crystal_torture.cost import CostModel
+    from crystal_torture.graph import Graph
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+# Output formats accepted by open_results.
+RESULT_FORMATS = ("jsonl", "sqlite", "parquet")
+
+# Status of a record: analysed, raised an exception, ran past its timeout, or
+# killed its worker process.
+STATUSES = ("ok", "error", "timeout", "crashed")
+
+
+def expand_inputs(patterns: Iterable[str]) -> list[str]:
+    """Expand glob patterns (with ** for recursion) into a sorted, de-duplicated file list.
+
+    Args:
+        patterns: File names or glob patterns.
+
+    Returns:
+        The matching file names, in sorted order.
+
+    Raises:
+        ValueError: If a pattern matches no files.
+    """
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        matches = [match for match in matches if os.path.isfile(match)]
+        if not matches:
+            raise ValueError(f"No structure files match {pattern}")
+        files.update(matches)
+    return sorted(files)
+
+
+def analyse_file(
+    filename: str | Path,
+    rcut: float,
+    elements: set[str],
+    torture: bool = True,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+    omp_threads: int | None = None,
+    engine: str | None = None,
+) -> dict:
+    """Run the graph pipeline on one structure file and return a result record.
+
+    Args:
+        filename: Structure file readable by pymatgen.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of element strings to include in setting up the graph.
+        torture: Whether to calculate tortuosity for periodic clusters (Fortran
+            if available, otherwise pure Python).
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+        omp_threads: Number of OpenMP threads for the Fortran kernels, or None
+            to leave the setting unchanged.
+        engine: "fortran" or "python" to choose the tortuosity engine, or None
+            to use Fortran if it is available.
+
+    Returns:
+        Dict with keys "file", "frac_percolating" and "clusters" (see
+        analyse_structure).
+
+    Raises:
+        ValueError: If engine is not one of cost.ENGINES.
+    """
+    from pymatgen.core import Structure
+
+    structure = Structure.from_file(str(filename))
+    result = analyse_structure(structure, rcut, elements, torture, halo, omp_threads, engine)
+    return {"file": str(filename), **result}
+
+
+def analyse_structure(
+    structure: 'Structure',
+    rcut: float,
+    elements: set[str],
+    torture: bool = True,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+    omp_threads: int | None = None,
+    engine: str | None = None,
+) -> dict:
+    """Run the graph pipeline on one structure and return its results.
+
+    Args:
+        structure: Pymatgen Structure.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of element strings to include in setting up the graph.
+        torture: Whether to calculate tortuosity for periodic clusters.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+        omp_threads: Number of OpenMP threads for the Fortran kernels, or None
+            to leave the setting unchanged.
+        engine: "fortran" or "python" to choose the tortuosity engine, or None
+            to use Fortran if it is available.
+
+    Returns:
+        Dict with keys "frac_percolating" and "clusters". "clusters" lists a
+        dict per minimal cluster, with keys "size", "periodic" and
+        "tortuosity" (None if not periodic or not calculated).
+
+    Raises:
+        ValueError: If engine is not one of cost.ENGINES.
+    """
+    from crystal_torture import tort
+    from crystal_torture.cost import ENGINES
+    from crystal_torture.pymatgen_interface import graph_from_structure
+
+    if engine is None:
+        engine = "fortran" if tort.tort_mod is not None else "python"
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {list(ENGINES)}")
+
+    with tort.openmp_settings(num_threads=omp_threads):
+        graph = graph_from_structure(structure, rcut, elements, halo=halo)
+        if torture:
+            if engine == "fortran":
+                graph.torture()
+            else:
+                graph.torture_py()
+        else:
+            graph.set_minimal_clusters()
+    return graph_results(graph, torture)
+
+
+def graph_results(graph: 'Graph', torture: bool = True) -> dict:
+    """Return the percolating fraction and minimal clusters of an analysed graph.
+
+    Args:
+        graph: Graph with minimal clusters set.
+        torture: Whether the graph was tortured (otherwise tortuosities are None).
+
+    Returns:
+        Dict with keys "frac_percolating" and "clusters" (see analyse_structure),
+        with clusters in order of their lowest site index.
+    """
+    clusters = sorted(graph.minimal_clusters, key=lambda c: min(c.site_indices))
+    return {
+        "frac_percolating": graph.return_frac_percolating(),
+        "clusters": [
+            {
+                "size": min_clus.size,
+                "periodic": min_clus.periodic or 0,
+                "tortuosity": (
+                    min_clus.tortuosity if torture and min_clus.periodic else None
+                ),
+            }
+            for min_clus in clusters
+        ],
+    }
+
+
+def _record(filename: str | Path, status: str, elapsed: float, result: dict | None = None,
+        error: str | None = None) -> dict:
+    """Build the record of one structure from its analyse_file result or failure."""
+    return {
+        "file": str(filename),
+        "status": status,
+        "error": error,
+        "elapsed": elapsed,
+        "duplicate_of": None,
+        "frac_percolating": None if result is None else result["frac_percolating"],
+        "clusters": [] if result is None else result["clusters"],
+    }
+
+
+def _error_message(error: BaseException) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _worker_loop(conn: Connection, rcut: float, elements: set[str], options: dict,
+        max_memory: int | None) -> None:
+    """Analyse the jobs sent over conn until None is received (runs in a worker process).
+
+    Each job is a (filename, job options) pair; job options override options
+    for that file.
+    """
+    if max_memory is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        filename, job_options = job
+        try:
+            result = analyse_file(filename, rcut, elements, **{**options, **job_options})
+            conn.send(("ok", result, None))
+        except Exception as error:
+            conn.send(("error", None, _error_message(error)))
+
+
+class _Worker:
+    """A worker process analysing one structure at a time."""
+
+    def __init__(self, context: multiprocessing.context.BaseContext, args: tuple) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child_conn, *args), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.filename: str | Path | None = None
+        self.started = 0.0
+
+    def submit(self, filename: str | Path, job_options: dict) -> None:
+        self.filename = filename
+        self.started = time.perf_counter()
+        self.conn.send((filename, job_options))
+
+    def stop(self) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _run_in_workers(
+    jobs: Iterable[tuple[str | Path, dict]],
+    args: tuple,
+    workers: int,
+    timeout: float | None,
+) -> Iterator[dict]:
+    """Analyse (filename, job options) jobs in isolated worker processes.
+
+    Yields records as the jobs finish.
+    """
+    context = multiprocessing.get_context()
+    jobs = iter(jobs)
+    pool: list[_Worker] = []
+    idle: list[_Worker] = []
+    busy: dict[Connection, _Worker] = {}
+    try:
+        for _ in range(workers):
+            worker = _Worker(context, args)
+            pool.append(worker)
+            idle.append(worker)
+        exhausted = False
+        while True:
+            while idle and not exhausted:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                worker = idle.pop()
+                worker.submit(*job)
+                busy[worker.conn] = worker
+            if not busy:
+                return
+
+            wait_time = None
+            if timeout is not None:
+                now = time.perf_counter()
+                wait_time = max(0.0, min(w.started + timeout - now for w in busy.values()))
+            ready = wait(list(busy), timeout=wait_time)
+
+            finished: list[tuple[_Worker, dict, bool]] = []
+            for conn in ready:
+                worker = busy.pop(conn)
+                elapsed = time.perf_counter() - worker.started
+                try:
+                    status, result, error = conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join()
+                    message = f"Worker process exited with code {worker.process.exitcode}"
+                    record = _record(worker.filename, "crashed", elapsed, error=message)
+                    finished.append((worker, record, True))
+                else:
+                    record = _record(worker.filename, status, elapsed, result, error)
+                    finished.append((worker, record, False))
+            if timeout is not None:
+                now = time.perf_counter()
+                for conn, worker in list(busy.items()):
+                    if now - worker.started >= timeout:
+                        del busy[conn]
+                        message = f"Timed out after {timeout:g} s"
+                        record = _record(
+                            worker.filename, "timeout", now - worker.started, error=message
+                        )
+                        finished.append((worker, record, True))
+
+            for worker, record, replace in finished:
+                if replace:
+                    # The worker is dead or stuck, so start a fresh one in its place.
+                    worker.kill()
+                    pool.remove(worker)
+                    worker = _Worker(context, args)
+                    pool.append(worker)
+                idle.append(worker)
+                yield record
+    finally:
+        for worker in pool:
+            worker.stop()
+
+
+def run_batch(
+    files: Iterable[str | Path],
+    rcut: float,
+    elements: set[str],
+    torture: bool = True,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+    workers: int | None = None,
+    omp_threads: int | None = None,
+    timeout: float | None = None,
+    max_memory: int | None = None,
+    dedup: bool = False,
+    match: bool = False,
+    schedule: bool = False,
+    cost_model: 'CostModel | None' = None,
+) -> Iterator[dict]:
+    """Analyse structure files, yielding a record for each as soon as it is finished.
+
+    A structure that fails does not stop the batch: its record has a status
+    other than "ok" and an error message instead of results.
+
+    With dedup, each file is read and fingerprinted (see
+    fingerprint.structure_fingerprint) before it is queued, and files whose
+    elements sites duplicate an earlier file are not analysed again: their
+    record copies the results of the first file and names it in "duplicate_of".
+    Structures with more than fingerprint.MAX_DEDUP_SITES elements sites are
+    not fingerprinted and always run.
+
+    With schedule, every file is read up front and its run time estimated
+    with the cost model (see cost.CostModel). Files are then queued largest
+    first, so a long structure does not start last and hold up the end of the
+    batch, and each is run with the faster engine and with its share of the
+    cores as OpenMP threads (see cost.omp_threads_for), unless omp_threads is
+    given.
+
+    Args:
+        files: Structure files to analyse.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of element strings to include in setting up each graph.
+        torture: Whether to calculate tortuosity for periodic clusters.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+        workers: Number of worker processes. Each structure runs in a worker,
+            so a crash or timeout only loses that structure. None analyses the
+            files in the calling process, in order, without timeouts.
+        omp_threads: Number of OpenMP threads per structure for the Fortran kernels.
+        timeout: Seconds a structure may take before its worker is killed
+            (requires workers).
+        max_memory: Address space limit in bytes for each worker process,
+            where supported, so a runaway structure fails with MemoryError
+            (requires workers).
+        dedup: Whether to skip files that duplicate an earlier file.
+        match: With dedup, confirm duplicates with pymatgen's StructureMatcher
+            (see fingerprint.default_matcher) rather than trusting equal fingerprints.
+        schedule: Whether to order files and choose their engine and OpenMP
+            threads by estimated cost.
+        cost_model: CostModel used with schedule (defaults to the calibrated
+            coefficients of cost.DEFAULT_COEFFICIENTS).
+
+    Yields:
+        Dict per structure with keys "file", "status" (one of STATUSES),
+        "error" (message, or None), "elapsed" (seconds), "duplicate_of" (file
+        the results were copied from, or None), "frac_percolating" (None
+        unless status is "ok") and "clusters" (see analyse_file). With
+        workers or dedup, in completion order; with schedule, files start in
+        order of decreasing cost.
+
+    Raises:
+        ValueError: If timeout or max_memory is given without workers.
+    """
+    if dedup:
+        yield from _deduplicated(
+            files,
+            lambda unique: run_batch(
+                unique, rcut, elements, torture=torture, halo=halo, workers=workers,
+                omp_threads=omp_threads, timeout=timeout, max_memory=max_memory,
+                schedule=schedule, cost_model=cost_model,
+            ),
+            elements,
+            match,
+        )
+        return
+
+    if (timeout is not None or max_memory is not None) and not (workers and workers >= 1):
+        raise ValueError("timeout and max_memory need worker processes (workers >= 1)")
+
+    options = {"torture": torture, "halo": halo, "omp_threads": omp_threads}
+    if schedule:
+        jobs: Iterable[tuple[str | Path, dict]] = _scheduled(
+            files, rcut, elements, torture, halo, workers or 1, omp_threads, cost_model
+        )
+    else:
+        jobs = ((filename, {}) for filename in files)
+    if workers is not None and workers >= 1:
+        yield from _run_in_workers(jobs, (rcut, elements, options, max_memory), workers, timeout)
+        return
+
+    for filename, job_options in jobs:
+        started = time.perf_counter()
+        try:
+            result = analyse_file(filename, rcut, elements, **{**options, **job_options})
+        except Exception as error:
+            elapsed = time.perf_counter() - started
+            yield _record(filename, "error", elapsed, error=_error_message(error))
+        else:
+            yield _record(filename, "ok", time.perf_counter() - started, result)
+
+
+def _scheduled(
+    files: Iterable[str | Path],
+    rcut: float,
+    elements: set[str],
+    torture: bool,
+    halo: tuple[int, int, int],
+    workers: int,
+    omp_threads: int | None,
+    cost_model: 'CostModel | None',
+) -> list[tuple[str | Path, dict]]:
+    """Return (filename, job options) jobs in order of decreasing estimated cost."""
+    from pymatgen.core import Structure
+
+    from crystal_torture.cost import CostModel, available_cores, omp_threads_for, structure_features
+
+    model = cost_model if cost_model is not None else CostModel()
+    estimates = []
+    for filename in files:
+        try:
+            features = structure_features(Structure.from_file(str(filename)), rcut, elements, halo)
+        except Exception:
+            # Unreadable files go last, for the worker to record the error.
+            estimates.append((-1.0, filename, {}))
+            continue
+        if not torture:
+            features[2] = 0.0
+        engine = model.best_engine(features)
+        estimates.append((model.estimate(features, engine), filename, {"engine": engine}))
+    estimates.sort(key=lambda estimate: estimate[0], reverse=True)
+
+    cores = available_cores()
+    jobs = []
+    for i, (cost, filename, job_options) in enumerate(estimates):
+        if omp_threads is None and job_options:
+            # Structures still queued when this one starts run alongside it.
+            concurrent = min(workers, len(estimates) - i)
+            job_options["omp_threads"] = omp_threads_for(cost, cores, concurrent)
+        jobs.append((filename, job_options))
+    return jobs
+
+
+def _deduplicated(
+    files: Iterable[str | Path],
+    run: Callable[[Iterable[str | Path]], Iterator[dict]],
+    elements: set[str],
+    match: bool,
+) -> Iterator[dict]:
+    """Run only the first of each set of duplicate files, copying its record to the rest."""
+    from pymatgen.core import Structure
+
+    from crystal_torture.fingerprint import (
+        MAX_DEDUP_SITES,
+        default_matcher,
+        filter_species,
+        structure_fingerprint,
+    )
+    from crystal_torture.pymatgen_interface import element_mask
+
+    matcher = default_matcher() if match else None
+    # Fingerprint -> (species-filtered structure or None, first file) per distinct structure.
+    seen: dict[str, list[tuple[Structure | None, str]]] = {}
+    records: dict[str, dict] = {}
+    waiting: dict[str, list[str]] = {}
+    ready: list[dict] = []
+
+    def copy(record: dict, filename: str) -> dict:
+        return dict(record, file=filename, elapsed=0.0, duplicate_of=record["file"])
+
+    def original_of(filename: str) -> str | None:
+        """Return the earlier file that filename duplicates, recording it if it is new."""
+        try:
+            structure = Structure.from_file(filename)
+            if element_mask(structure, set(elements)).sum() > MAX_DEDUP_SITES:
+                # Too large to fingerprint in the parent; run it as a new structure.
+                return None
+            key = structure_fingerprint(structure, elements)
+            filtered = filter_species(structure, elements) if matcher is not None else None
+        except Exception:
+            # Let the worker fail on it and record the error.
+            return None
+        entries = seen.setdefault(key, [])
+        for cached, original in entries:
+            if matcher is None or matcher.fit(filtered, cached):
+                return original
+        entries.append((filtered, filename))
+        return None
+
+    def unique() -> Iterator[str]:
+        for filename in map(str, files):
+            original = original_of(filename)
+            if original is None:
+                yield filename
+            elif original in records:
+                ready.append(copy(records[original], filename))
+            else:
+                waiting.setdefault(original, []).append(filename)
+
+    for record in run(unique()):
+        records[record["file"]] = record
+        ready.append(record)
+        ready.extend(copy(record, filename) for filename in waiting.pop(record["file"], []))
+        yield from ready
+        ready.clear()
+    yield from ready
+
+
+def completed_inputs(records: Iterable[dict], retry_failed: bool = False) -> set[str]:
+    """Return the inputs a resumed run can skip.
+
+    Later records for the same file supersede earlier ones.
+
+    Args:
+        records: Records from a previous run.
+        retry_failed: Whether to run failed inputs again (otherwise only
+            inputs with no record are run).
+
+    Returns:
+        Set of file names.
+    """
+    latest = {record["file"]: record for record in records}
+    return {
+        filename
+        for filename, record in latest.items()
+        if not retry_failed or record.get("status", "ok") == "ok"
+    }
+
+
+def result_format(path: str | Path, fmt: str | None = None) -> str:
+    """Return the output format, guessed from the file suffix if fmt is None.
+
+    Raises:
+        ValueError: If fmt is not one of RESULT_FORMATS.
+    """
+    if fmt is None:
+        suffix = Path(path).suffix.lower()
+        if suffix in (".parquet", ".pq"):
+            fmt = "parquet"
+        elif suffix in (".sqlite", ".sqlite3", ".db"):
+            fmt = "sqlite"
+        else:
+            fmt = "jsonl"
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format {fmt!r}; expected one of {list(RESULT_FORMATS)}")
+    return fmt
+
+
+def read_results(path: str | Path, fmt: str | None = None) -> list[dict]:
+    """Read the records of a (possibly partial) results file.
+
+    A JSON Lines file cut off mid-record by an interrupted run is read up to
+    its last complete record. For Parquet output, the records journaled by an
+    interrupted ParquetResultWriter follow those of the Parquet file (if any).
+
+    Args:
+        path: Results file written by JSONLResultWriter, SQLiteResultWriter or
+            ParquetResultWriter.
+        fmt: "jsonl", "sqlite" or "parquet"; guessed from the suffix if None.
+
+    Returns:
+        List of result records, in the order they were written.
+    """
+    fmt = result_format(path, fmt)
+    if fmt == "parquet":
+        pq = _import_parquet()
+        path = Path(path)
+        journal = path.with_name(path.name + ".partial.jsonl")
+        records = pq.read_table(path).to_pylist() if path.exists() else []
+        if journal.exists():
+            records.extend(_read_jsonl(journal)[0])
+        return records
+    if fmt == "sqlite":
+        return _read_sqlite(path)
+    records, _ = _read_jsonl(path)
+    return records
+
+
+def _read_sqlite(path: str | Path) -> list[dict]:
+    """Read the records of a SQLite results store."""
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT record FROM results ORDER BY id").fetchall()
+    return [json.loads(record) for (record,) in rows]
+
+
+def _read_jsonl(path: str | Path) -> tuple[list[dict], int]:
+    """Read the complete records of a JSON Lines file and the byte length they span."""
+    records = []
+    length = 0
+    with open(path, "rb") as handle:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            length += len(line)
+    return records, length
+
+
+class JSONLResultWriter:
+    """Append result records to a JSON Lines file, flushing each one."""
+
+    def __init__(self, path: str | Path, resume: bool = False) -> None:
+        """Open the results file.
+
+        Args:
+            path: JSON Lines file to write.
+            resume: Keep the complete records of an existing file and append
+                after them; otherwise the file is overwritten.
+        """
+        self.path = Path(path)
+        self.completed: list[dict] = []
+        if resume and self.path.exists():
+            self.completed, length = _read_jsonl(self.path)
+            self._handle = open(self.path, "r+", encoding="utf-8")
+            # Drop a record left half-written by an interrupted run.
+            self._handle.truncate(length)
+            self._handle.seek(length)
+        else:
+            self._handle = open(self.path, "w", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        """Write one record and flush it to disk."""
+        self._handle.write(json.dumps(record) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> 'JSONLResultWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SQLiteResultWriter:
+    """Append result records to a SQLite database, committing each one."""
+
+    def __init__(self, path: str | Path, resume: bool = False) -> None:
+        """Open the results database.
+
+        Args:
+            path: SQLite file to write.
+            resume: Keep the records of an existing database and append after
+                them; otherwise the file is overwritten.
+        """
+        self.path = Path(path)
+        if not resume and self.path.exists():
+            self.path.unlink()
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, file TEXT NOT NULL, "
+            "status TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self.completed: list[dict] = _read_sqlite(self.path)
+
+    def write(self, record: dict) -> None:
+        """Insert one record and commit it."""
+        self._conn.execute(
+            "INSERT INTO results (file, status, record) VALUES (?, ?, ?)",
+            (record["file"], record.get("status", "ok"), json.dumps(record)),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'SQLiteResultWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ParquetResultWriter:
+    """Write result records to a Parquet file, journaling each one until the file is closed.
+
+    Parquet files can only be read once closed, so each record is first
+    appended (and flushed) to a JSON Lines journal next to path, named
+    path + ".partial.jsonl". On close, the records are written to a temporary
+    file in row groups of batch_size, which replaces path, and the journal is
+    removed. A run that is killed leaves the journal behind; resuming picks
+    up its records as well as those of the previous Parquet file.
+    """
+
+    def __init__(self, path: str | Path, resume: bool = False, batch_size: int = 64) -> None:
+        """Open the results file.
+
+        Args:
+            path: Parquet file to write.
+            resume: Keep the records of an existing file and of a journal left
+                by an interrupted run; otherwise both are overwritten.
+            batch_size: Number of records per row group.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        pa = _import_pyarrow()
+        pq = _import_parquet()
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.schema = pa.schema(
+            [
+                ("file", pa.string()),
+                ("status", pa.string()),
+                ("error", pa.string()),
+                ("elapsed", pa.float64()),
+                ("duplicate_of", pa.string()),
+                ("frac_percolating", pa.float64()),
+                (
+                    "clusters",
+                    pa.list_(
+                        pa.struct(
+                            [
+                                ("size", pa.int64()),
+                                ("periodic", pa.int64()),
+                                ("tortuosity", pa.float64()),
+                            ]
+                        )
+                    ),
+                ),
+            ]
+        )
+        self._written: list[dict] = []
+        if resume and self.path.exists():
+            self._written = pq.read_table(self.path).to_pylist()
+        self.journal_path = self.path.with_name(self.path.name + ".partial.jsonl")
+        self._journal = JSONLResultWriter(self.journal_path, resume=resume)
+        self.completed: list[dict] = self._written + self._journal.completed
+
+    def write(self, record: dict) -> None:
+        """Append one record to the journal and flush it to disk."""
+        self._journal.write(record)
+
+    def close(self) -> None:
+        """Write the Parquet file from the previous and journaled records and move it into place."""
+        pa = _import_pyarrow()
+        pq = _import_parquet()
+        self._journal.close()
+        records = self._written + _read_jsonl(self.journal_path)[0]
+        temp_path = self.path.with_name(self.path.name + ".partial")
+        with pq.ParquetWriter(temp_path, self.schema) as writer:
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start:start + self.batch_size]
+                writer.write_table(pa.Table.from_pylist(batch, schema=self.schema))
+        os.replace(temp_path, self.path)
+        self.journal_path.unlink()
+
+    def __enter__(self) -> 'ParquetResultWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_results(
+    path: str | Path, fmt: str | None = None, resume: bool = False
+) -> JSONLResultWriter | SQLiteResultWriter | ParquetResultWriter:
+    """Open a results writer for the given path and format.
+
+    Args:
+        path: Results file to write.
+        fmt: "jsonl", "sqlite" or "parquet"; guessed from the suffix if None.
+        resume: Keep the records of an existing file (see the writers).
+
+    Returns:
+        The writer; its completed attribute lists the records kept from a previous run.
+    """
+    fmt = result_format(path, fmt)
+    if fmt == "parquet":
+        return ParquetResultWriter(path, resume=resume)
+    if fmt == "sqlite":
+        return SQLiteResultWriter(path, resume=resume)
+    return JSONLResultWriter(path, resume=resume)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "Parquet output requires pyarrow; install it with pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+def _import_parquet():
+    _import_pyarrow()
+    import pyarrow.parquet
+
+    return pyarrow.parquet
@@ -0,0 +1,205 @@
+"""Command-line interface for batch percolation and tortuosity runs.
+
+Example:
+    crystal-torture "structures/**/*.vasp" --rcut 4.0 --elements Li \\
+        --workers 8 --omp-threads 1 --timeout 600 -o results.jsonl --resume
+
+Each structure runs in a worker process, so one that fails, times out or
+runs out of memory is recorded with its error and the run carries on.
+Restarting with --resume skips the inputs already recorded in the output.
+The exit status is 1 if any structure failed.
+"""
+
+import argparse
+import json
+import sys
+from collections.abc import Sequence
+
+from crystal_torture.batch import (
+    RESULT_FORMATS,
+    completed_inputs,
+    expand_inputs,
+    open_results,
+    run_batch,
+)
+from crystal_torture.version import __version__
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser of the crystal-torture command."""
+    parser = argparse.ArgumentParser(
+        prog="crystal-torture",
+        description=(
+            "Calculate the percolating fraction and per-cluster periodicity and "
+            "tortuosity of a batch of structure files."
+        ),
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        metavar="FILE",
+        help="Structure files or glob patterns (quote patterns; ** recurses).",
+    )
+    parser.add_argument(
+        "--rcut", type=float, required=True, help="Cut-off radius for connecting sites."
+    )
+    parser.add_argument(
+        "--elements", nargs="+", required=True, help="Species to include in the graph."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "Results file: JSON Lines, SQLite for .sqlite/.db or Parquet for .parquet "
+            "(journaled to OUTPUT.partial.jsonl until the run ends). "
+            "Defaults to JSON Lines on stdout."
+        ),
+    )
+    parser.add_argument(
+        "--format", choices=RESULT_FORMATS, help="Results format (default: from the output suffix)."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep the results already in the output file and skip their inputs.",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="With --resume, run inputs that failed in the previous run again.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of worker processes (default: 1)."
+    )
+    parser.add_argument(
+        "--omp-threads",
+        type=int,
+        help="OpenMP threads per structure for the Fortran kernels (default: OpenMP default).",
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="Seconds a structure may take before it is abandoned."
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        metavar="MIB",
+        help="Memory limit per worker process in MiB (where supported).",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Analyse structures with the same lattice and element sites only once.",
+    )
+    parser.add_argument(
+        "--match",
+        action="store_true",
+        help="With --dedup, confirm duplicates with pymatgen's StructureMatcher.",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help=(
+            "Estimate the cost of each structure and run the largest first, choosing "
+            "the engine and OpenMP threads (unless --omp-threads is given) per structure."
+        ),
+    )
+    parser.add_argument(
+        "--halo",
+        type=int,
+        nargs=3,
+        default=None,
+        metavar=("NX", "NY", "NZ"),
+        help="Periodic images along each lattice vector (default: 3 3 3).",
+    )
+    parser.add_argument(
+        "--no-torture",
+        action="store_true",
+        help="Only find clusters and their periodicity, without tortuosity.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the crystal-torture command.
+
+    Args:
+        argv: Command-line arguments (defaults to sys.argv[1:]).
+
+    Returns:
+        Exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.omp_threads is not None and args.omp_threads < 1:
+        parser.error("--omp-threads must be at least 1")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.max_memory is not None and args.max_memory <= 0:
+        parser.error("--max-memory must be positive")
+    if args.match and not args.dedup:
+        parser.error("--match needs --dedup")
+    if args.resume and args.output is None:
+        parser.error("--resume needs an --output file")
+    if args.output is None and args.format == "parquet":
+        parser.error("Parquet results need an --output file")
+
+    try:
+        files = expand_inputs(args.inputs)
+    except ValueError as error:
+        parser.error(str(error))
+
+    options = {
+        "torture": not args.no_torture,
+        "workers": args.workers,
+        "omp_threads": args.omp_threads,
+        "timeout": args.timeout,
+        "max_memory": None if args.max_memory is None else int(args.max_memory * 2**20),
+        "dedup": args.dedup,
+        "match": args.match,
+        "schedule": args.schedule,
+    }
+    if args.halo is not None:
+        options["halo"] = tuple(args.halo)
+
+    failed = 0
+    if args.output is None:
+        for record in run_batch(files, args.rcut, set(args.elements), **options):
+            failed += _report(record)
+            sys.stdout.write(json.dumps(record) + "\n")
+            sys.stdout.flush()
+        return _exit_status(failed)
+
+    with open_results(args.output, fmt=args.format, resume=args.resume) as writer:
+        done = completed_inputs(writer.completed, retry_failed=args.retry_failed)
+        todo = [filename for filename in files if filename not in done]
+        if done:
+            print(
+                f"Resuming: {len(files) - len(todo)} of {len(files)} structures already done",
+                file=sys.stderr,
+            )
+        for record in run_batch(todo, args.rcut, set(args.elements), **options):
+            failed += _report(record)
+            writer.write(record)
+    return _exit_status(failed)
+
+
+def _report(record: dict) -> int:
+    """Print the error of a failed record to stderr, returning 1 if it failed."""
+    if record["status"] == "ok":
+        return 0
+    print(f"{record['file']}: {record['status']}: {record['error']}", file=sys.stderr)
+    return 1
+
+
+def _exit_status(failed: int) -> int:
+    if failed:
+        print(f"{failed} structures failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,9 @@ from types import ModuleType
 from typing import cast
 from collections import deque
 
+# Number of unit cell images along each lattice vector in the default halo.
+DEFAULT_HALO = (3, 3, 3)
+
 # Module variable with proper type hint
 tort: ModuleType | None
 
@@ -25,13 +28,17 @@ class Cluster:
     """Cluster class: group of connected nodes within graph."""
 
     def __init__(self,
-        nodes: set[Node]) -> None:
+        nodes: set[Node],
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> None:
         """Initialise a cluster.
 
         Args:
             nodes: Set of nodes in the cluster.
+            halo: Number of unit cell images along each lattice vector in the
+                halo the nodes were built in (see create_halo).
         """
         self.nodes = nodes
+        self.halo = halo
         self.periodic: int | None = None
         self.tortuosity: float | None = None
 
@@ -44,7 +51,7 @@ class Cluster:
         Returns:
             New cluster containing nodes from both clusters.
         """
-        new_cluster = Cluster(self.nodes | other_cluster.nodes)
+        new_cluster = Cluster(self.nodes | other_cluster.nodes, halo=self.halo)
         return new_cluster
 
     def is_neighbour(self, other_cluster: Cluster) -> bool:
@@ -162,6 +169,10 @@ class Cluster:
         Significantly faster than the Python version above for large systems.
         Calculates the integer number of node-node steps it requires to get from a 
         node to its periodic image.
+
+        The Fortran module holds one node table at a time, so if the nodes
+        uploaded last are not this cluster's, the cluster's nodes are uploaded
+        first. The check, upload and torture hold tort.state_lock.
         
         Sets:
         node.tortuosity: Tortuosity for each node.
@@ -182,47 +193,110 @@ class Cluster:
         # Get the UC node indices for this cluster
         uc_node_indices = [node.index for node in self.uc_nodes]
         
-        # Run the torture algorithm
-        tort.tort_mod.torture(len(uc_node_indices), uc_node_indices)
-        
-        # Get results
-        for node in self.uc_nodes:
-            node.tortuosity = tort.tort_mod.uc_tort[node.uc_index]
-        
+        # Run the torture algorithm and get the results
+        with tort.state_lock:
+            if tort.tort_mod.owner not in self.nodes:
+                from crystal_torture.array_interface import set_fort_nodes
+
+                set_fort_nodes(self.nodes)
+                # Only this cluster is uploaded, so no graph may treat it as its own.
+                tort.tort_mod.owner = None
+            tort.tort_mod.torture(len(uc_node_indices), uc_node_indices)
+            uc_tort = tort.tort_mod.uc_tort
+        self.set_fort_tortuosity(uc_tort)
+
+    def set_fort_tortuosity(self, uc_tort: list[int]) -> None:
+        """Set node and cluster tortuosity from the Fortran uc_tort array.
+
+        Args:
+            uc_tort: Tortuosity of each unit cell node, indexed by UC index.
+
+        Sets:
+        node.tortuosity: Tortuosity for each node.
+        self.tortuosity: Average tortuosity for cluster.
+        """
         uc_nodes = self.uc_nodes
+        for node in uc_nodes:
+            node.tortuosity = uc_tort[node.uc_index]
+        
         valid_tortuosities = [node.tortuosity for node in uc_nodes if node.tortuosity is not None]
         self.tortuosity = sum(valid_tortuosities) / len(valid_tortuosities) if valid_tortuosities else 0.0
         
     def set_periodic(self) -> None:
-        """Set the periodicity of the cluster by counting UC nodes with same UC_index.
-        
-        Determines cluster periodicity by counting how many periodic images of the 
-        same unit cell site are connected in the cluster.
-        
+        """Set the periodicity of the cluster from the lattice translations it connects.
+
+        The cluster is walked from one node, unwrapping the halo image of each
+        node reached: the step along each edge is the image difference wrapped
+        into the halo. A translation of the cluster onto itself is found
+        whenever a node is reached with a different unwrapped image than
+        before (a path around the periodic halo) and between nodes that are
+        images of the same unit cell site. The cluster is periodic in as many
+        dimensions as the rank of these translations, so a chain along a cell
+        diagonal is 1D whatever the halo dimensions.
+
         Sets:
             self.periodic: 0=isolated, 1=1D periodic, 2=2D periodic, 3=3D periodic
         """
         if not self.nodes:
             self.periodic = 0
             return
-            
-        # Get any node to find its UC_index
-        node = next(iter(self.nodes))
-        uc_index = node.uc_index
-        
-        # Count nodes with same UC_index
-        no_images = len([n for n in self.nodes if n.uc_index == uc_index])
-        
-        if no_images == 27:
-            self.periodic = 3
-        elif no_images == 9:
-            self.periodic = 2
-        elif no_images == 3:
-            self.periodic = 1
-        else:
-            self.periodic = 0
-        
-def clusters_from_nodes(nodes: set[Node]) -> set[Cluster]:
+
+        nx, ny, nz = self.halo
+        n_images = nx * ny * nz
+
+        images = {}
+        for node in self.nodes:
+            position = node.index % n_images
+            images[node] = (position // (ny * nz), position // nz % ny, position % nz)
+        hx, hy, hz = nx // 2, ny // 2, nz // 2
+
+        # Translations can only span the axes along which the halo repeats.
+        max_rank = sum(n > 1 for n in self.halo)
+        translations: list[tuple[int, int, int]] = []
+        rank = 0
+
+        def add_translation(translation: tuple[int, int, int]) -> None:
+            nonlocal rank
+            if translation not in translations:
+                translations.append(translation)
+                rank = int(np.linalg.matrix_rank(np.array(translations)))
+
+        start = next(iter(self.nodes))
+        unwrapped = {start: images[start]}
+        queue = deque([start])
+        while queue and rank < max_rank:
+            node = queue.popleft()
+            ax, ay, az = images[node]
+            ox, oy, oz = unwrapped[node]
+            for neigh in node.neighbours or ():
+                if neigh not in images:
+                    continue
+                bx, by, bz = images[neigh]
+                # Step along the edge, wrapped into the halo.
+                rx = ox + (bx - ax + hx) % nx - hx
+                ry = oy + (by - ay + hy) % ny - hy
+                rz = oz + (bz - az + hz) % nz - hz
+                previous = unwrapped.get(neigh)
+                if previous is None:
+                    unwrapped[neigh] = (rx, ry, rz)
+                    queue.append(neigh)
+                elif (rx, ry, rz) != previous:
+                    add_translation((rx - previous[0], ry - previous[1], rz - previous[2]))
+
+        # Images of the same unit cell site are translations of one another.
+        first_image: dict[int, tuple[int, int, int]] = {}
+        for node, position in unwrapped.items():
+            if rank == max_rank:
+                break
+            first = first_image.setdefault(node.uc_index, position)
+            if position != first:
+                add_translation(tuple(p - f for p, f in zip(position, first)))
+
+        self.periodic = rank
+
+def clusters_from_nodes(
+    nodes: set[Node], halo: tuple[int, int, int] = DEFAULT_HALO
+) -> set[Cluster]:
     """Create clusters from a set of nodes using connected components algorithm.
     
     Forms clusters by growing from unit cell nodes (is_halo=False) using graph 
@@ -231,6 +305,8 @@ def clusters_from_nodes(nodes: set[Node]) -> set[Cluster]:
     
     Args:
         nodes: Set of Node objects with neighbour relationships established.
+        halo: Number of unit cell images along each lattice vector in the
+            halo the nodes were built in (see create_halo).
         
     Returns:
         Set of Cluster objects, each containing one connected component.
@@ -254,7 +330,7 @@ def clusters_from_nodes(nodes: set[Node]) -> set[Cluster]:
     while uc_nodes:
         node = uc_nodes.pop()
         if not node.is_halo:  # Double-check (should always be true here)
-            cluster = Cluster({node})
+            cluster = Cluster({node}, halo=halo)
             cluster.grow_cluster()
             # Remove all nodes in this cluster from unprocessed set
             uc_nodes.difference_update(cluster.nodes)
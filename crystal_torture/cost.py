@@ -0,0 +1,171 @@
+"""Run time estimates of the graph pipeline, for scheduling heterogeneous batches.
+
+The pipeline builds a halo of N = n * n_images nodes from the n sites with
+species in elements, each with about k neighbours within rcut, then searches
+outwards from every unit cell node to find its tortuosity. The estimated run
+time in seconds is
+
+    c0 + c1 * N * (k + 1) + c2 * n * N * (k + 1)
+
+where the first term is the fixed overhead, the second the neighbour search,
+halo and clustering, and the third the tortuosity search. The coefficients
+differ between the Fortran and Python engines, and are fitted by
+benchmarks/cost_model.py on the benchmark suite's spinel supercells.
+"""
+
+import math
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from crystal_torture.cluster import DEFAULT_HALO
+
+if TYPE_CHECKING:
+    from pymatgen.core import Structure
+
+# Tortuosity engines: the Fortran kernels, or the pure Python fallback.
+ENGINES = ("fortran", "python")
+
+# Coefficients (c0, c1, c2) per engine, fitted by benchmarks/cost_model.py.
+DEFAULT_COEFFICIENTS = {
+    "fortran": (2.97e-3, 1.48e-6, 1.36e-8),
+    "python": (2.75e-3, 1.54e-6, 2.0e-8),
+}
+
+# Estimated run time in seconds below which a structure is run single-threaded,
+# since starting OpenMP threads costs more than they save.
+MIN_PARALLEL_COST = 0.05
+
+
+def cost_features(
+    no_sites: int,
+    volume: float,
+    rcut: float,
+    element_fraction: float = 1.0,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> npt.NDArray[np.float64]:
+    """Return the terms of the cost model for a structure.
+
+    Args:
+        no_sites: Number of sites in the structure.
+        volume: Cell volume in cubic angstroms.
+        rcut: Cut-off radius for node-node connections.
+        element_fraction: Fraction of the sites with species in elements.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+    Returns:
+        Array [1, N * (k + 1), n * N * (k + 1)] (see module docstring).
+    """
+    n = no_sites * element_fraction
+    halo_nodes = n * math.prod(halo)
+    neighbours = n / volume * 4 / 3 * math.pi * rcut**3
+    edges = halo_nodes * (neighbours + 1)
+    return np.array([1.0, edges, n * edges])
+
+
+def structure_features(
+    structure: 'Structure',
+    rcut: float,
+    elements: set[str],
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> npt.NDArray[np.float64]:
+    """Return the cost model terms of a pymatgen structure (see cost_features).
+
+    Sites are counted by element symbol, as when building the graph (see
+    pymatgen_interface.element_mask).
+    """
+    from crystal_torture.pymatgen_interface import element_mask
+
+    count = int(element_mask(structure, set(elements)).sum())
+    return cost_features(
+        len(structure), structure.volume, rcut, count / max(len(structure), 1), halo
+    )
+
+
+def available_cores() -> int:
+    """Return the number of CPU cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class CostModel:
+    """Linear run time model of the graph pipeline for each engine."""
+
+    def __init__(self, coefficients: dict[str, tuple[float, float, float]] | None = None) -> None:
+        """Initialise the model.
+
+        Args:
+            coefficients: Coefficients (c0, c1, c2) per engine. Defaults to
+                DEFAULT_COEFFICIENTS.
+        """
+        self.coefficients = dict(DEFAULT_COEFFICIENTS if coefficients is None else coefficients)
+
+    def estimate(self, features: npt.ArrayLike, engine: str = "fortran") -> float:
+        """Return the estimated run time in seconds.
+
+        Args:
+            features: Cost model terms from cost_features or structure_features.
+            engine: "fortran" or "python".
+
+        Raises:
+            ValueError: If the model has no coefficients for engine.
+        """
+        if engine not in self.coefficients:
+            raise ValueError(f"No cost model coefficients for engine {engine!r}")
+        return float(np.dot(self.coefficients[engine], features))
+
+    def best_engine(self, features: npt.ArrayLike) -> str:
+        """Return the engine with the lowest estimated run time.
+
+        The Fortran engine is only chosen if its extensions are available.
+        """
+        from crystal_torture import tort
+
+        engines = [engine for engine in ENGINES if engine in self.coefficients]
+        if tort.tort_mod is None:
+            engines = [engine for engine in engines if engine != "fortran"]
+        return min(engines, key=lambda engine: self.estimate(features, engine))
+
+    @classmethod
+    def fit(cls, samples: dict[str, list[tuple[npt.ArrayLike, float]]]) -> 'CostModel':
+        """Fit the coefficients to measured run times.
+
+        Each engine is fitted by least squares on the relative error, so small
+        and large structures are weighted equally; negative coefficients are
+        clipped to zero.
+
+        Args:
+            samples: Per engine, a list of (features, measured seconds) pairs.
+
+        Returns:
+            The fitted CostModel.
+        """
+        coefficients = {}
+        for engine, pairs in samples.items():
+            features = np.array([f for f, _ in pairs], dtype=np.float64)
+            times = np.array([t for _, t in pairs], dtype=np.float64)
+            weights = 1 / times
+            fitted, *_ = np.linalg.lstsq(
+                features * weights[:, None], np.ones(len(times)), rcond=None
+            )
+            coefficients[engine] = tuple(float(c) for c in np.clip(fitted, 0, None))
+        return cls(coefficients)
+
+
+def omp_threads_for(cost: float, cores: int, concurrent_jobs: int) -> int:
+    """Return the number of OpenMP threads to give a structure.
+
+    Cheap structures run single-threaded; otherwise the cores are shared
+    between the structures expected to run at the same time.
+
+    Args:
+        cost: Estimated run time in seconds.
+        cores: Number of cores available to the batch.
+        concurrent_jobs: Number of structures expected to run at the same time.
+    """
+    if cost < MIN_PARALLEL_COST:
+        return 1
+    return max(1, cores // max(1, concurrent_jobs))
@@ -1,3 +1,65 @@
+module dist_omp
+
+! OpenMP settings applied to the dist parallel loop:
+!    omp_threads(int): number of threads (0 = OpenMP default)
+!    omp_schedule_kind(int): 1=static, 2=dynamic, 3=guided, 4=auto
+!    omp_chunk_size(int): chunk size (0 = OpenMP default)
+
+use omp_lib
+use iso_c_binding
+
+IMPLICIT NONE
+
+integer :: omp_threads = 0
+integer :: omp_schedule_kind = 1
+integer :: omp_chunk_size = 0
+
+contains
+
+subroutine dist_set_num_threads(n) bind(c, name='dist_set_num_threads')
+! Set the number of OpenMP threads (0 or less restores the OpenMP default)
+integer(c_int), intent(in), value :: n
+omp_threads = max(n,0)
+end subroutine dist_set_num_threads
+
+function dist_get_num_threads() bind(c, name='dist_get_num_threads') result(n)
+! Number of OpenMP threads the dist routine will use (1 without OpenMP)
+integer(c_int) :: n
+n = 1
+!$ n = omp_get_max_threads()
+!$ if (omp_threads > 0) n = omp_threads
+end function dist_get_num_threads
+
+function dist_get_num_threads_setting() bind(c, name='dist_get_num_threads_setting') result(n)
+! Stored number of threads (0 = OpenMP default)
+integer(c_int) :: n
+n = omp_threads
+end function dist_get_num_threads_setting
+
+subroutine dist_set_schedule(kind,chunk) bind(c, name='dist_set_schedule')
+! Set the OpenMP loop schedule (1=static, 2=dynamic, 3=guided, 4=auto)
+integer(c_int), intent(in), value :: kind, chunk
+omp_schedule_kind = kind
+omp_chunk_size = max(chunk,0)
+end subroutine dist_set_schedule
+
+function dist_get_schedule_kind() bind(c, name='dist_get_schedule_kind') result(kind)
+integer(c_int) :: kind
+kind = omp_schedule_kind
+end function dist_get_schedule_kind
+
+function dist_get_chunk_size() bind(c, name='dist_get_chunk_size') result(chunk)
+integer(c_int) :: chunk
+chunk = omp_chunk_size
+end function dist_get_chunk_size
+
+subroutine apply_omp_schedule()
+! Make the stored schedule the runtime schedule of the calling thread
+!$ call omp_set_schedule(int(omp_schedule_kind,omp_sched_kind),omp_chunk_size)
+end subroutine apply_omp_schedule
+
+end module dist_omp
+
 
 subroutine dist(coord1,coord2,n,dist_matrix)
 
@@ -12,6 +74,7 @@ subroutine dist(coord1,coord2,n,dist_matrix)
 !     dist_matrix([n X n array of reals]): dist matrix for sites 
 
 use omp_lib
+use dist_omp
 
 IMPLICIT NONE
 
@@ -19,9 +82,12 @@ integer, intent(in) :: n
 
 real,dimension(n,3),intent(in) :: coord1,coord2
 real,dimension(n,n),intent(out) :: dist_matrix
-integer:: i,j
+integer:: i,j,n_threads
+
+n_threads = dist_get_num_threads()
+call apply_omp_schedule()
 
-!$OMP PARALLEL DO private(i,j) shared(coord1,coord2,dist_matrix)
+!$OMP PARALLEL DO SCHEDULE(RUNTIME) NUM_THREADS(n_threads) private(i,j) shared(coord1,coord2,dist_matrix)
 do i=1,n
   do j=1,n
      dist_matrix(i,j) = ((coord1(i,1)-coord2(j,1))* (coord1(i,1)-coord2(j,1))+&
@@ -33,6 +99,157 @@ END DO
 
 end subroutine dist
 
+subroutine dist64(coord1,n1,coord2,n2,dist_matrix) bind(c, name='dist64')
+
+! Double precision distance matrix between two sets of site coords.
+! The arrays are C-contiguous (row-major) numpy arrays, so they are used
+! as passed without any copies and the caller supplies the output array.
+! Args:
+!     coord1 ([n1 X 3 array of doubles]): array of site coords (C order)
+!     n1 (int): number of sites in coord1
+!     coord2 ([n2 X 3 array of doubles]): array of site coords (C order)
+!     n2 (int): number of sites in coord2
+! Return:
+!     dist_matrix([n1 X n2 array of doubles]): dist matrix for sites (C order)
+
+use iso_c_binding
+use dist_omp
+
+IMPLICIT NONE
+
+integer(c_int), intent(in), value :: n1,n2
+real(c_double), dimension(3,n1), intent(in) :: coord1
+real(c_double), dimension(3,n2), intent(in) :: coord2
+real(c_double), dimension(n2,n1), intent(out) :: dist_matrix
+integer:: i,j,n_threads
+real(c_double):: dx,dy,dz
+
+n_threads = dist_get_num_threads()
+call apply_omp_schedule()
+
+!$OMP PARALLEL DO SCHEDULE(RUNTIME) NUM_THREADS(n_threads) private(i,j,dx,dy,dz) &
+!$OMP& shared(coord1,coord2,dist_matrix)
+do i=1,n1
+  do j=1,n2
+     dx = coord1(1,i)-coord2(1,j)
+     dy = coord1(2,i)-coord2(2,j)
+     dz = coord1(3,i)-coord2(3,j)
+     dist_matrix(j,i) = sqrt(dx*dx+dy*dy+dz*dz)
+  END DO
+END DO
+!$OMP END PARALLEL DO
+
+end subroutine dist64
+
+subroutine dist_pairs_count(coord1,n1,coord2,n2,r,rmin,counts) bind(c, name='dist_pairs_count')
+
+! First pass of the cut-off filtered pair search: counts, for each site in
+! coord1, the sites in coord2 at a distance d with rmin < d <= r.
+! Args:
+!     coord1 ([n1 X 3 array of doubles]): array of site coords (C order)
+!     n1 (int): number of sites in coord1
+!     coord2 ([n2 X 3 array of doubles]): array of site coords (C order)
+!     n2 (int): number of sites in coord2
+!     r (double): cut-off distance
+!     rmin (double): pairs at this distance or less are excluded
+! Return:
+!     counts([n1 array of int64]): number of pairs for each site in coord1
+
+use iso_c_binding
+use dist_omp
+
+IMPLICIT NONE
+
+integer(c_int), intent(in), value :: n1,n2
+real(c_double), dimension(3,n1), intent(in) :: coord1
+real(c_double), dimension(3,n2), intent(in) :: coord2
+real(c_double), intent(in), value :: r,rmin
+integer(c_int64_t), dimension(n1), intent(out) :: counts
+integer:: i,j,n_threads
+integer(c_int64_t):: n_pairs
+real(c_double):: dx,dy,dz,d
+
+n_threads = dist_get_num_threads()
+call apply_omp_schedule()
+
+!$OMP PARALLEL DO SCHEDULE(RUNTIME) NUM_THREADS(n_threads) private(i,j,dx,dy,dz,d,n_pairs) &
+!$OMP& shared(coord1,coord2,counts)
+do i=1,n1
+  n_pairs = 0
+  do j=1,n2
+     dx = coord1(1,i)-coord2(1,j)
+     dy = coord1(2,i)-coord2(2,j)
+     dz = coord1(3,i)-coord2(3,j)
+     d = sqrt(dx*dx+dy*dy+dz*dz)
+     if (d <= r .and. d > rmin) n_pairs = n_pairs + 1
+  END DO
+  counts(i) = n_pairs
+END DO
+!$OMP END PARALLEL DO
+
+end subroutine dist_pairs_count
+
+subroutine dist_pairs_fill(coord1,n1,coord2,n2,r,rmin,offsets,n_pairs,pair_i,pair_j,pair_d) &
+     bind(c, name='dist_pairs_fill')
+
+! Second pass of the cut-off filtered pair search: writes the pairs counted
+! by dist_pairs_count, with the pairs of site i of coord1 starting at offsets(i)
+! and ordered by site in coord2.
+! Args:
+!     coord1 ([n1 X 3 array of doubles]): array of site coords (C order)
+!     n1 (int): number of sites in coord1
+!     coord2 ([n2 X 3 array of doubles]): array of site coords (C order)
+!     n2 (int): number of sites in coord2
+!     r (double): cut-off distance
+!     rmin (double): pairs at this distance or less are excluded
+!     offsets([n1 array of int64]): zero-based position of the first pair of each site
+!     n_pairs (int64): total number of pairs
+! Return:
+!     pair_i([n_pairs array of int64]): zero-based index of the site in coord1
+!     pair_j([n_pairs array of int64]): zero-based index of the site in coord2
+!     pair_d([n_pairs array of doubles]): distance between the sites
+
+use iso_c_binding
+use dist_omp
+
+IMPLICIT NONE
+
+integer(c_int), intent(in), value :: n1,n2
+real(c_double), dimension(3,n1), intent(in) :: coord1
+real(c_double), dimension(3,n2), intent(in) :: coord2
+real(c_double), intent(in), value :: r,rmin
+integer(c_int64_t), dimension(n1), intent(in) :: offsets
+integer(c_int64_t), intent(in), value :: n_pairs
+integer(c_int64_t), dimension(n_pairs), intent(out) :: pair_i,pair_j
+real(c_double), dimension(n_pairs), intent(out) :: pair_d
+integer:: i,j,n_threads
+integer(c_int64_t):: k
+real(c_double):: dx,dy,dz,d
+
+n_threads = dist_get_num_threads()
+call apply_omp_schedule()
+
+!$OMP PARALLEL DO SCHEDULE(RUNTIME) NUM_THREADS(n_threads) private(i,j,k,dx,dy,dz,d) &
+!$OMP& shared(coord1,coord2,offsets,pair_i,pair_j,pair_d)
+do i=1,n1
+  k = offsets(i)
+  do j=1,n2
+     dx = coord1(1,i)-coord2(1,j)
+     dy = coord1(2,i)-coord2(2,j)
+     dz = coord1(3,i)-coord2(3,j)
+     d = sqrt(dx*dx+dy*dy+dz*dz)
+     if (d <= r .and. d > rmin) then
+        k = k + 1
+        pair_i(k) = i - 1
+        pair_j(k) = j - 1
+        pair_d(k) = d
+     END IF
+  END DO
+END DO
+!$OMP END PARALLEL DO
+
+end subroutine dist_pairs_fill
+
 subroutine shift_index(index_n,shift,new_index)
 
 ! Shifts the index of a site in the unit cell to the corresponding
@@ -61,3 +278,52 @@ new_z = MODULO((MODULO(index_n,3)+shift(3)),3)
 new_index = int(27*int(index_n/(27))+(MODULO(new_x,3)*9+MODULO(new_y,3)*3+MODULO(new_z,3)))
 end subroutine shift_index
 
+module halo_index
+
+! Array-valued mapping of unit cell indices to their images in an
+! n_x X n_y X n_z halo supercell (see shift_index for the 3x3x3 case)
+
+use iso_c_binding
+
+IMPLICIT NONE
+
+contains
+
+elemental function shifted_index(index_n,shift_x,shift_y,shift_z,n_x,n_y,n_z) result(new_index)
+! Elemental version of shift_index for a general halo
+! Args:
+!    index_n (int64): original index
+!    shift_x, shift_y, shift_z (int64): shift to image for which to obtain index
+!    n_x, n_y, n_z (int64): number of images along each axis of the halo
+! Returns:
+!    new_index (int64): index for image site in supercell
+integer(c_int64_t), intent(in) :: index_n,shift_x,shift_y,shift_z,n_x,n_y,n_z
+integer(c_int64_t) :: new_index
+integer(c_int64_t) :: new_x,new_y,new_z
+
+new_x = MODULO(MODULO(index_n/(n_y*n_z),n_x)+shift_x,n_x)
+new_y = MODULO(MODULO(index_n/n_z,n_y)+shift_y,n_y)
+new_z = MODULO(MODULO(index_n,n_z)+shift_z,n_z)
+
+new_index = n_x*n_y*n_z*(index_n/(n_x*n_y*n_z))+new_x*n_y*n_z+new_y*n_z+new_z
+end function shifted_index
+
+subroutine shift_index_array(n,index_n,shift,halo,new_index) bind(c, name='shift_index_array')
+! Shift an array of indices in one call
+! Args:
+!    n (int64): number of indices
+!    index_n ([n array of int64]): original indices
+!    shift ([n X 3 array of int64]): shift for each index (C order)
+!    halo ([int64,int64,int64]): number of images along each axis of the halo
+! Returns:
+!    new_index ([n array of int64]): indices for image sites in supercell
+integer(c_int64_t), intent(in), value :: n
+integer(c_int64_t), dimension(n), intent(in) :: index_n
+integer(c_int64_t), dimension(3,n), intent(in) :: shift
+integer(c_int64_t), dimension(3), intent(in) :: halo
+integer(c_int64_t), dimension(n), intent(out) :: new_index
+
+new_index = shifted_index(index_n,shift(1,:),shift(2,:),shift(3,:),halo(1),halo(2),halo(3))
+end subroutine shift_index_array
+
+end module halo_index
@@ -1,68 +1,142 @@
 """Distance calculation module - ctypes wrapper for Fortran distance functions."""
 import ctypes
+import threading
 import numpy as np
 from pathlib import Path
 import numpy.typing as npt
+from crystal_torture.exceptions import FortranNotAvailableError
+from crystal_torture.tort import _check_num_threads, _check_schedule, _find_library, _schedule_name
 
 _dist_lib: ctypes.CDLL | None
 _DIST_AVAILABLE: bool
 
-# Try to load the compiled Fortran library using ctypes
-try:
-    # Find the library file
-    package_dir = Path(__file__).parent
-    
-    # Look for the extension (platform-specific naming)
-    import platform
-    if platform.system() == "Darwin":  # macOS
-        lib_patterns = ["libdist*.dylib", "libdist*.so"]
-    elif platform.system() == "Windows":
-        lib_patterns = ["libdist*.dll", "libdist*.pyd"]
-    else:  # Linux and others
-        lib_patterns = ["libdist*.so"]
-    
-    lib_file = None
-    for pattern in lib_patterns:
-        lib_files = list(package_dir.glob(pattern))
-        if lib_files:
-            # Sort to get the most specific match first
-            lib_files.sort(key=lambda x: len(x.name), reverse=True)
-            lib_file = lib_files[0]
-            break
-    
-    if lib_file and lib_file.exists():
-        # Load the library
-        _dist_lib = ctypes.CDLL(str(lib_file))
-        
-        # Define function signatures for dist functions
-        # The Fortran functions are already C-compatible, so we can call them directly
-        
-        # subroutine dist(coord1, coord2, n, dist_matrix)
-        # Note: Fortran passes arrays by reference, and we need to handle this carefully
-        _dist_lib.dist_.argtypes = [
-            ctypes.POINTER(ctypes.c_float),  # coord1
-            ctypes.POINTER(ctypes.c_float),  # coord2  
-            ctypes.POINTER(ctypes.c_int),    # n
-            ctypes.POINTER(ctypes.c_float)   # dist_matrix (output)
-        ]
-        _dist_lib.dist_.restype = None
-        
-        # subroutine shift_index(index_n, shift, new_index)
-        _dist_lib.shift_index_.argtypes = [
-            ctypes.POINTER(ctypes.c_int),    # index_n
-            ctypes.POINTER(ctypes.c_int),    # shift (array of 3 ints)
-            ctypes.POINTER(ctypes.c_int)     # new_index (output)
-        ]
-        _dist_lib.shift_index_.restype = None
-        
-        _DIST_AVAILABLE = True
-    else:
-        _dist_lib = None
-        _DIST_AVAILABLE = False
-        
-except Exception:
-    _dist_lib = None
-    _DIST_AVAILABLE = False
+# The library is located and loaded on first use rather than at import, so
+# importing this module stays cheap. _dist_lib and _DIST_AVAILABLE are
+# provided through the module __getattr__ until then.
+_LAZY_ATTRIBUTES = ("_dist_lib", "_DIST_AVAILABLE")
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def _load_library() -> None:
+    """Load the compiled Fortran dist library using ctypes, once.
+
+    Sets _dist_lib and _DIST_AVAILABLE, falling back gracefully to None/False
+    when the extension is not available.
+    """
+    global _dist_lib, _DIST_AVAILABLE, _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        try:
+            lib_file = _find_library(Path(__file__).parent, "libdist")
+
+            if lib_file and lib_file.exists():
+                # Load the library
+                lib = ctypes.CDLL(str(lib_file))
+
+                # Define function signatures for dist functions
+                # The Fortran functions are already C-compatible, so we can call them directly
+
+                # subroutine dist(coord1, coord2, n, dist_matrix)
+                # Note: Fortran passes arrays by reference, and we need to handle this carefully
+                lib.dist_.argtypes = [
+                    ctypes.POINTER(ctypes.c_float),  # coord1
+                    ctypes.POINTER(ctypes.c_float),  # coord2
+                    ctypes.POINTER(ctypes.c_int),    # n
+                    ctypes.POINTER(ctypes.c_float)   # dist_matrix (output)
+                ]
+                lib.dist_.restype = None
+
+                # subroutine shift_index(index_n, shift, new_index)
+                lib.shift_index_.argtypes = [
+                    ctypes.POINTER(ctypes.c_int),    # index_n
+                    ctypes.POINTER(ctypes.c_int),    # shift (array of 3 ints)
+                    ctypes.POINTER(ctypes.c_int)     # new_index (output)
+                ]
+                lib.shift_index_.restype = None
+
+                # void dist64(double* coord1, int n1, double* coord2, int n2, double* dist_matrix)
+                lib.dist64.argtypes = [
+                    ctypes.POINTER(ctypes.c_double),  # coord1 (n1 x 3, C order)
+                    ctypes.c_int,                     # n1
+                    ctypes.POINTER(ctypes.c_double),  # coord2 (n2 x 3, C order)
+                    ctypes.c_int,                     # n2
+                    ctypes.POINTER(ctypes.c_double),  # dist_matrix (n1 x n2, C order, output)
+                ]
+                lib.dist64.restype = None
+
+                # void dist_pairs_count(double* coord1, int n1, double* coord2, int n2,
+                #                       double r, double rmin, int64* counts)
+                lib.dist_pairs_count.argtypes = [
+                    ctypes.POINTER(ctypes.c_double), ctypes.c_int,
+                    ctypes.POINTER(ctypes.c_double), ctypes.c_int,
+                    ctypes.c_double, ctypes.c_double,
+                    ctypes.POINTER(ctypes.c_int64),   # counts (output)
+                ]
+                lib.dist_pairs_count.restype = None
+
+                # void dist_pairs_fill(double* coord1, int n1, double* coord2, int n2,
+                #                      double r, double rmin, int64* offsets, int64 n_pairs,
+                #                      int64* pair_i, int64* pair_j, double* pair_d)
+                lib.dist_pairs_fill.argtypes = [
+                    ctypes.POINTER(ctypes.c_double), ctypes.c_int,
+                    ctypes.POINTER(ctypes.c_double), ctypes.c_int,
+                    ctypes.c_double, ctypes.c_double,
+                    ctypes.POINTER(ctypes.c_int64), ctypes.c_int64,
+                    ctypes.POINTER(ctypes.c_int64),   # pair_i (output)
+                    ctypes.POINTER(ctypes.c_int64),   # pair_j (output)
+                    ctypes.POINTER(ctypes.c_double),  # pair_d (output)
+                ]
+                lib.dist_pairs_fill.restype = None
+
+                # void shift_index_array(int64 n, int64* index_n, int64* shift, int64* halo,
+                #                        int64* new_index)
+                lib.shift_index_array.argtypes = [
+                    ctypes.c_int64,
+                    ctypes.POINTER(ctypes.c_int64),  # index_n (n)
+                    ctypes.POINTER(ctypes.c_int64),  # shift (n x 3, C order)
+                    ctypes.POINTER(ctypes.c_int64),  # halo (3)
+                    ctypes.POINTER(ctypes.c_int64),  # new_index (n, output)
+                ]
+                lib.shift_index_array.restype = None
+
+                # OpenMP settings of the dist kernel (see tort.set_num_threads)
+                lib.dist_set_num_threads.argtypes = [ctypes.c_int]
+                lib.dist_set_num_threads.restype = None
+                lib.dist_get_num_threads.argtypes = []
+                lib.dist_get_num_threads.restype = ctypes.c_int
+                lib.dist_get_num_threads_setting.argtypes = []
+                lib.dist_get_num_threads_setting.restype = ctypes.c_int
+                lib.dist_set_schedule.argtypes = [ctypes.c_int, ctypes.c_int]
+                lib.dist_set_schedule.restype = None
+                lib.dist_get_schedule_kind.argtypes = []
+                lib.dist_get_schedule_kind.restype = ctypes.c_int
+                lib.dist_get_chunk_size.argtypes = []
+                lib.dist_get_chunk_size.restype = ctypes.c_int
+
+                _dist_lib = lib
+                _DIST_AVAILABLE = True
+            else:
+                _dist_lib = None
+                _DIST_AVAILABLE = False
+
+        except Exception:
+            _dist_lib = None
+            _DIST_AVAILABLE = False
+
+        _loaded = True
+
+
+def __getattr__(name: str):
+    """Load the Fortran library on first access to its module attributes."""
+    if name in _LAZY_ATTRIBUTES:
+        _load_library()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def dist(coord1: npt.ArrayLike, coord2: npt.ArrayLike, n: int) -> npt.NDArray[np.floating]:
@@ -78,9 +152,10 @@ def dist(coord1: npt.ArrayLike, coord2: npt.ArrayLike, n: int) -> npt.NDArray[np
     Returns:
         Distance matrix (n x n).
     """
+    _load_library()
     if not _DIST_AVAILABLE:
         # Fallback to Python implementation
-        from .pymatgen_interface import _python_dist
+        from .array_interface import _python_dist
         # Convert to numpy arrays for type safety
         coord1_array = np.asarray(coord1, dtype=np.float64)
         coord2_array = np.asarray(coord2, dtype=np.float64)
@@ -108,6 +183,138 @@ def dist(coord1: npt.ArrayLike, coord2: npt.ArrayLike, n: int) -> npt.NDArray[np
     return dist_matrix.astype(np.float64)
 
 
+def _as_coords(coords: npt.ArrayLike, name: str) -> npt.NDArray[np.float64]:
+    """Return coords as a C-contiguous float64 (n x 3) array, copying only if needed."""
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 3:
+        raise ValueError(f"{name} must have shape (n, 3), got {coords.shape}")
+    return coords
+
+
+def dist64(
+    coord1: npt.ArrayLike,
+    coord2: npt.ArrayLike,
+    out: npt.NDArray[np.float64] | None = None,
+    r: float | None = None,
+) -> npt.NDArray[np.float64] | tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+    """Compute the double precision distance matrix between two sets of coordinates.
+
+    Unlike dist, C-contiguous float64 inputs are passed to Fortran without
+    copies, the result is written into out, and no precision is lost to float32,
+    so distances compare exactly against a cut-off. Uses the Fortran
+    implementation if available, otherwise NumPy.
+
+    Args:
+        coord1: Array of coordinates (n1 x 3).
+        coord2: Array of coordinates (n2 x 3).
+        out: Optional C-contiguous float64 (n1 x n2) array to write the distances
+            into, e.g. reused across lattice images.
+        r: If given, return only the pairs with distance <= r (see dist_pairs,
+            which does not need the dense matrix).
+
+    Returns:
+        The distance matrix (n1 x n2), which is out if supplied. If r is given,
+        the (i, j, d) arrays of the row index, column index and distance of
+        each pair within r instead.
+
+    Raises:
+        ValueError: If the coordinates are not (n x 3) or out has the wrong
+            shape, dtype or layout.
+    """
+    coord1 = _as_coords(coord1, "coord1")
+    coord2 = _as_coords(coord2, "coord2")
+    n1, n2 = len(coord1), len(coord2)
+    if out is None and r is not None:
+        return dist_pairs(coord1, coord2, r)
+    if out is None:
+        out = np.empty((n1, n2), dtype=np.float64)
+    elif (out.shape != (n1, n2) or out.dtype != np.float64
+          or not out.flags.c_contiguous or not out.flags.writeable):
+        raise ValueError(
+            f"out must be a writeable C-contiguous float64 array of shape {(n1, n2)}"
+        )
+
+    _load_library()
+    if _DIST_AVAILABLE and n1 > 0 and n2 > 0:
+        _dist_lib.dist64(
+            coord1.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), n1,
+            coord2.ctypes.data_as(ctypes.POINTER(ctypes.c_double)), n2,
+            out.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+        )
+    else:
+        diff = coord1[:, np.newaxis, :] - coord2[np.newaxis, :, :]
+        np.sqrt(np.einsum("ijk,ijk->ij", diff, diff), out=out)
+
+    if r is None:
+        return out
+    i, j = np.nonzero(out <= r)
+    return i, j, out[i, j]
+
+
+def dist_pairs(
+    coord1: npt.ArrayLike,
+    coord2: npt.ArrayLike,
+    r: float,
+    rmin: float | None = None,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+    """Find the pairs of sites within a cut-off distance, without a dense distance matrix.
+
+    The Fortran implementation counts the pairs of each site of coord1 in a
+    first OpenMP pass, then fills the pair arrays in a second, so memory scales
+    with the number of pairs rather than n1 x n2. Uses NumPy if Fortran is not
+    available.
+
+    Args:
+        coord1: Array of coordinates (n1 x 3).
+        coord2: Array of coordinates (n2 x 3).
+        r: Cut-off distance; pairs with d <= r are returned.
+        rmin: If given, pairs with d <= rmin are excluded (e.g. a small value to
+            drop a site's distance to itself).
+
+    Returns:
+        The (i, j, d) arrays of the coord1 index, coord2 index and distance of
+        each pair, ordered by i and then j.
+
+    Raises:
+        ValueError: If the coordinates are not (n x 3).
+    """
+    coord1 = _as_coords(coord1, "coord1")
+    coord2 = _as_coords(coord2, "coord2")
+    n1, n2 = len(coord1), len(coord2)
+    # Distances are non-negative, so -1 keeps every pair.
+    rmin = -1.0 if rmin is None else float(rmin)
+
+    _load_library()
+    if not _DIST_AVAILABLE or n1 == 0 or n2 == 0:
+        dists = dist64(coord1, coord2)
+        i, j = np.nonzero((dists <= r) & (dists > rmin))
+        return i.astype(np.int64), j.astype(np.int64), dists[i, j]
+
+    coord1_ptr = coord1.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+    coord2_ptr = coord2.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+    counts = np.empty(n1, dtype=np.int64)
+    _dist_lib.dist_pairs_count(
+        coord1_ptr, n1, coord2_ptr, n2, float(r), rmin,
+        counts.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+    )
+    offsets = np.zeros(n1, dtype=np.int64)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    n_pairs = int(counts.sum())
+
+    pair_i = np.empty(n_pairs, dtype=np.int64)
+    pair_j = np.empty(n_pairs, dtype=np.int64)
+    pair_d = np.empty(n_pairs, dtype=np.float64)
+    if n_pairs:
+        _dist_lib.dist_pairs_fill(
+            coord1_ptr, n1, coord2_ptr, n2, float(r), rmin,
+            offsets.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)), n_pairs,
+            pair_i.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            pair_j.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            pair_d.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+        )
+    return pair_i, pair_j, pair_d
+
+
 def shift_index(index_n: int, shift: list[int]) -> int:
     """Shift the index of a site in the unit cell to the corresponding index in the 3x3x3 halo supercell.
     
@@ -126,9 +333,10 @@ def shift_index(index_n: int, shift: list[int]) -> int:
     if index_n < 0:
         raise ValueError(f"shift_index received negative index: {index_n}. This indicates an upstream bug.")
     
+    _load_library()
     if not _DIST_AVAILABLE:
         # Fallback to Python implementation
-        from .pymatgen_interface import _python_shift_index
+        from .array_interface import _python_shift_index
         return _python_shift_index(index_n, shift)
     
     if _dist_lib is None:
@@ -147,4 +355,133 @@ def shift_index(index_n: int, shift: list[int]) -> int:
         ctypes.byref(new_index_c)
     )
     
-    return new_index_c.value
\ No newline at end of file
+    return new_index_c.value
+
+def shift_indices(
+    index_n: npt.ArrayLike,
+    shift: npt.ArrayLike,
+    halo: tuple[int, int, int] = (3, 3, 3),
+) -> npt.NDArray[np.int64]:
+    """Array-valued shift_index: map many indices to their images in the halo supercell.
+
+    Indices are numbered as in create_halo: image (x, y, z) of unit cell site i
+    has index n_images * i + (x * n_y + y) * n_z + z, and shifts wrap around
+    the halo. Uses the Fortran elemental routine if available, otherwise NumPy.
+
+    Args:
+        index_n: Array of original indices (must be non-negative).
+        shift: Shift vectors, one (n x 3) row per index or a single [x, y, z]
+            applied to every index.
+        halo: Number of images (n_x, n_y, n_z) along each axis of the halo.
+
+    Returns:
+        Array of new shifted indices for the image sites in the supercell.
+
+    Raises:
+        ValueError: If any index is negative, the shifts do not match the
+            indices or the halo is not three positive integers.
+    """
+    index_n = np.ascontiguousarray(index_n, dtype=np.int64)
+    if index_n.ndim != 1:
+        raise ValueError(f"index_n must be one-dimensional, got shape {index_n.shape}")
+    if np.any(index_n < 0):
+        raise ValueError(
+            f"shift_indices received negative index: {index_n.min()}. This indicates an upstream bug."
+        )
+    shift = np.asarray(shift, dtype=np.int64)
+    try:
+        shift = np.ascontiguousarray(np.broadcast_to(shift, (len(index_n), 3)))
+    except ValueError:
+        raise ValueError(
+            f"shift must have shape (3,) or ({len(index_n)}, 3), got {shift.shape}"
+        ) from None
+
+    halo_array = np.array(halo, dtype=np.int64)
+    if halo_array.shape != (3,) or np.any(halo_array < 1):
+        raise ValueError(f"halo must be three positive integers, got {halo}")
+
+    _load_library()
+    if not _DIST_AVAILABLE:
+        from .array_interface import _python_shift_indices
+        return _python_shift_indices(index_n, shift, halo)
+
+    new_index = np.empty(len(index_n), dtype=np.int64)
+    if len(index_n):
+        _dist_lib.shift_index_array(
+            len(index_n),
+            index_n.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            shift.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            halo_array.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+            new_index.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)),
+        )
+    return new_index
+
+
+def set_num_threads(n: int | None) -> None:
+    """Set the number of OpenMP threads used by the Fortran dist kernel.
+
+    Args:
+        n: Number of threads, or None to restore the OpenMP default.
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+        ValueError: If n is less than 1.
+    """
+    n = _check_num_threads(n)
+    _load_library()
+    if _dist_lib is None:
+        raise FortranNotAvailableError()
+    _dist_lib.dist_set_num_threads(n)
+
+
+def get_num_threads() -> int:
+    """Return the number of OpenMP threads the Fortran dist kernel will use.
+
+    Returns:
+        Number of threads (1 if Fortran or OpenMP is not available).
+    """
+    _load_library()
+    if _dist_lib is None:
+        return 1
+    return _dist_lib.dist_get_num_threads()
+
+
+def _num_threads_setting() -> int | None:
+    """Return the thread count set with set_num_threads (None for the OpenMP default)."""
+    _load_library()
+    if _dist_lib is None:
+        raise FortranNotAvailableError()
+    return _dist_lib.dist_get_num_threads_setting() or None
+
+
+def set_schedule(kind: str, chunk_size: int = 0) -> None:
+    """Set the OpenMP loop schedule used by the Fortran dist kernel.
+
+    Args:
+        kind: One of "static", "dynamic", "guided" or "auto".
+        chunk_size: Loop iterations handed out at a time (0 for the OpenMP default).
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+        ValueError: If kind is unknown or chunk_size is negative.
+    """
+    code = _check_schedule(kind, chunk_size)
+    _load_library()
+    if _dist_lib is None:
+        raise FortranNotAvailableError()
+    _dist_lib.dist_set_schedule(code, int(chunk_size))
+
+
+def get_schedule() -> tuple[str, int]:
+    """Return the OpenMP loop schedule used by the Fortran dist kernel.
+
+    Returns:
+        The schedule name and chunk size (0 for the OpenMP default).
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+    """
+    _load_library()
+    if _dist_lib is None:
+        raise FortranNotAvailableError()
+    return _schedule_name(_dist_lib.dist_get_schedule_kind()), _dist_lib.dist_get_chunk_size()
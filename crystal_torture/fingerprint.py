@@ -0,0 +1,232 @@
+"""Structure fingerprints for reusing the results of duplicate structures.
+
+The graph of a structure only depends on its lattice and the sites with
+species in elements, so structures that share those sites (in any order,
+and under any lattice translation) give the same clusters and tortuosity.
+Enumerated dopant configurations often contain many such duplicates. A
+fingerprint is a hash of a canonical form of the lattice and species-filtered
+sites, cheap enough to compute for every structure in a batch; candidate
+duplicates can optionally be confirmed with pymatgen's StructureMatcher.
+"""
+
+import hashlib
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from crystal_torture.cluster import DEFAULT_HALO
+from crystal_torture.graph import Graph
+
+if TYPE_CHECKING:
+    from pymatgen.analysis.structure_matcher import StructureMatcher
+    from pymatgen.core import Structure
+
+# Default resolution of the fractional coordinate grid sites are snapped to.
+DEFAULT_TOLERANCE = 1e-3
+
+# Number of sites with species in elements above which batches do not
+# fingerprint a structure: fingerprinting takes time quadratic in the sites
+# (about 0.25 s at this size), which would hold up the queue.
+MAX_DEDUP_SITES = 1000
+
+
+def array_fingerprint(
+    matrix: npt.ArrayLike,
+    frac_coords: npt.ArrayLike,
+    species: npt.ArrayLike,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> str:
+    """Return a fingerprint of a set of sites that is unchanged by site order and translations.
+
+    Fractional coordinates are snapped to a grid with spacing tolerance and
+    every translation taking a site of the least common species to the origin
+    is tried; the lexicographically smallest sorted site list is hashed with
+    the lattice matrix (rounded to 1e-3). Equal fingerprints mean the same
+    sites up to the grid resolution; sites lying near a grid boundary can give
+    different fingerprints for equivalent structures.
+
+    Args:
+        matrix: 3x3 lattice matrix (rows are lattice vectors).
+        frac_coords: Fractional coordinates (n x 3) of the sites.
+        species: Species of each site, as strings or integer codes.
+        tolerance: Resolution of the fractional coordinate grid.
+
+    Returns:
+        Hexadecimal SHA-256 digest.
+
+    Raises:
+        ValueError: If tolerance is not between 0 and 1.
+    """
+    if not 0 < tolerance < 1:
+        raise ValueError(f"Fingerprint tolerance must be between 0 and 1, got {tolerance}")
+    bins = int(round(1 / tolerance))
+    frac_coords = np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3)
+    names, codes, counts = np.unique(
+        np.asarray(species).astype(str), return_inverse=True, return_counts=True
+    )
+    grid = np.round(np.mod(frac_coords, 1) * bins).astype(np.int64) % bins
+
+    canonical = b""
+    if len(grid):
+        origins = grid[codes == np.argmin(counts)]
+        # Keep only the smallest form so far, so memory stays linear in the sites.
+        for i, origin in enumerate(origins):
+            shifted = (grid - origin) % bins
+            rows = np.column_stack((codes, shifted))
+            order = np.lexsort(rows.T[::-1])
+            form = rows[order].tobytes()
+            if i == 0 or form < canonical:
+                canonical = form
+
+    digest = hashlib.sha256()
+    digest.update(np.round(np.asarray(matrix, dtype=np.float64), 3).tobytes())
+    digest.update("\0".join(names.tolist()).encode())
+    digest.update(np.int64(bins).tobytes())
+    digest.update(canonical)
+    return digest.hexdigest()
+
+
+def structure_fingerprint(
+    structure: 'Structure', elements: set[str], tolerance: float = DEFAULT_TOLERANCE
+) -> str:
+    """Return the fingerprint of the sites of a structure with species in elements.
+
+    Sites are selected by element symbol, as when building the graph, so
+    oxidation-state decorated species (e.g. "Li+") are included.
+
+    Args:
+        structure: Pymatgen Structure.
+        elements: Set of element strings the graph will be built from.
+        tolerance: Resolution of the fractional coordinate grid.
+
+    Returns:
+        Hexadecimal SHA-256 digest (see array_fingerprint).
+    """
+    from crystal_torture.pymatgen_interface import element_mask
+
+    species = np.array([site.species_string for site in structure], dtype=str)
+    keep = element_mask(structure, set(elements))
+    return array_fingerprint(
+        structure.lattice.matrix, structure.frac_coords[keep], species[keep], tolerance
+    )
+
+
+def default_matcher() -> 'StructureMatcher':
+    """Return a StructureMatcher that only matches structures with the same cell.
+
+    Volume scaling and supercell searches are disabled, since they can match
+    structures whose graphs differ at a given cut-off.
+    """
+    from pymatgen.analysis.structure_matcher import StructureMatcher
+
+    return StructureMatcher(primitive_cell=False, scale=False, attempt_supercell=False)
+
+
+def filter_species(structure: 'Structure', elements: set[str]) -> 'Structure':
+    """Return the sites of structure with species in elements, as a new Structure.
+
+    Sites are selected by element symbol, as when building the graph (see
+    pymatgen_interface.element_mask).
+    """
+    from pymatgen.core import Structure
+
+    from crystal_torture.pymatgen_interface import element_mask
+
+    keep = element_mask(structure, set(elements))
+    return Structure.from_sites([site for site, kept in zip(structure, keep) if kept])
+
+
+class GraphCache:
+    """Analysed graphs of structures, reused for structures with the same fingerprint.
+
+    Cached graphs are returned as they are, so their site indices refer to the
+    first structure analysed with that fingerprint.
+
+    Example:
+        >>> cache = GraphCache(4.0, {"Li"})
+        >>> graphs = [cache.graph(structure) for structure in configurations]
+        >>> cache.hits, cache.misses
+    """
+
+    def __init__(self,
+        rcut: float,
+        elements: set[str],
+        torture: bool = True,
+        halo: tuple[int, int, int] = DEFAULT_HALO,
+        tolerance: float = DEFAULT_TOLERANCE,
+        matcher: 'StructureMatcher | None' = None) -> None:
+        """Initialise an empty cache.
+
+        Args:
+            rcut: Cut-off radius for node-node connections in forming clusters.
+            elements: Set of element strings to include in setting up each graph.
+            torture: Whether to calculate tortuosity for periodic clusters (Fortran
+                if available, otherwise pure Python).
+            halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+            tolerance: Resolution of the fingerprint coordinate grid.
+            matcher: Optional pymatgen StructureMatcher (see default_matcher) used
+                to confirm that structures with equal fingerprints match.
+        """
+        self.rcut = rcut
+        self.elements = set(elements)
+        self.torture = torture
+        self.halo = halo
+        self.tolerance = tolerance
+        self.matcher = matcher
+        self.hits = 0
+        self.misses = 0
+        # Fingerprint -> list of (species-filtered structure, graph) entries.
+        self._graphs: dict[str, list[tuple['Structure | None', Graph]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._graphs.values())
+
+    def lookup(self, structure: 'Structure') -> Graph | None:
+        """Return the cached graph of a duplicate of structure, if there is one."""
+        return self._lookup(self.fingerprint(structure), structure)
+
+    def _lookup(self, key: str, structure: 'Structure') -> Graph | None:
+        entries = self._graphs.get(key, [])
+        if self.matcher is None:
+            return entries[0][1] if entries else None
+        filtered = filter_species(structure, self.elements) if entries else None
+        for cached, graph in entries:
+            if self.matcher.fit(filtered, cached):
+                return graph
+        return None
+
+    def fingerprint(self, structure: 'Structure') -> str:
+        """Return the fingerprint of structure used as its cache key."""
+        return structure_fingerprint(structure, self.elements, self.tolerance)
+
+    def graph(self, structure: 'Structure') -> Graph:
+        """Return the analysed graph of structure, reusing the graph of a duplicate.
+
+        Args:
+            structure: Pymatgen Structure.
+
+        Returns:
+            Graph with minimal clusters set (and tortured if torture is True).
+        """
+        from crystal_torture import tort
+        from crystal_torture.pymatgen_interface import graph_from_structure
+
+        key = self.fingerprint(structure)
+        cached = self._lookup(key, structure)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        graph = graph_from_structure(structure, self.rcut, self.elements, halo=self.halo)
+        if self.torture:
+            if tort.tort_mod is not None:
+                graph.torture()
+            else:
+                graph.torture_py()
+        else:
+            graph.set_minimal_clusters()
+        filtered = filter_species(structure, self.elements) if self.matcher is not None else None
+        self._graphs.setdefault(key, []).append((filtered, graph))
+        return graph
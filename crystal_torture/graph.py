@@ -1,11 +1,14 @@
 """Graph class for representing groups of disconnected clusters making up full graph."""
 
-from pymatgen.core import Structure
+from crystal_torture.exceptions import FortranNotAvailableError
 from crystal_torture.minimal_cluster import minimal_Cluster
+from crystal_torture.profiling import PipelineProfile, active_profile, stage
+import os
 from types import ModuleType
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from pymatgen.core import Structure
     from crystal_torture.cluster import Cluster
 
 # Module variable with proper type hint
@@ -20,21 +23,26 @@ except ImportError:
 class Graph:
     """Graph class: group of disconnected clusters making up full graph."""
 
-    def __init__(self, clusters: set['Cluster'], structure: Structure | None = None) -> None:
+    def __init__(self, clusters: set['Cluster'], structure: 'Structure | None' = None) -> None:
         """Initialise a graph. 
         
-        The graph is a 3x3x3 representation of the unit cell so there will be clusters 
+        The graph is a halo (3x3x3 by default) representation of the unit cell so there will be clusters 
         within it which are not necessarily unique. However only the unit cell nodes 
         within each cluster are tortured, so there is no repetition.
 
         Args:
             clusters: Set of clusters in the graph.
             structure: The pymatgen Structure object the graph has been formed from.
+
+        Attributes:
+            profile: Per-stage timing and memory report, set when the graph is
+                built inside a profiling.profile_stages() block.
         """
         self.clusters = clusters
         self.tortuosity: dict[int, float] | None = None
         self.min_clusters: list[minimal_Cluster] | None = None
         self.structure = structure
+        self.profile: PipelineProfile | None = None
 
     def set_site_tortuosity(self) -> None:
         """Set a dict containing the site by site tortuosity for sites in the graph unit cell."""
@@ -85,14 +93,56 @@ class Graph:
         """Torture the graph and set node tortuosity for UC nodes in cluster.
         
         This only tortures UC nodes in each cluster, but the graph contains
-        a halo of clusters.
+        a halo of clusters. The UC nodes of all periodic clusters are tortured
+        in a single Fortran call, sharing them between the OpenMP threads
+        with dynamic scheduling.
+
+        The Fortran module holds one graph at a time, so the graph's nodes are
+        uploaded again if another graph has been set up since this one. The
+        upload and torture hold tort.state_lock, so graphs can be tortured
+        from several threads at once; the GIL is released during the Fortran call.
+
+        Raises:
+            FortranNotAvailableError: If Fortran extensions are not available.
         """
-        for cluster in self.clusters:
-            if cluster.periodic is not None and cluster.periodic > 0:
-                cluster.torture_fort()
+        profile = self.profile or active_profile()
+        with stage("torture", profile):
+            periodic_clusters = [
+                cluster for cluster in self.clusters
+                if cluster.periodic is not None and cluster.periodic > 0
+            ]
+            uc_node_indices = [
+                node.index for cluster in periodic_clusters for node in cluster.uc_nodes
+            ]
+            if uc_node_indices:
+                if tort is None or tort.tort_mod is None:
+                    raise FortranNotAvailableError()
+                with tort.state_lock:
+                    self.set_fort_nodes()
+                    tort.tort_mod.torture_graph(uc_node_indices)
+                    uc_tort = tort.tort_mod.uc_tort
+                for cluster in periodic_clusters:
+                    cluster.set_fort_tortuosity(uc_tort)
+
+        with stage("minimal_clusters", profile):
+            self.set_site_tortuosity()
+            self.set_minimal_clusters()
+
+    def set_fort_nodes(self) -> None:
+        """Upload the graph's nodes to the Fortran module unless they are already there.
 
-        self.set_site_tortuosity()
-        self.set_minimal_clusters()
+        Raises:
+            FortranNotAvailableError: If Fortran extensions are not available.
+        """
+        if tort is None or tort.tort_mod is None:
+            raise FortranNotAvailableError()
+        from crystal_torture.array_interface import set_fort_nodes
+
+        with tort.state_lock:
+            owner = tort.tort_mod.owner
+            if owner is not None and any(owner in cluster.nodes for cluster in self.clusters):
+                return
+            set_fort_nodes(set().union(*(cluster.nodes for cluster in self.clusters)))
 
     def torture_py(self) -> None:
         """Torture the graph and set node tortuosity for UC nodes in cluster.
@@ -100,12 +150,15 @@ class Graph:
         This only tortures UC nodes in each cluster, but the graph contains
         a halo of clusters. Uses pure Python implementation.
         """
-        for cluster in self.clusters:
-            if cluster.periodic is not None and cluster.periodic > 0:
-                cluster.torture_py()
+        profile = self.profile or active_profile()
+        with stage("torture", profile):
+            for cluster in self.clusters:
+                if cluster.periodic is not None and cluster.periodic > 0:
+                    cluster.torture_py()
 
-        self.set_site_tortuosity()
-        self.set_minimal_clusters()
+        with stage("minimal_clusters", profile):
+            self.set_site_tortuosity()
+            self.set_minimal_clusters()
 
     def output_clusters(self, fmt: str, periodic: bool | None = None) -> None:
         """Output the unique unit cell clusters from the graph.
@@ -117,6 +170,8 @@ class Graph:
         Outputs:
             CLUS_*.{fmt}: A cluster structure file for each cluster in the graph.
         """
+        from pymatgen.core import Structure
+
         if fmt == "poscar":
             tail = "vasp"
         else:
@@ -162,7 +217,7 @@ class Graph:
 
             cluster_structure.to(fmt=fmt, filename="CLUS_" + str(index) + "." + tail)  # type: ignore[arg-type]
 
-    def return_periodic_structure(self, fmt: str) -> Structure:
+    def return_periodic_structure(self, fmt: str) -> 'Structure':
         """Gather all periodic clusters in the graph as a single pymatgen Structure.
 
         Args:
@@ -171,6 +226,8 @@ class Graph:
         Returns:
             Structure object containing all periodic clusters.
         """
+        from pymatgen.core import Structure
+
         site_sets: list[frozenset[int]] = []
 
         for cluster in self.clusters:
@@ -223,6 +280,32 @@ class Graph:
 
         return periodic_nodes / total_nodes if total_nodes > 0 else 0.0
 
+    def save(self, path: str | os.PathLike, compress: bool = False) -> None:
+        """Save the graph to a columnar .npz file (see graph_io).
+
+        Args:
+            path: File to write. NumPy appends .npz if the name has no suffix.
+            compress: Whether to compress the arrays. Compressed files cannot
+                be memory-mapped by graph_io.load_arrays.
+        """
+        from crystal_torture.graph_io import save_graph
+
+        save_graph(self, path, compress=compress)
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> 'Graph':
+        """Load a graph saved by Graph.save.
+
+        Args:
+            path: .npz file to read.
+
+        Returns:
+            The loaded Graph, with its clusters, periodicity and tortuosity.
+        """
+        from crystal_torture.graph_io import load_graph
+
+        return load_graph(path)
+
     @property
     def minimal_clusters(self) -> list[minimal_Cluster]:
         """Get minimal clusters.
@@ -0,0 +1,258 @@
+"""Columnar save/load of Graph objects to NumPy .npz files.
+
+A Graph is stored as flat arrays rather than pickled objects: one entry per
+node (index, uc_index, is_halo, element, tortuosity and cluster label), the
+node adjacency in compressed sparse row (CSR) form, one entry per cluster
+(periodicity, tortuosity and halo), the site tortuosity and, if the graph has
+one, the lattice, coordinates and species of its structure.
+
+Uncompressed files can be opened with load_arrays(path, mmap=True), which
+memory-maps each array so large results can be inspected without reading them
+fully.
+"""
+
+import os
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from crystal_torture.cluster import Cluster
+from crystal_torture.graph import Graph
+from crystal_torture.node import Node
+
+if TYPE_CHECKING:
+    from pymatgen.core import Structure
+
+# Version of the array layout written by save_graph.
+FORMAT_VERSION = 1
+
+
+def graph_to_arrays(graph: Graph) -> dict[str, npt.NDArray]:
+    """Flatten a graph into the arrays stored by save_graph.
+
+    Args:
+        graph: Graph to flatten.
+
+    Returns:
+        Dict of array name to array.
+    """
+    clusters = list(graph.clusters)
+    nodes = [node for cluster in clusters for node in cluster.nodes]
+    node_cluster = np.repeat(
+        np.arange(len(clusters), dtype=np.int64), [len(cluster.nodes) for cluster in clusters]
+    )
+    order = np.argsort([node.index for node in nodes], kind="stable")
+    nodes = [nodes[i] for i in order]
+    element_names, node_element = np.unique(
+        np.array([node.element for node in nodes], dtype=str), return_inverse=True
+    )
+
+    neighbours = [sorted(node.neighbours_ind) for node in nodes]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum([len(n) for n in neighbours], out=indptr[1:])
+    indices = np.fromiter(
+        (neighbour for node_neighbours in neighbours for neighbour in node_neighbours),
+        dtype=np.int64,
+        count=int(indptr[-1]),
+    )
+
+    site_tortuosity = graph.tortuosity
+    arrays: dict[str, npt.NDArray] = {
+        "format_version": np.array(FORMAT_VERSION),
+        "node_index": np.array([node.index for node in nodes], dtype=np.int64),
+        "node_uc_index": np.array([node.uc_index for node in nodes], dtype=np.int64),
+        "node_is_halo": np.array([node.is_halo for node in nodes], dtype=bool),
+        "node_element": node_element.astype(np.int32),
+        "element_names": element_names,
+        "node_tortuosity": np.array(
+            [np.nan if node.tortuosity is None else node.tortuosity for node in nodes],
+            dtype=np.float64,
+        ),
+        "node_cluster": node_cluster[order],
+        "adjacency_indptr": indptr,
+        "adjacency_indices": indices,
+        "cluster_periodic": np.array(
+            [-1 if cluster.periodic is None else cluster.periodic for cluster in clusters],
+            dtype=np.int64,
+        ),
+        "cluster_tortuosity": np.array(
+            [np.nan if cluster.tortuosity is None else cluster.tortuosity for cluster in clusters],
+            dtype=np.float64,
+        ),
+        "cluster_halo": np.array([cluster.halo for cluster in clusters], dtype=np.int64).reshape(-1, 3),
+        "has_site_tortuosity": np.array(site_tortuosity is not None),
+        "site_tortuosity_index": np.array(list((site_tortuosity or {}).keys()), dtype=np.int64),
+        "site_tortuosity": np.array(list((site_tortuosity or {}).values()), dtype=np.float64),
+        "has_minimal_clusters": np.array(graph.min_clusters is not None),
+    }
+    if graph.structure is not None:
+        arrays["lattice"] = np.asarray(graph.structure.lattice.matrix, dtype=np.float64)
+        arrays["frac_coords"] = np.asarray(graph.structure.frac_coords, dtype=np.float64)
+        arrays["species"] = np.array([site.species_string for site in graph.structure], dtype=str)
+    return arrays
+
+
+def arrays_to_graph(arrays: dict[str, npt.NDArray]) -> Graph:
+    """Rebuild a graph from the arrays written by graph_to_arrays.
+
+    Args:
+        arrays: Dict (or NpzFile) of array name to array.
+
+    Returns:
+        The rebuilt Graph, with its nodes, clusters, periodicity and tortuosity.
+
+    Raises:
+        ValueError: If the arrays were written by a newer version of the format.
+    """
+    version = int(arrays["format_version"])
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"Graph file format version {version} is newer than supported version {FORMAT_VERSION}"
+        )
+
+    element_names = np.asarray(arrays["element_names"]).tolist()
+    indptr = np.asarray(arrays["adjacency_indptr"]).tolist()
+    indices = np.asarray(arrays["adjacency_indices"]).tolist()
+    nodes = [
+        Node(
+            index=index,
+            element=element_names[element],
+            uc_index=uc_index,
+            is_halo=is_halo,
+            neighbours_ind=set(indices[indptr[i]:indptr[i + 1]]),
+        )
+        for i, (index, uc_index, is_halo, element) in enumerate(
+            zip(
+                np.asarray(arrays["node_index"]).tolist(),
+                np.asarray(arrays["node_uc_index"]).tolist(),
+                np.asarray(arrays["node_is_halo"]).tolist(),
+                np.asarray(arrays["node_element"]).tolist(),
+            )
+        )
+    ]
+    by_index = {node.index: node for node in nodes}
+    for node, tortuosity in zip(nodes, np.asarray(arrays["node_tortuosity"]).tolist()):
+        node.neighbours = {by_index[neighbour] for neighbour in node.neighbours_ind}
+        node.tortuosity = None if np.isnan(tortuosity) else tortuosity
+
+    cluster_nodes: list[set[Node]] = [set() for _ in range(len(arrays["cluster_periodic"]))]
+    for node, label in zip(nodes, np.asarray(arrays["node_cluster"]).tolist()):
+        cluster_nodes[label].add(node)
+    clusters = set()
+    for members, halo, periodic, tortuosity in zip(
+        cluster_nodes,
+        np.asarray(arrays["cluster_halo"]).tolist(),
+        np.asarray(arrays["cluster_periodic"]).tolist(),
+        np.asarray(arrays["cluster_tortuosity"]).tolist(),
+    ):
+        cluster = Cluster(members, halo=tuple(halo))
+        cluster.periodic = None if periodic < 0 else periodic
+        cluster.tortuosity = None if np.isnan(tortuosity) else tortuosity
+        clusters.add(cluster)
+
+    structure = None
+    if "lattice" in arrays:
+        structure = _structure_from_arrays(
+            arrays["lattice"], arrays["frac_coords"], arrays["species"]
+        )
+    graph = Graph(clusters=clusters, structure=structure)
+    if bool(arrays["has_site_tortuosity"]):
+        graph.tortuosity = dict(
+            zip(
+                np.asarray(arrays["site_tortuosity_index"]).tolist(),
+                np.asarray(arrays["site_tortuosity"]).tolist(),
+            )
+        )
+    if bool(arrays["has_minimal_clusters"]):
+        graph.set_minimal_clusters()
+    return graph
+
+
+def _structure_from_arrays(
+    lattice: npt.NDArray, frac_coords: npt.NDArray, species: npt.NDArray
+) -> 'Structure':
+    """Build the graph's pymatgen Structure (site properties are not stored)."""
+    from pymatgen.core import Lattice, Structure
+
+    return Structure(
+        Lattice(np.asarray(lattice)), np.asarray(species).tolist(), np.asarray(frac_coords)
+    )
+
+
+def save_graph(graph: Graph, path: str | os.PathLike, compress: bool = False) -> None:
+    """Save a graph to a columnar .npz file.
+
+    Args:
+        graph: Graph to save.
+        path: File to write. NumPy appends .npz if the name has no suffix.
+        compress: Whether to compress the arrays. Compressed files are smaller
+            but cannot be memory-mapped by load_arrays.
+    """
+    savez = np.savez_compressed if compress else np.savez
+    savez(path, **graph_to_arrays(graph))
+
+
+def load_graph(path: str | os.PathLike) -> Graph:
+    """Load a graph saved by save_graph.
+
+    Args:
+        path: .npz file to read.
+
+    Returns:
+        The loaded Graph.
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        return arrays_to_graph(arrays)
+
+
+def load_arrays(path: str | os.PathLike, mmap: bool = False) -> dict[str, npt.NDArray]:
+    """Load the arrays of a graph saved by save_graph without building the Graph.
+
+    Args:
+        path: .npz file to read.
+        mmap: Whether to memory-map the arrays (read-only) instead of reading
+            them into memory. Requires a file saved with compress=False.
+
+    Returns:
+        Dict of array name to array (see graph_to_arrays).
+
+    Raises:
+        ValueError: If mmap is requested for a compressed file.
+    """
+    if not mmap:
+        with np.load(path, allow_pickle=False) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as handle:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped")
+            # Skip the zip local file header to reach the stored .npy data.
+            handle.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(handle.read(4), dtype="<u2")
+            handle.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            data_offset = handle.tell()
+            version = np.lib.format.read_magic(handle)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+            name = Path(info.filename).stem
+            if not shape or np.prod(shape, dtype=np.int64) == 0:
+                # Scalars and empty arrays are read directly.
+                handle.seek(data_offset)
+                arrays[name] = np.lib.format.read_array(handle, allow_pickle=False)
+            else:
+                arrays[name] = np.memmap(
+                    path,
+                    dtype=dtype,
+                    mode="r",
+                    offset=handle.tell(),
+                    shape=shape,
+                    order="F" if fortran_order else "C",
+                )
+    return arrays
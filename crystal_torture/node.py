@@ -6,8 +6,8 @@ class Node:
     """A node representing an atomic site in a crystal structure for percolation analysis.
     
     Each Node represents one atomic site from the input crystal structure. To properly
-    handle periodic boundary conditions, the analysis uses a 3×3×3 supercell containing
-    the original unit cell surrounded by 26 periodic images. This creates nodes for
+    handle periodic boundary conditions, the analysis uses a halo supercell (3×3×3 by
+    default) containing the original unit cell surrounded by its periodic images. This creates nodes for
     both the original sites and their periodic copies.
     
     Every Node has a unique index in the supercell. Multiple nodes share the same
@@ -0,0 +1,166 @@
+"""Opt-in per-stage timing and memory instrumentation for the graph pipeline."""
+
+import contextvars
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+# Profile collecting stages for the current context, if profiling is enabled.
+_active_profile: contextvars.ContextVar['PipelineProfile | None'] = contextvars.ContextVar(
+    "crystal_torture_profile", default=None
+)
+
+
+def peak_rss() -> int | None:
+    """Return the peak resident set size of this process in bytes, if available."""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return int(maxrss if sys.platform == "darwin" else maxrss * 1024)
+
+
+class StageProfile:
+    """Wall time, CPU time and peak memory recorded for one pipeline stage."""
+
+    def __init__(self,
+        name: str,
+        wall_time: float,
+        cpu_time: float,
+        peak_rss: int | None,
+        peak_rss_increase: int | None) -> None:
+        """Initialise a stage record.
+
+        Args:
+            name: Name of the stage.
+            wall_time: Elapsed wall-clock time in seconds.
+            cpu_time: Process CPU time (all threads) in seconds.
+            peak_rss: Process peak resident set size in bytes at the end of the stage.
+            peak_rss_increase: Increase in the peak resident set size during the stage.
+        """
+        self.name = name
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.peak_rss = peak_rss
+        self.peak_rss_increase = peak_rss_increase
+
+    def as_dict(self) -> dict:
+        """Return the stage record as a plain dict."""
+        return {
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "peak_rss": self.peak_rss,
+            "peak_rss_increase": self.peak_rss_increase,
+        }
+
+
+class PipelineProfile:
+    """Per-stage report for one run of the graph pipeline.
+
+    Stages are recorded in the order they complete: neighbour_search,
+    halo_creation, node_construction, fortran_upload, clustering, torture
+    and minimal_clusters (plus structure_filter for species filtering).
+    """
+
+    def __init__(self, callback: Callable[[StageProfile], None] | None = None) -> None:
+        """Initialise an empty profile.
+
+        Args:
+            callback: Optional function called with each StageProfile as it completes.
+        """
+        self.stages: list[StageProfile] = []
+        self.callback = callback
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record wall time, CPU time and peak RSS for the enclosed block."""
+        rss_before = peak_rss()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            rss_after = peak_rss()
+            increase = None if rss_before is None or rss_after is None else rss_after - rss_before
+            record = StageProfile(name, wall_time, cpu_time, rss_after, increase)
+            self.stages.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def totals(self) -> dict[str, float]:
+        """Return the total wall time per stage name."""
+        totals: dict[str, float] = {}
+        for record in self.stages:
+            totals[record.name] = totals.get(record.name, 0.0) + record.wall_time
+        return totals
+
+    def report(self) -> list[dict]:
+        """Return the recorded stages as a list of dicts."""
+        return [record.as_dict() for record in self.stages]
+
+    def __str__(self) -> str:
+        lines = [f"{'stage':<20}{'wall (s)':>12}{'cpu (s)':>12}{'peak RSS (MiB)':>16}"]
+        for record in self.stages:
+            rss = "-" if record.peak_rss is None else f"{record.peak_rss / 2**20:.1f}"
+            lines.append(
+                f"{record.name:<20}{record.wall_time:>12.4f}{record.cpu_time:>12.4f}{rss:>16}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_stages(
+    callback: Callable[[StageProfile], None] | None = None,
+) -> Iterator[PipelineProfile]:
+    """Profile every pipeline stage run inside the with block.
+
+    Graphs built inside the block carry the profile as graph.profile, and
+    later calls to graph.torture()/torture_py() keep adding to it.
+
+    Args:
+        callback: Optional function called with each StageProfile as it completes.
+
+    Yields:
+        The PipelineProfile collecting the stages.
+
+    Example:
+        >>> with profile_stages() as profile:
+        ...     graph = graph_from_structure(structure, 3.0, {"Li"})
+        ...     graph.torture()
+        >>> print(profile)
+    """
+    profile = PipelineProfile(callback)
+    token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(token)
+
+
+def active_profile() -> PipelineProfile | None:
+    """Return the profile enabled by an enclosing profile_stages block, if any."""
+    return _active_profile.get()
+
+
+def stage(name: str, profile: PipelineProfile | None = None) -> ContextManager[None]:
+    """Time a pipeline stage if profiling is enabled, otherwise do nothing.
+
+    Args:
+        name: Name of the stage.
+        profile: Profile to record into; defaults to the active profile.
+    """
+    if profile is None:
+        profile = _active_profile.get()
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
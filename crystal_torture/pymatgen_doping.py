@@ -1,8 +1,19 @@
 """Simple functions for manipulating and doping a pymatgen structure."""
 
-import random
+import numpy as np
+import numpy.typing as npt
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pymatgen.core import Structure, Molecule, PeriodicSite
 
+from crystal_torture.cluster import DEFAULT_HALO
+from crystal_torture.topology import NeighbourTopology, SharedTopology
+
+# Host data shared with ensemble worker processes, set once per worker.
+_ensemble_host: dict | None = None
+# Host neighbour topology attached by ensemble analysis worker processes.
+_ensemble_topology: NeighbourTopology | None = None
+
 
 def count_sites(structure: Structure,
         species: set[str] | None = None,
@@ -71,13 +82,23 @@ def index_sites(structure: Structure,
         raise ValueError("Need to supply either specie, or label to index_sites")
 
 
+def _site_labels(sites: list[PeriodicSite]) -> list[str | None]:
+    """Return site labels, with None where a label only mirrors the site species.
+
+    Passing None leaves pymatgen to derive the label from the species, so sites
+    that were never explicitly labelled keep tracking their species if doped.
+    """
+    return [None if site.label == site.species_string else site.label for site in sites]
+
+
 def sort_structure(structure: Structure,
         order: list[str]) -> Structure:
     """Sort structure species so their indices sit side by side in given order.
     
     Given a pymatgen structure object sort the species so that their indices
     sit side by side in the structure, in given order - allows for POSCAR file to 
-    be written in a readable way after doping.
+    be written in a readable way after doping. Sites keep their relative order
+    within each species, along with their site properties and labels.
 
     Args:
         structure: Pymatgen structure object.
@@ -95,31 +116,86 @@ def sort_structure(structure: Structure,
         symbols.remove("X")
         symbols.append("X0+")
 
-    if set(symbols) == set(order):
-        structure_sorted = Structure(lattice=structure.lattice, species=[], coords=[])
-        for symbol in symbols:
-            for i, site in enumerate(structure.sites):
-                if site.species_string == symbol:
-                    structure_sorted.append(
-                        symbol,
-                        site.coords,
-                        coords_are_cartesian=True,
-                        properties=site.properties,
-                    )
-    else:
+    if set(symbols) != set(order):
         error_msg = "Error: sort structure elements in list passed in order does not match that found in POSCAR\n"
         error_msg += "Passed: {}\n".format(order)
         error_msg += "POSCAR: {}\n".format(symbols)
         raise ValueError(error_msg)
+
+    # Stable argsort on per-site species codes keeps the original relative order
+    # of sites within each species, then the sorted structure is built in one go.
+    # Sites whose species string is not in order are dropped.
+    species_codes = {symbol: code for code, symbol in enumerate(order)}
+    codes = np.array(
+        [species_codes.get(site.species_string, -1) for site in structure.sites],
+        dtype=int,
+    )
+    sorted_indices = np.argsort(codes, kind="stable")
+    sorted_indices = sorted_indices[codes[sorted_indices] >= 0]
+
+    sites = structure.sites
+    site_properties = {
+        key: [values[i] for i in sorted_indices]
+        for key, values in structure.site_properties.items()
+    }
+    structure_sorted = Structure(
+        lattice=structure.lattice,
+        species=[sites[i].species for i in sorted_indices],
+        coords=structure.cart_coords[sorted_indices],
+        coords_are_cartesian=True,
+        site_properties=site_properties or None,
+        labels=_site_labels([sites[i] for i in sorted_indices]),
+    )
     return structure_sorted
 
 
+def _choose_dopant_sites(
+    site_indices: npt.ArrayLike,
+    no_dopants: int,
+    species_to_insert: list[str],
+    rng: np.random.Generator | np.random.SeedSequence | int | None,
+) -> list[npt.NDArray[np.int_]]:
+    """Choose distinct sites for each dopant species without replacement.
+
+    Args:
+        site_indices: Indices of the sites available for doping.
+        no_dopants: Number of each type of dopant to insert.
+        species_to_insert: A list of species to distribute over the chosen sites.
+        rng: Numpy random Generator, or seed for one.
+
+    Returns:
+        One array of site indices per species in species_to_insert.
+    """
+    rng = np.random.default_rng(rng)
+    chosen = rng.choice(
+        np.asarray(site_indices, dtype=int),
+        size=no_dopants * len(species_to_insert),
+        replace=False,
+    )
+    return np.split(chosen, len(species_to_insert))
+
+
+def _insert_dopants(
+    structure: Structure,
+    site_indices: list[int],
+    no_dopants: int,
+    species_to_insert: list[str],
+    rng: np.random.Generator | int | None,
+) -> None:
+    """Replace randomly chosen sites in structure with the dopant species, in place."""
+    chosen = _choose_dopant_sites(site_indices, no_dopants, species_to_insert, rng)
+    for species, indices in zip(species_to_insert, chosen):
+        for index in indices:
+            structure[int(index)] = species
+
+
 def dope_structure(
     structure: Structure, 
     conc: float, 
     species_to_rem: str, 
     species_to_insert: list[str], 
-    label_to_remove: str | None = None
+    label_to_remove: str | None = None,
+    rng: np.random.Generator | int | None = None,
 ) -> Structure:
     """Dope a pymatgen structure object to a particular concentration.
     
@@ -132,6 +208,8 @@ def dope_structure(
         species_to_rem: The species to remove from structure.
         species_to_insert: A list of species to equally distribute over sites that are removed.
         label_to_remove: Label of sites to select for removal.
+        rng: Numpy random Generator, or seed for one, used to choose the sites
+            to dope. None draws fresh entropy.
         
     Returns:
         The doped structure.
@@ -147,10 +225,7 @@ def dope_structure(
             structure, species={species_to_rem}, labels={label_to_remove} if label_to_remove else None
         )
         no_dopants = int(round(conc * no_sites) / len(species_to_insert))
-        random.shuffle(site_indices)
-        for species in species_to_insert:
-            for dopant in range(no_dopants):
-                structure[site_indices.pop()] = species
+        _insert_dopants(structure, site_indices, no_dopants, species_to_insert, rng)
         structure = sort_structure(
             structure=structure, order=[species for species in structure.symbol_set]
         )
@@ -164,7 +239,8 @@ def dope_structure_by_no(
     no_dopants: int, 
     species_to_rem: str, 
     species_to_insert: list[str], 
-    label_to_remove: str | None = None
+    label_to_remove: str | None = None,
+    rng: np.random.Generator | int | None = None,
 ) -> Structure:
     """Dope a pymatgen structure object by swapping a specific number of sites.
     
@@ -177,6 +253,8 @@ def dope_structure_by_no(
         species_to_rem: The species to remove from structure.
         species_to_insert: A list of species to equally distribute over sites that are removed.
         label_to_remove: Label of sites to select for removal.
+        rng: Numpy random Generator, or seed for one, used to choose the sites
+            to dope. None draws fresh entropy.
         
     Returns:
         The doped structure.
@@ -191,11 +269,7 @@ def dope_structure_by_no(
         site_indices = index_sites(
             structure, species={species_to_rem}, labels={label_to_remove} if label_to_remove else None
         )
-        random.shuffle(site_indices)
-
-        for species in species_to_insert:
-            for dopant in range(no_dopants):
-                structure[site_indices.pop()] = species
+        _insert_dopants(structure, site_indices, no_dopants, species_to_insert, rng)
         structure = sort_structure(
             structure=structure, order=[species for species in structure.symbol_set]
         )
@@ -205,6 +279,291 @@ def dope_structure_by_no(
         raise ValueError("dope_struture_by_no: species_to_rem is not in structure")
 
 
+def _doped_species(
+    host_species: npt.NDArray[np.object_],
+    site_indices: npt.NDArray[np.int_],
+    no_dopants: int,
+    species_to_insert: list[str],
+    seed: np.random.SeedSequence | int | None,
+) -> npt.NDArray[np.object_]:
+    """Return a copy of host_species with dopants placed on randomly chosen sites.
+
+    Args:
+        host_species: Species string for every site in the host structure.
+        site_indices: Indices of the sites available for doping.
+        no_dopants: Number of each type of dopant to insert.
+        species_to_insert: A list of species to distribute over the chosen sites.
+        seed: Seed for the numpy random Generator used to choose sites.
+
+    Returns:
+        Species strings for every site in the doped structure.
+    """
+    species = host_species.copy()
+    chosen = _choose_dopant_sites(site_indices, no_dopants, species_to_insert, seed)
+    for dopant, indices in zip(species_to_insert, chosen):
+        species[indices] = dopant
+    return species
+
+
+def _structure_from_species(host: Structure, species: npt.NDArray[np.object_]) -> Structure:
+    """Build a sorted doped structure from the host lattice, sites and new species."""
+    doped = Structure(
+        lattice=host.lattice,
+        species=list(species),
+        coords=host.frac_coords,
+        site_properties=host.site_properties or None,
+        labels=_site_labels(host.sites),
+    )
+    return sort_structure(structure=doped, order=[symbol for symbol in doped.symbol_set])
+
+
+def _ensemble_setup(
+    structure: Structure,
+    species_to_rem: str,
+    species_to_insert: list[str],
+    conc: float | None,
+    no_dopants: int | None,
+    label_to_remove: str | None,
+) -> dict:
+    """Check the doping set-up of an ensemble and return what workers need to dope the host.
+
+    Raises:
+        ValueError: If species_to_rem is not in structure, if not exactly one of
+            conc and no_dopants is given, or if there are too few sites to dope.
+    """
+    if not {species_to_rem}.issubset(structure.symbol_set):
+        raise ValueError("dope_structure_ensemble: species_to_rem is not in structure")
+    if (conc is None) == (no_dopants is None):
+        raise ValueError("dope_structure_ensemble: supply exactly one of conc or no_dopants")
+
+    site_indices = np.array(
+        index_sites(
+            structure, species={species_to_rem}, labels={label_to_remove} if label_to_remove else None
+        ),
+        dtype=int,
+    )
+    if no_dopants is None:
+        no_dopants = int(round(conc * len(site_indices)) / len(species_to_insert))
+    if no_dopants * len(species_to_insert) > len(site_indices):
+        raise ValueError(
+            f"dope_structure_ensemble: cannot insert {no_dopants * len(species_to_insert)} "
+            f"dopants into {len(site_indices)} sites"
+        )
+    return {
+        "host_species": np.array([site.species_string for site in structure], dtype=object),
+        "site_indices": site_indices,
+        "no_dopants": no_dopants,
+        "species_to_insert": list(species_to_insert),
+    }
+
+
+def _sample_seeds(
+    seed: int | np.random.SeedSequence | None, no_samples: int
+) -> list[np.random.SeedSequence]:
+    """Spawn one child seed per ensemble sample."""
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return seed_seq.spawn(no_samples)
+
+
+def _init_ensemble_worker(host: Structure, ensemble: dict) -> None:
+    """Store the host structure and doping set-up in an ensemble worker process."""
+    global _ensemble_host
+    _ensemble_host = dict(ensemble, host=host)
+
+
+def _ensemble_sample(seed: np.random.SeedSequence) -> Structure | npt.NDArray[np.object_]:
+    """Generate one ensemble member in a worker process from its seed."""
+    if _ensemble_host is None:
+        raise RuntimeError("Ensemble worker has not been initialised")
+    species = _doped_species(
+        _ensemble_host["host_species"],
+        _ensemble_host["site_indices"],
+        _ensemble_host["no_dopants"],
+        _ensemble_host["species_to_insert"],
+        seed,
+    )
+    if _ensemble_host["species_only"]:
+        return species
+    return _structure_from_species(_ensemble_host["host"], species)
+
+
+def dope_structure_ensemble(
+    structure: Structure,
+    no_samples: int,
+    species_to_rem: str,
+    species_to_insert: list[str],
+    conc: float | None = None,
+    no_dopants: int | None = None,
+    label_to_remove: str | None = None,
+    seed: int | np.random.SeedSequence | None = None,
+    species_only: bool = False,
+    workers: int | None = None,
+) -> Iterator[Structure | npt.NDArray[np.object_]]:
+    """Yield an ensemble of randomly doped configurations of a host structure.
+
+    The host structure is read once and never modified. Each sample draws its
+    dopant sites with its own numpy random Generator, seeded from a child of
+    seed, so sample i is the same whatever the number of workers.
+
+    Args:
+        structure: Pymatgen structure object to dope (left unchanged).
+        no_samples: Number of doped configurations to generate.
+        species_to_rem: The species to remove from structure.
+        species_to_insert: A list of species to equally distribute over sites that are removed.
+        conc: Fractional percentage of sites to remove (as for dope_structure).
+        no_dopants: Number of each type of dopant to insert (as for dope_structure_by_no).
+        label_to_remove: Label of sites to select for removal.
+        seed: Seed for the ensemble; None draws fresh entropy.
+        species_only: Yield the per-site species arrays (in host site order)
+            instead of sorted doped structures.
+        workers: Number of worker processes to generate samples in. None or 1
+            generates them in the calling process.
+
+    Yields:
+        Doped structures, or species arrays if species_only is True, in sample order.
+
+    Raises:
+        ValueError: If species_to_rem is not in structure, if not exactly one of
+            conc and no_dopants is given, or if there are too few sites to dope.
+    """
+    ensemble = _ensemble_setup(
+        structure, species_to_rem, species_to_insert, conc, no_dopants, label_to_remove
+    )
+    ensemble["species_only"] = species_only
+    site_indices = ensemble["site_indices"]
+    no_dopants = ensemble["no_dopants"]
+    sample_seeds = _sample_seeds(seed, no_samples)
+
+    if workers is None or workers <= 1:
+        for sample_seed in sample_seeds:
+            species = _doped_species(
+                ensemble["host_species"], site_indices, no_dopants, species_to_insert, sample_seed
+            )
+            yield species if species_only else _structure_from_species(structure, species)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_ensemble_worker,
+        initargs=(structure, ensemble),
+    ) as executor:
+        chunksize = max(1, no_samples // (4 * workers))
+        yield from executor.map(_ensemble_sample, sample_seeds, chunksize=chunksize)
+
+
+def _init_analysis_worker(shared: SharedTopology, ensemble: dict) -> None:
+    """Attach the shared host topology and store the doping set-up in an analysis worker."""
+    global _ensemble_host, _ensemble_topology
+    _ensemble_host = ensemble
+    _ensemble_topology = shared.attach()
+
+
+def _analyse_sample(seed: np.random.SeedSequence) -> dict:
+    """Dope the host and analyse the sample in a worker process from its seed."""
+    if _ensemble_host is None or _ensemble_topology is None:
+        raise RuntimeError("Ensemble worker has not been initialised")
+    return _analyse_species(_ensemble_topology, _ensemble_host, seed)
+
+
+def _analyse_species(
+    topology: NeighbourTopology, ensemble: dict, seed: np.random.SeedSequence
+) -> dict:
+    """Dope the host species with the given seed and analyse them on the host topology."""
+    species = _doped_species(
+        ensemble["host_species"],
+        ensemble["site_indices"],
+        ensemble["no_dopants"],
+        ensemble["species_to_insert"],
+        seed,
+    )
+    sites = ensemble["sites"]
+    results = topology.analyse(
+        species[sites], ensemble["elements"], torture=ensemble["torture"], halo=ensemble["halo"]
+    )
+    # Map the per-site results back from the topology sites to the host sites.
+    cluster = np.full(len(species), -1, dtype=np.int64)
+    tortuosity = np.full(len(species), np.nan)
+    cluster[sites] = results["cluster"]
+    tortuosity[sites] = results["tortuosity"]
+    return dict(results, cluster=cluster, tortuosity=tortuosity)
+
+
+def analyse_doped_ensemble(
+    structure: Structure,
+    no_samples: int,
+    species_to_rem: str,
+    species_to_insert: list[str],
+    rcut: float,
+    elements: set[str],
+    conc: float | None = None,
+    no_dopants: int | None = None,
+    label_to_remove: str | None = None,
+    seed: int | np.random.SeedSequence | None = None,
+    torture: bool = True,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+    workers: int | None = None,
+) -> Iterator[dict]:
+    """Yield the percolation and tortuosity results of an ensemble of doped configurations.
+
+    Doping only changes the species on the host sites, so the neighbour search
+    is run once on the host sites that can hold elements, and each sample's
+    graph is built by masking it.
+    With workers, the host topology is placed in shared memory and attached by
+    every worker process without copying. Samples are drawn exactly as in
+    dope_structure_ensemble, so sample i matches sample i of dope_structure_ensemble
+    with the same seed.
+
+    Args:
+        structure: Pymatgen structure object to dope (left unchanged).
+        no_samples: Number of doped configurations to analyse.
+        species_to_rem: The species to remove from structure.
+        species_to_insert: A list of species to equally distribute over sites that are removed.
+        rcut: Cut-off radius for node-node connections in forming clusters.
+        elements: Set of element strings to include in setting up each graph.
+        conc: Fractional percentage of sites to remove (as for dope_structure).
+        no_dopants: Number of each type of dopant to insert (as for dope_structure_by_no).
+        label_to_remove: Label of sites to select for removal.
+        seed: Seed for the ensemble; None draws fresh entropy.
+        torture: Whether to calculate tortuosity for periodic clusters.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+        workers: Number of worker processes to analyse samples in. None or 1
+            analyses them in the calling process.
+
+    Yields:
+        A dict of results per sample, in sample order, as for
+        array_interface.analyse_arrays with sites in host structure order.
+
+    Raises:
+        ValueError: If species_to_rem is not in structure, if not exactly one of
+            conc and no_dopants is given, or if there are too few sites to dope.
+    """
+    ensemble = _ensemble_setup(
+        structure, species_to_rem, species_to_insert, conc, no_dopants, label_to_remove
+    )
+    # Only sites holding elements in the host, or that may be doped, can be in a graph.
+    sites = np.flatnonzero(
+        np.isin(ensemble["host_species"], [*elements, species_to_rem])
+    )
+    ensemble.update(sites=sites, elements=set(elements), torture=torture, halo=halo)
+    sample_seeds = _sample_seeds(seed, no_samples)
+    topology = NeighbourTopology.from_arrays(
+        structure.lattice.matrix, structure.frac_coords[sites], rcut
+    )
+
+    if workers is None or workers <= 1:
+        for sample_seed in sample_seeds:
+            yield _analyse_species(topology, ensemble, sample_seed)
+        return
+
+    with topology.share() as shared, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_analysis_worker,
+        initargs=(shared, ensemble),
+    ) as executor:
+        chunksize = max(1, no_samples // (4 * workers))
+        yield from executor.map(_analyse_sample, sample_seeds, chunksize=chunksize)
+
+
 def set_site_labels(structure: Structure, labels: list[str]) -> None:
     """Set site labels using the built-in label property.
     
@@ -1,123 +1,37 @@
 """Functions for setting up a node, cluster and graph using pymatgen."""
 
 from crystal_torture.node import Node
-from crystal_torture.cluster import Cluster, clusters_from_nodes
+from crystal_torture.cluster import DEFAULT_HALO, Cluster
 from crystal_torture.graph import Graph
-from crystal_torture.exceptions import FortranNotAvailableError
+from crystal_torture.array_interface import (
+    _clusters_from_halo_nodes,
+    _halo_neighbours_from_pairs,
+    _image_pairs,
+    _check_halo,
+    _max_image,
+    _python_dist,
+    _python_shift_index,
+    _python_shift_indices,
+    halo_sites,
+    lattice_images,
+    map_index,
+    neighbour_pairs,
+    nodes_from_arrays,
+    set_fort_nodes,
+)
 import numpy as np
-import itertools
-import math
-from copy import deepcopy
 import sys
-import time
+from crystal_torture.profiling import active_profile, stage
 from pymatgen.core import Structure, Molecule, PeriodicSite
-from types import ModuleType
 import numpy.typing as npt
 
-# Module variables with proper type hints
-dist: ModuleType | None
-tort: ModuleType | None
-
-try:
-    from . import dist
-except ImportError:
-    dist = None
-
-try:
-    from . import tort
-except ImportError:
-    tort = None
-
-
-def _python_dist(coord1: npt.NDArray[np.floating], coord2: npt.NDArray[np.floating], n: int) -> npt.NDArray[np.floating]:
-    """Pure Python fallback for distance calculation when Fortran dist module is not available.
-    
-    Args:
-        coord1: Array of coordinates.
-        coord2: Array of coordinates.  
-        n: Number of coordinates.
-        
-    Returns:
-        Distance matrix.
-    """
-    # Use numpy broadcasting for vectorized calculation
-    # coord1[:, None, :] creates shape (n, 1, 3)
-    # coord2[None, :, :] creates shape (1, n, 3)  
-    # Subtraction creates shape (n, n, 3)
-    # np.linalg.norm computes distances along axis=2
-    return np.linalg.norm(coord1[:, None, :] - coord2[None, :, :], axis=2)
-
-def _python_shift_index(index_n: int, shift: list[int]) -> int:
-    """Pure Python fallback for index shifting when Fortran dist module is not available.
-    
-    Args:
-        index_n: Original index (must be non-negative).
-        shift: Shift vector [x, y, z].
-        
-    Returns:
-        New shifted index.
-        
-    Raises:
-        ValueError: If index_n is negative.
-    """
-    if index_n < 0:
-        raise ValueError(f"shift_index received negative index: {index_n}. This indicates an upstream bug.")
-        
-    new_x = (int(index_n // 9) % 3 + shift[0]) % 3
-    new_y = (int(index_n // 3) % 3 + shift[1]) % 3  
-    new_z = (index_n % 3 + shift[2]) % 3
-    
-    new_index = int(27 * int(index_n // 27) + (new_x % 3) * 9 + (new_y % 3) * 3 + (new_z % 3))
-    return new_index
-
-
-def map_index(
-    uc_neighbours: list[list[int]], 
-    uc_index: list[int], 
-    x_d: int, 
-    y_d: int, 
-    z_d: int
-) -> list[list[int]]:
-    """Take a list of neighbour indices for sites in the original unit cell and map them onto all supercell sites.
-    
-    Args:
-        uc_neighbours: List of lists containing neighbour indices for the nodes that are in the primitive cell.
-        uc_index: List of indices corresponding to the primitive cell nodes.
-        x_d: X dimension of supercell.
-        y_d: Y dimension of supercell.
-        z_d: Z dimension of supercell.
-    
-    Returns:
-        List of neighbour indices for all nodes.
-    """
-    if dist is None:
-        shift_func = _python_shift_index
-    else:
-        shift_func = dist.shift_index
-
-    no_atoms = len(uc_index)
-    count = -1
-    neigh: list[list[int]] = []
-    append = neigh.append
-    for i, index in enumerate(uc_index):
-        for x in range(0, x_d, 1):
-            for y in range(0, y_d, 1):
-                for z in range(0, z_d, 1):
-                    count += 1
-                    append(
-                        [
-                            shift_func(neighbour, [x, y, z])
-                            for neighbour in uc_neighbours[i]
-                        ]
-                    )
-    return neigh
-
 
 def get_all_neighbors_and_image(structure: Structure, r: float, include_index: bool = False) -> list[list[tuple]]:
     """Get neighbours for each atom in the unit cell, out to a distance r.
     
-    Modified from pymatgen to return image (used for mapping to supercell), and to use the f2py wrapped
-    OpenMP dist subroutine to get the distances (smaller memory footprint and faster than numpy).
+    Modified from pymatgen to return image (used for mapping to supercell), and to use the
+    OpenMP dist_pairs subroutines to find the pairs within r (memory scales with the number
+    of pairs rather than the square of the number of sites, and faster than numpy).
 
     Returns a list of list of neighbors for each site in structure.
     Use this method if you are planning on looping over all sites in the
@@ -139,185 +53,366 @@ def get_all_neighbors_and_image(structure: Structure, r: float, include_index: b
         structure. This is needed for ewaldmatrix by keeping track of which
         sites contribute to the ewald sum.
     """
-    # Choose distance calculation function based on availability
-    if dist is None:
-        dist_func = _python_dist
-    else:
-        dist_func = dist.dist
-    
-    recp_len = np.array(structure.lattice.reciprocal_lattice.abc)
-    maxr = np.ceil((r + 0.15) * recp_len / (2 * math.pi))
-    nmin = np.floor(np.min(structure.frac_coords, axis=0)) - maxr
-    nmax = np.ceil(np.max(structure.frac_coords, axis=0)) + maxr
-
-    all_ranges = [np.arange(x, y) for x, y in zip(nmin, nmax)]
-
     latt = structure._lattice
-    neighbors: list[list[tuple]] = [list() for i in range(len(structure._sites))]
-    all_fcoords = np.mod(structure.frac_coords, 1)
-    coords_in_cell = latt.get_cartesian_coords(all_fcoords)
-    site_coords = structure.cart_coords
 
+    neighbors: list[list[tuple]] = [list() for i in range(len(structure._sites))]
     indices = np.arange(len(structure))
-    for image in itertools.product(*all_ranges):
-        coords = latt.get_cartesian_coords(image) + coords_in_cell
-        all_dists = dist_func(coords, site_coords, len(coords))
-        all_within_r = np.bitwise_and(all_dists <= r, all_dists > 1e-8)
-
-        for (j, d, within_r) in zip(indices, all_dists, all_within_r):
-            nnsite = PeriodicSite(
-                structure[j].specie,
-                coords[j],
-                latt,
-                properties=structure[j].properties,
-                coords_are_cartesian=True,
-            )
-            for i in indices[within_r]:
-                item = (nnsite, d[i], j, image) if include_index else (nnsite, d[i])
-                neighbors[i].append(item)
+    for image, coords, pair_j, pair_i, pair_d in _image_pairs(latt.matrix, structure.frac_coords, r):
+        nnsite = None
+        last_j = -1
+        for j, i, d in zip(indices[pair_j], pair_i, pair_d):
+            if j != last_j:
+                nnsite = PeriodicSite(
+                    structure[j].specie,
+                    coords[j],
+                    latt,
+                    properties=structure[j].properties,
+                    coords_are_cartesian=True,
+                )
+                last_j = j
+            item = (nnsite, d, j, image) if include_index else (nnsite, d)
+            neighbors[i].append(item)
     return neighbors
 
 
-def create_halo(structure: Structure, neighbours: list[list[tuple]]) -> tuple[Structure, list[list[int]]]:
-    """Take a pymatgen structure object and set up a halo by making a 3x3x3 supercell.
-    
+class VerletList:
+    """Neighbour list state that is reused between calls on slightly displaced structures.
+
+    Candidate neighbours are found out to rcut + skin. While no site has moved
+    more than skin / 2 (minimum image) since the list was built, later calls only
+    recompute and filter the candidate pair distances instead of searching all
+    lattice images again. The list is rebuilt when the lattice, species, number
+    of sites or cut-off change, or the displacement exceeds the skin.
+    Suitable for MD snapshots and relaxation steps of one structure.
+    """
+
+    def __init__(self, skin: float = 0.3) -> None:
+        """Initialise an empty Verlet list.
+
+        Args:
+            skin: Extra distance beyond the cut-off used when building the list.
+
+        Raises:
+            ValueError: If skin is negative.
+        """
+        if skin < 0:
+            raise ValueError(f"Verlet skin must be non-negative, got {skin}")
+        self.skin = skin
+        self.rcut: float | None = None
+        self.n_builds = 0
+        self.n_reuses = 0
+        self._matrix: npt.NDArray[np.floating] | None = None
+        self._species: list[str] | None = None
+        self._ref_frac: npt.NDArray[np.floating] | None = None
+        self._pair_i: npt.NDArray[np.int_] | None = None
+        self._pair_j: npt.NDArray[np.int_] | None = None
+        self._pair_images: npt.NDArray[np.int_] | None = None
+
+    def max_displacement(self, structure: Structure) -> float:
+        """Return the largest minimum-image site displacement since the last build."""
+        return self._max_displacement(structure.frac_coords)
+
+    def _max_displacement(self, frac_coords: npt.NDArray[np.floating]) -> float:
+        if self._ref_frac is None or self._matrix is None or len(frac_coords) == 0:
+            return 0.0
+        delta = frac_coords - self._ref_frac
+        delta -= np.round(delta)
+        return float(np.max(np.linalg.norm(np.dot(delta, self._matrix), axis=1)))
+
+    def needs_rebuild(self, structure: Structure, r: float) -> bool:
+        """Check whether the candidate list is still valid for structure and r."""
+        return self._needs_rebuild(
+            structure.lattice.matrix,
+            structure.frac_coords,
+            [site.species_string for site in structure],
+            r,
+        )
+
+    def _needs_rebuild(
+        self,
+        matrix: npt.NDArray[np.floating],
+        frac_coords: npt.NDArray[np.floating],
+        species: list[str],
+        r: float,
+    ) -> bool:
+        if self._ref_frac is None or self._matrix is None or self.rcut != r:
+            return True
+        if len(frac_coords) != len(self._ref_frac):
+            return True
+        if not np.allclose(matrix, self._matrix):
+            return True
+        if list(species) != self._species:
+            return True
+        return 2 * self._max_displacement(frac_coords) > self.skin
+
+    def build(self, structure: Structure, r: float) -> None:
+        """Search all candidate neighbours of structure out to r + skin."""
+        self._build(
+            structure.lattice.matrix,
+            structure.frac_coords,
+            [site.species_string for site in structure],
+            r,
+        )
+
+    def _build(
+        self,
+        matrix: npt.NDArray[np.floating],
+        frac_coords: npt.NDArray[np.floating],
+        species: list[str],
+        r: float,
+    ) -> None:
+        pair_i, pair_j, pair_images, _ = neighbour_pairs(matrix, frac_coords, r + self.skin)
+        self._pair_i = pair_i
+        self._pair_j = pair_j
+        self._pair_images = pair_images
+        self._ref_frac = np.array(frac_coords, dtype=np.float64)
+        self._matrix = np.array(matrix, dtype=np.float64)
+        self._species = list(species)
+        self.rcut = r
+        self.n_builds += 1
+
+    def pairs(
+        self,
+        matrix: npt.ArrayLike,
+        frac_coords: npt.ArrayLike,
+        species: list[str],
+        r: float,
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.floating]]:
+        """Get the neighbours of each site out to r, in the format of neighbour_pairs.
+
+        Args:
+            matrix: 3x3 lattice matrix (rows are lattice vectors).
+            frac_coords: Fractional coordinates of the sites.
+            species: Species string of each site.
+            r: Radius of sphere.
+
+        Returns:
+            Tuple of pair_i, pair_j, images and distances (see neighbour_pairs).
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        frac_coords = np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3)
+        if self._needs_rebuild(matrix, frac_coords, species, r):
+            self._build(matrix, frac_coords, species, r)
+        else:
+            self.n_reuses += 1
+        assert self._ref_frac is not None and self._pair_images is not None
+
+        fcoords_in_cell = np.mod(frac_coords, 1)
+        # Sites that crossed a cell boundary since the build shift the image of the pair.
+        wraps_i = np.round(frac_coords - self._ref_frac).astype(int)
+        wraps_j = np.round(fcoords_in_cell - np.mod(self._ref_frac, 1)).astype(int)
+        pair_i = self._pair_i
+        pair_j = self._pair_j
+        images = self._pair_images - wraps_j[pair_j] + wraps_i[pair_i]
+
+        vectors = np.dot(fcoords_in_cell[pair_j] + images - frac_coords[pair_i], matrix)
+        dists = np.linalg.norm(vectors, axis=1)
+        within_r = np.flatnonzero((dists <= r) & (dists > 1e-8))
+        return pair_i[within_r], pair_j[within_r], images[within_r], dists[within_r]
+
+    def get_neighbors(self, structure: Structure, r: float, include_index: bool = False) -> list[list[tuple]]:
+        """Get neighbours for each site out to r, in the format of get_all_neighbors_and_image.
+
+        Args:
+            structure: Pymatgen Structure object.
+            r: Radius of sphere.
+            include_index: Whether to include the non-supercell site in the returned data.
+
+        Returns:
+            A list of a list of nearest neighbors for each site, i.e.,
+            [[(site, dist, index, image) ...], ..]. Index only supplied if include_index = True.
+        """
+        latt = structure.lattice
+        pair_i, pair_j, images, dists = self.pairs(
+            latt.matrix, structure.frac_coords, [site.species_string for site in structure], r
+        )
+        fcoords_in_cell = np.mod(structure.frac_coords, 1)
+
+        neighbors: list[list[tuple]] = [list() for _ in range(len(structure))]
+        nnsites: dict[tuple, PeriodicSite] = {}
+        for pair in range(len(pair_i)):
+            i = int(pair_i[pair])
+            j = int(pair_j[pair])
+            image = tuple(int(x) for x in images[pair])
+            nnsite = nnsites.get((j, image))
+            if nnsite is None:
+                nnsite = PeriodicSite(
+                    structure[j].specie,
+                    latt.get_cartesian_coords(fcoords_in_cell[j] + image),
+                    latt,
+                    properties=structure[j].properties,
+                    coords_are_cartesian=True,
+                )
+                nnsites[(j, image)] = nnsite
+            item = (nnsite, dists[pair], j, image) if include_index else (nnsite, dists[pair])
+            neighbors[i].append(item)
+        return neighbors
+
+
+def minimum_halo(structure: Structure, rcut: float) -> tuple[int, int, int]:
+    """Return the smallest halo that correctly represents the connectivity of structure.
+
+    Along each lattice vector the halo needs 2 * m + 1 images, where m is the
+    largest image offset of any neighbour within rcut. An axis no connection
+    crosses needs a single image, e.g. (3, 3, 1) for a slab with vacuum along c.
+
+    Args:
+        structure: Pymatgen Structure object.
+        rcut: Cut-off radii for node-node connections.
+
+    Returns:
+        Number of images (n_x, n_y, n_z) along each lattice vector.
+    """
+    _, _, images, _ = neighbour_pairs(structure.lattice.matrix, structure.frac_coords, rcut)
+    n_x, n_y, n_z = (2 * _max_image(images) + 1).tolist()
+    return (n_x, n_y, n_z)
+
+
+def halo_neighbours(
+    neighbours: list[list[tuple]],
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> list[list[int]]:
+    """Map the neighbours of the unit cell sites onto every site of the halo supercell.
+
+    Image (x, y, z) of unit cell site i has index n_images * i + (x * n_y + y) * n_z + z
+    in the supercell, where n_images = n_x * n_y * n_z, and neighbour images
+    wrap around the halo. Only index arithmetic is used, so no supercell
+    Structure is built.
+
+    Args:
+        neighbours: List of neighbours for sites in the unit cell (from get_all_neighbors_and_image).
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector. Use
+            minimum_halo to find the smallest halo that is correct for a structure.
+
+    Returns:
+        List of neighbour indices for every site in the supercell.
+
+    Raises:
+        ValueError: If halo is not three positive integers.
+    """
+    flat = [neighbour for site_neighbours in neighbours for neighbour in site_neighbours]
+    return _halo_neighbours_from_pairs(
+        len(neighbours),
+        np.repeat(np.arange(len(neighbours), dtype=np.int64), [len(n) for n in neighbours]),
+        np.array([neighbour[2] for neighbour in flat], dtype=np.int64),
+        np.array([neighbour[3] for neighbour in flat], dtype=np.int64).reshape(-1, 3),
+        halo,
+    )
+
+
+def create_halo(
+    structure: Structure,
+    neighbours: list[list[tuple]],
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> tuple[Structure, list[list[int]]]:
+    """Take a pymatgen structure object and set up a halo by making a supercell (3x3x3 by default).
+
+    Only needed when the supercell coordinates are wanted: the graph pipeline
+    builds the halo from halo_neighbours and halo_sites without a supercell.
+
     Args:
         structure: Pymatgen Structure object.
         neighbours: List of neighbours for sites in structure (from get_all_neighbors_and_image).
-    
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector. Use
+            minimum_halo to find the smallest halo that is correct for a structure.
+
     Returns:
         Tuple containing:
-            - structure: 3x3x3 supercell pymatgen Structure object.
+            - structure: Supercell pymatgen Structure object, with sites numbered
+              as in halo_neighbours.
             - neighbours: New list of neighbours for sites in supercell structure.
+
+    Raises:
+        ValueError: If halo is not three positive integers.
     """
-    if dist is None:
-        shift_func = _python_shift_index
-    else:
-        shift_func = dist.shift_index
-        
-    x = 3
-    y = 3
-    z = 3
-    
-    no_sites = len(structure.sites)
-    new_neighbours: list[list[int]] = []
-    for i in range(no_sites):
-        new_neighbours.append([
-            shift_func((27 * neighbour[2]), neighbour[3])
-            for neighbour in neighbours[i]
-        ])
-    
-    uc_index = [((site * 27)) for site in range(len(structure.sites))]
-    structure.make_supercell([x, y, z])
-    neighbours_mapped = map_index(new_neighbours, uc_index, x, y, z)
-    
+    neighbours_mapped = halo_neighbours(neighbours, halo)
+    structure.make_supercell(list(_check_halo(halo)))
     return structure, neighbours_mapped
 
-def nodes_from_structure(structure: Structure, rcut: float, get_halo: bool = False) -> set[Node]:
-    """Take a pymatgen structure object and convert to Nodes for interrogation."""
-    working_structure = deepcopy(structure)
-    working_structure.add_site_property(
-        "UC_index", [str(i) for i in range(len(working_structure.sites))]
-    )
-    neighbours = get_all_neighbors_and_image(working_structure, rcut, include_index=True)
-    nodes: list[Node] = []
-    
-    no_nodes = len(working_structure.sites)
-    if get_halo == True:
-        working_structure, neighbours_mapped = create_halo(working_structure, neighbours)
-        uc_index = set([((index * 27) + 13) for index in range(no_nodes)])
-    else:
-        uc_index = set(range(no_nodes))
-        neighbours_temp: list[list[int]] = []
-        for index, neigh in enumerate(neighbours):
-            neighbours_temp.append([neigh_ind[2] for neigh_ind in neigh])
-        neighbours_mapped = neighbours_temp
-    
-    append = nodes.append
-    
-    for index, site in enumerate(working_structure.sites):
-        if index in uc_index:
-            halo_node = False
-        else:
-            halo_node = True
-        node_neighbours_ind = set(neighbours_mapped[index])
-        append(
-            Node(
-                index=index,
-                element=site.species_string,
-                uc_index=int(site.properties["UC_index"]),
-                is_halo=halo_node,
-                neighbours_ind=node_neighbours_ind,
-            )
-        )
-    
-    for node in nodes:
-        node.neighbours = set()
-        for neighbour_ind in node.neighbours_ind:
-            node.neighbours.add(nodes[neighbour_ind])
-    
-    return set(nodes)
+def nodes_from_structure(
+    structure: Structure,
+    rcut: float,
+    get_halo: bool = False,
+    verlet: VerletList | None = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> set[Node]:
+    """Take a pymatgen structure object and convert to Nodes for interrogation.
 
-def set_fort_nodes(nodes: set[Node]) -> None:
-    """Set up a copy of the nodes and the neighbour indices in the tort.f90 Fortran module.
-    
-    This allows access if using the Fortran tortuosity routines.
-    
     Args:
-       nodes: Set of Node objects to set up in Fortran module.
-       
-    Sets:
-       tort.tort_mod.nodes: Allocates space to hold node indices for full graph.
-       tort.tort_mod.uc_tort: Allocates space to hold unit cell node tortuosity for full graph.
-       
-    Raises:
-        FortranNotAvailableError: If Fortran extensions are not available.
+        structure: Pymatgen Structure object.
+        rcut: Cut-off radii for node-node connections.
+        get_halo: Whether to build the halo of periodic images.
+        verlet: Optional VerletList to reuse neighbours from a previous call.
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the
+            halo. The unit cell nodes are the central image.
+
+    Returns:
+        Set of Node objects.
     """
-    if tort is None:
-        raise FortranNotAvailableError()
-    
-    tort.tort_mod.allocate_nodes(
-        len(nodes), len([node for node in nodes if node.is_halo == False])
+    return nodes_from_arrays(
+        structure.lattice.matrix,
+        structure.frac_coords,
+        [site.species_string for site in structure],
+        rcut,
+        get_halo=get_halo,
+        verlet=verlet,
+        halo=halo,
     )
-    for node in nodes:
-        tort.tort_mod.set_neighbours(
-            node.index,
-            node.uc_index,
-            len(node.neighbours_ind),
-            [ind for ind in node.neighbours_ind],
-        )
 
 
 def clusters_from_file(filename: str,
         rcut: float,
-        elements: set[str]) -> set[Cluster]:
+        elements: set[str],
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> set[Cluster]:
     structure = Structure.from_file(filename)
     return clusters_from_structure(
         structure=structure,
         rcut=rcut,
-        elements=elements
+        elements=elements,
+        halo=halo,
     )
 
 
-def clusters_from_structure(structure: Structure, rcut: float, elements: set[str]) -> set[Cluster]:
+def clusters_from_structure(
+    structure: Structure,
+    rcut: float,
+    elements: set[str],
+    verlet: VerletList | None = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> set[Cluster]:
     """Take a pymatgen structure and convert it to a graph object.
     
     Args:
         structure: Pymatgen structure object to set up graph from.
         rcut: Cut-off radii for node-node connections in forming clusters.
         elements: Set of element strings to include in setting up graph.
+        verlet: Optional VerletList to reuse neighbours from a previous call
+            (e.g. the previous frame of a trajectory).
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the
+            halo (see create_halo and minimum_halo).
         
     Returns:
         Set of clusters.
     """
-    working_structure = filter_structure_by_species(structure, list(elements))
-    folded_structure = Structure.from_sites(working_structure.sites, to_unit_cell=True)
-    nodes = nodes_from_structure(folded_structure, rcut, get_halo=True)
-    set_fort_nodes(nodes)
-    clusters = clusters_from_nodes(nodes)
-    return clusters
-
-def graph_from_structure(structure: Structure, rcut: float, elements: set[str]) -> Graph:
+    with stage("structure_filter"):
+        keep = _species_mask(structure, list(elements))
+        lattice = structure.lattice
+        frac_coords = structure.frac_coords[keep]
+        # Fold the kept sites into the unit cell along the periodic directions.
+        frac_coords = np.where(lattice.pbc, np.mod(frac_coords, 1), frac_coords)
+        species = [site.species_string for site, kept in zip(structure, keep) if kept]
+    nodes = nodes_from_arrays(
+        lattice.matrix, frac_coords, species, rcut, get_halo=True, verlet=verlet, halo=halo
+    )
+    return _clusters_from_halo_nodes(nodes, halo)
+
+def graph_from_structure(
+    structure: Structure,
+    rcut: float,
+    elements: set[str],
+    verlet: VerletList | None = None,
+    halo: tuple[int, int, int] = DEFAULT_HALO,
+) -> Graph:
     """Create a graph from a pymatgen structure.
     
     Creates a Graph object containing clusters of connected nodes and a filtered
@@ -328,22 +423,33 @@ def graph_from_structure(structure: Structure, rcut: float, elements: set[str])
         structure: Pymatgen Structure object to create graph from.
         rcut: Cutoff radius for node-node connections in forming clusters.
         elements: Set of element strings to include in the graph.
+        verlet: Optional VerletList to reuse neighbours from a previous call
+            (e.g. the previous frame of a trajectory).
+        halo: Number of images (n_x, n_y, n_z) along each lattice vector in the
+            halo (see create_halo and minimum_halo).
         
     Returns:
-        Graph object containing clusters and filtered structure.
+        Graph object containing clusters and filtered structure. If called inside
+        a profiling.profile_stages() block, graph.profile holds the per-stage report.
         
     Example:
         >>> structure = Structure(lattice, ["Li", "Mg", "O"], coords)
         >>> graph = graph_from_structure(structure, 3.0, {"Li", "O"})
         >>> graph.clusters  # Clusters containing only Li and O sites
     """
-    clusters = clusters_from_structure(structure, rcut, elements)
-    filtered_structure = filter_structure_by_species(structure, list(elements))
-    return Graph(clusters=clusters, structure=filtered_structure)
+    clusters = clusters_from_structure(structure, rcut, elements, verlet=verlet, halo=halo)
+    with stage("structure_filter"):
+        filtered_structure = filter_structure_by_species(structure, list(elements))
+    graph = Graph(clusters=clusters, structure=filtered_structure)
+    graph.profile = active_profile()
+    return graph
 
-def graph_from_file(filename: str, rcut: float, elements: set[str]) -> Graph:
+def graph_from_file(filename: str,
+        rcut: float,
+        elements: set[str],
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> Graph:
     structure = Structure.from_file(filename)
-    return graph_from_structure(structure, rcut, elements)
+    return graph_from_structure(structure, rcut, elements, halo=halo)
     
 def filter_structure_by_species(structure: Structure, species_list: list[str]) -> Structure:
     """Filter structure to keep only specified species.
@@ -367,13 +473,47 @@ def filter_structure_by_species(structure: Structure, species_list: list[str]) -
         >>> filtered_structure = filter_structure_by_species(structure, ["Li", "O"])
         >>> filtered_structure.symbol_set  # {"Li", "O"}
     """
+    keep = _species_mask(structure, species_list)
+    return Structure.from_sites(
+        [site for site, kept in zip(structure, keep) if kept],
+        properties=structure.properties,
+    )
+
+
+def _species_mask(structure: Structure, species_list: list[str]) -> npt.NDArray[np.bool_]:
+    """Return a mask of the sites of structure with species in species_list.
+
+    Raises:
+        ValueError: If species_list is empty.
+        ValueError: If species_list contains elements not present in the structure.
+    """
     if not species_list:
         raise ValueError("species_list cannot be empty")
     invalid_species = [spec for spec in species_list if spec not in structure.symbol_set]
     if invalid_species:
         raise ValueError(f"Species {invalid_species} not found in structure")
-        
-    filtered_structure = deepcopy(structure)
-    species_to_remove = [spec for spec in structure.symbol_set if spec not in species_list]
-    filtered_structure.remove_species(species_to_remove)    
-    return filtered_structure
\ No newline at end of file
+
+    return element_mask(structure, set(species_list))
+
+
+def element_mask(structure: Structure, elements: set[str]) -> npt.NDArray[np.bool_]:
+    """Return a mask of the sites of structure containing any element in elements.
+
+    Sites are matched by element symbol, so oxidation-state decorated species
+    (e.g. "Li+") match their element ("Li"). This is the rule graphs are built
+    with, so code that predicts or reuses graphs should select sites with it.
+
+    Args:
+        structure: Pymatgen Structure.
+        elements: Set of element symbols.
+
+    Returns:
+        Boolean array with one entry per site.
+    """
+    return np.array(
+        [
+            any(element.symbol in elements for element in site.species.elements)
+            for site in structure
+        ],
+        dtype=bool,
+    )
@@ -0,0 +1,339 @@
+"""Host lattice neighbour topology that can be shared between worker processes.
+
+Doping ensembles and other screens over one host lattice only change which
+species sit on which sites, so the neighbour search of the host is the same
+for every configuration. NeighbourTopology stores that search once, in
+compressed sparse row (CSR) form, and builds the graph of any species
+assignment by masking it. The arrays can be placed in shared memory
+(NeighbourTopology.share) or an uncompressed .npz file (NeighbourTopology.save)
+and attached by worker processes without copying, so N workers hold one copy
+of the topology instead of N.
+
+Example:
+    >>> topology = NeighbourTopology.from_arrays(lattice, frac_coords, 4.0)
+    >>> with topology.share() as shared:
+    ...     with ProcessPoolExecutor(initializer=init, initargs=(shared,)) as executor:
+    ...         ...  # each worker calls shared.attach() once
+"""
+
+import os
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from crystal_torture.array_interface import (
+    _clusters_from_halo_nodes,
+    _graph_results,
+    _species_mask,
+    neighbour_pairs,
+    nodes_from_pairs,
+)
+from crystal_torture.cluster import DEFAULT_HALO, Cluster
+from crystal_torture.graph import Graph
+from crystal_torture.profiling import active_profile, stage
+
+if TYPE_CHECKING:
+    from pymatgen.core import Structure
+
+# Arrays held by a NeighbourTopology, in the order they are laid out in shared memory.
+TOPOLOGY_ARRAYS = ("matrix", "frac_coords", "indptr", "indices", "images")
+
+
+class NeighbourTopology:
+    """Neighbours of every site of a host lattice, in CSR form.
+
+    The neighbours of site i are indices[indptr[i]:indptr[i + 1]], each in the
+    lattice image given by the matching row of images.
+    """
+
+    def __init__(self,
+        matrix: npt.NDArray[np.floating],
+        frac_coords: npt.NDArray[np.floating],
+        indptr: npt.NDArray[np.int64],
+        indices: npt.NDArray[np.int64],
+        images: npt.NDArray[np.int64],
+        rcut: float) -> None:
+        """Initialise a topology from its arrays (usually via from_arrays).
+
+        Args:
+            matrix: 3x3 lattice matrix (rows are lattice vectors).
+            frac_coords: Fractional coordinates (n x 3) of the sites, wrapped into the cell.
+            indptr: Offsets (n + 1) of each site's neighbours in indices.
+            indices: Index of each neighbouring site in the unit cell.
+            images: Lattice image (m x 3) of each neighbour.
+            rcut: Cut-off radius the neighbours were found with.
+        """
+        self.matrix = matrix
+        self.frac_coords = frac_coords
+        self.indptr = indptr
+        self.indices = indices
+        self.images = images
+        self.rcut = rcut
+        # Shared memory block the arrays are views of, kept open while they are used.
+        self._shm: shared_memory.SharedMemory | None = None
+
+    @classmethod
+    def from_arrays(cls,
+        matrix: npt.ArrayLike,
+        frac_coords: npt.ArrayLike,
+        rcut: float) -> 'NeighbourTopology':
+        """Run the neighbour search of a host lattice.
+
+        Args:
+            matrix: 3x3 lattice matrix (rows are lattice vectors).
+            frac_coords: Fractional coordinates (n x 3) of every host site.
+            rcut: Cut-off radius for node-node connections.
+
+        Returns:
+            The host NeighbourTopology.
+        """
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        frac_coords = np.mod(np.asarray(frac_coords, dtype=np.float64).reshape(-1, 3), 1)
+        with stage("neighbour_search"):
+            pair_i, pair_j, images, _ = neighbour_pairs(matrix, frac_coords, rcut)
+        indptr = np.zeros(len(frac_coords) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_i, minlength=len(frac_coords)), out=indptr[1:])
+        return cls(
+            matrix,
+            frac_coords,
+            indptr,
+            np.asarray(pair_j, dtype=np.int64),
+            np.asarray(images, dtype=np.int64).reshape(-1, 3),
+            rcut,
+        )
+
+    @classmethod
+    def from_structure(cls, structure: 'Structure', rcut: float) -> 'NeighbourTopology':
+        """Run the neighbour search of a pymatgen host structure.
+
+        Args:
+            structure: Host pymatgen Structure. Its species are not stored.
+            rcut: Cut-off radius for node-node connections.
+
+        Returns:
+            The host NeighbourTopology.
+        """
+        return cls.from_arrays(structure.lattice.matrix, structure.frac_coords, rcut)
+
+    @property
+    def no_sites(self) -> int:
+        """Number of host sites."""
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the topology arrays in bytes."""
+        return sum(getattr(self, name).nbytes for name in TOPOLOGY_ARRAYS)
+
+    def pairs(
+        self, keep: npt.NDArray[np.bool_] | None = None
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """Return the neighbour pairs, optionally between a subset of the sites only.
+
+        Args:
+            keep: Mask of the sites to keep. Kept sites are renumbered in order.
+
+        Returns:
+            Tuple of pair_i, pair_j and images as returned by neighbour_pairs.
+        """
+        pair_i = np.repeat(np.arange(self.no_sites, dtype=np.int64), np.diff(self.indptr))
+        if keep is None:
+            return pair_i, np.asarray(self.indices), np.asarray(self.images)
+        keep = np.asarray(keep, dtype=bool)
+        selected = keep[pair_i] & keep[self.indices]
+        new_index = np.cumsum(keep, dtype=np.int64) - 1
+        return (
+            new_index[pair_i[selected]],
+            new_index[self.indices[selected]],
+            np.asarray(self.images)[selected],
+        )
+
+    def clusters(self,
+        species: npt.ArrayLike,
+        elements: set,
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> set[Cluster]:
+        """Set up the clusters of the sites with species in elements.
+
+        Equivalent to array_interface.clusters_from_arrays on the host lattice
+        with these species, without repeating the neighbour search.
+
+        Args:
+            species: Species of each host site, as strings or integer codes.
+            elements: Set of species (of the same kind as species) to include.
+            halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+        Returns:
+            Set of clusters.
+
+        Raises:
+            ValueError: If species does not have one entry per host site.
+            ValueError: If elements is empty or contains species not present in species.
+        """
+        species = np.asarray(species)
+        if len(species) != self.no_sites:
+            raise ValueError(
+                f"Expected species for {self.no_sites} sites, got {len(species)}"
+            )
+        with stage("structure_filter"):
+            keep = _species_mask(species, elements)
+            pair_i, pair_j, images = self.pairs(keep)
+        nodes = nodes_from_pairs(species[keep], pair_i, pair_j, images, get_halo=True, halo=halo)
+        return _clusters_from_halo_nodes(nodes, halo)
+
+    def graph(self,
+        species: npt.ArrayLike,
+        elements: set,
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> Graph:
+        """Create a graph (without a structure) of the sites with species in elements.
+
+        Args:
+            species: Species of each host site, as strings or integer codes.
+            elements: Set of species (of the same kind as species) to include.
+            halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+        Returns:
+            Graph object containing the clusters, as for graph_from_arrays.
+        """
+        graph = Graph(clusters=self.clusters(species, elements, halo=halo))
+        graph.profile = active_profile()
+        return graph
+
+    def analyse(self,
+        species: npt.ArrayLike,
+        elements: set,
+        torture: bool = True,
+        halo: tuple[int, int, int] = DEFAULT_HALO) -> dict[str, npt.NDArray | float]:
+        """Run the graph pipeline for one species assignment of the host lattice.
+
+        Args:
+            species: Species of each host site, as strings or integer codes.
+            elements: Set of species (of the same kind as species) to include.
+            torture: Whether to calculate tortuosity for periodic clusters.
+            halo: Number of images (n_x, n_y, n_z) along each lattice vector in the halo.
+
+        Returns:
+            Dict of results, as for analyse_arrays.
+        """
+        species = np.asarray(species)
+        return _graph_results(self.graph(species, elements, halo=halo), species, elements, torture)
+
+    def share(self) -> 'SharedTopology':
+        """Copy the topology into a new shared memory block.
+
+        The returned handle is small and picklable; pass it to worker processes
+        and call SharedTopology.attach there. The calling process owns the block
+        and must release it with SharedTopology.unlink (or a with block).
+
+        Returns:
+            Handle to the shared topology.
+        """
+        layout = {}
+        offset = 0
+        for name in TOPOLOGY_ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            layout[name] = (offset, array.shape, array.dtype.str)
+            # Keep each array 8-byte aligned.
+            offset += -(-array.nbytes // 8) * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shared = SharedTopology(shm.name, layout, self.rcut)
+        shared._shm = shm
+        for name, array in shared._views(shm).items():
+            array[...] = getattr(self, name)
+        return shared
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save the topology to an uncompressed .npz file that load can memory-map.
+
+        Args:
+            path: File to write. NumPy appends .npz if the name has no suffix.
+        """
+        np.savez(
+            path,
+            rcut=np.array(self.rcut),
+            **{name: getattr(self, name) for name in TOPOLOGY_ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, mmap: bool = True) -> 'NeighbourTopology':
+        """Load a topology saved by save.
+
+        Args:
+            path: .npz file to read.
+            mmap: Whether to memory-map the arrays (read-only), so processes
+                loading the same file share its pages.
+
+        Returns:
+            The loaded NeighbourTopology.
+        """
+        from crystal_torture.graph_io import load_arrays
+
+        arrays = load_arrays(path, mmap=mmap)
+        return cls(
+            *(arrays[name] for name in TOPOLOGY_ARRAYS), rcut=float(arrays["rcut"])
+        )
+
+
+class SharedTopology:
+    """Picklable handle to a NeighbourTopology held in shared memory."""
+
+    def __init__(self,
+        name: str,
+        layout: dict[str, tuple[int, tuple[int, ...], str]],
+        rcut: float) -> None:
+        """Initialise a handle (created by NeighbourTopology.share).
+
+        Args:
+            name: Name of the shared memory block.
+            layout: Array name to (byte offset, shape, dtype string) in the block.
+            rcut: Cut-off radius the neighbours were found with.
+        """
+        self.name = name
+        self.layout = layout
+        self.rcut = rcut
+        # Block created by share, only set in the owning process.
+        self._shm: shared_memory.SharedMemory | None = None
+
+    def __getstate__(self) -> dict:
+        return {"name": self.name, "layout": self.layout, "rcut": self.rcut, "_shm": None}
+
+    def _views(self, shm: shared_memory.SharedMemory) -> dict[str, npt.NDArray]:
+        """Return the topology arrays as views of the shared memory block."""
+        return {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, shape, dtype) in self.layout.items()
+        }
+
+    def attach(self) -> NeighbourTopology:
+        """Attach to the shared memory block without copying the arrays.
+
+        The block stays mapped for as long as the returned topology is alive.
+
+        Returns:
+            NeighbourTopology whose arrays are views of the shared memory.
+        """
+        shm = shared_memory.SharedMemory(name=self.name)
+        views = self._views(shm)
+        for array in views.values():
+            array.flags.writeable = False
+        topology = NeighbourTopology(*(views[name] for name in TOPOLOGY_ARRAYS), rcut=self.rcut)
+        topology._shm = shm
+        return topology
+
+    def unlink(self) -> None:
+        """Release the shared memory block (owning process only).
+
+        Topologies already attached in other processes keep their mapping
+        until they are garbage collected.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> 'SharedTopology':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.unlink()
@@ -30,8 +30,56 @@ IMPLICIT NONE
 
   INTEGER,ALLOCATABLE,DIMENSION(:):: uc_tort
 
+  ! OpenMP settings applied to the torture parallel loop:
+  !    omp_threads(int): number of threads (0 = OpenMP default)
+  !    omp_schedule_kind(int): 1=static, 2=dynamic, 3=guided, 4=auto
+  !    omp_chunk_size(int): chunk size (0 = OpenMP default)
+  INTEGER:: omp_threads = 0
+  INTEGER:: omp_schedule_kind = 1
+  INTEGER:: omp_chunk_size = 0
+
 CONTAINS
 
+     SUBROUTINE set_omp_threads(n)
+     ! Set the number of OpenMP threads used by the torture routine
+     ! Args:
+     !     n(int): number of threads (0 or less restores the OpenMP default)
+
+        INTEGER, INTENT(IN)::n
+
+        omp_threads = MAX(n,0)
+
+     END SUBROUTINE set_omp_threads
+
+     INTEGER FUNCTION get_omp_threads()
+     ! Number of OpenMP threads the torture routine will use (1 without OpenMP)
+
+        get_omp_threads = 1
+        !$ get_omp_threads = omp_get_max_threads()
+        !$ IF (omp_threads > 0) get_omp_threads = omp_threads
+
+     END FUNCTION get_omp_threads
+
+     SUBROUTINE set_omp_schedule(kind,chunk)
+     ! Set the OpenMP loop schedule used by the torture routine
+     ! Args:
+     !     kind(int): 1=static, 2=dynamic, 3=guided, 4=auto
+     !     chunk(int): chunk size (0 = OpenMP default)
+
+        INTEGER, INTENT(IN)::kind,chunk
+
+        omp_schedule_kind = kind
+        omp_chunk_size = MAX(chunk,0)
+
+     END SUBROUTINE set_omp_schedule
+
+     SUBROUTINE apply_omp_schedule
+     ! Make the stored schedule the runtime schedule of the calling thread
+
+        !$ call omp_set_schedule(INT(omp_schedule_kind,omp_sched_kind),omp_chunk_size)
+
+     END SUBROUTINE apply_omp_schedule
+
      SUBROUTINE allocate_nodes(n,n2)
      ! Allocate the space for the nodes and to store the
      ! unit cell node tortuosity
@@ -164,6 +212,72 @@ CONTAINS
         END DO
      END SUBROUTINE shut_down_queue
 
+     SUBROUTINE torture_node(root_node)
+     ! Perform tortuosity analysis from a single unit cell node using a BFS,
+     ! stopping when the first periodic image of the node is reached
+     ! Args:
+     !      root_node(int): index of the unit cell node to torture
+     ! Sets:
+     !   uc_tort(uc_index): the tortuosity of the unit cell node
+
+        INTEGER,INTENT(IN):: root_node
+
+        TYPE(queued_node), POINTER:: stack_head, stack_tail
+        TYPE(queued_node), POINTER:: visited_head, visited_tail
+        INTEGER:: current_node, neigh, uc_index, next_dist
+
+        INTEGER,DIMENSION(LBOUND(nodes,1):UBOUND(nodes,1))::dist,visited
+
+        dist(:) = 0
+        visited(:)=0          
+        
+        call initialise_queue(stack_head,stack_tail)
+        call initialise_queue(visited_head,visited_tail)
+      
+        stack_head%node_index = root_node
+
+        uc_index = nodes(root_node)%uc_index
+
+         DO neigh=1,SIZE(nodes(stack_head%node_index)%neigh_ind)
+            dist(nodes(stack_head%node_index)%neigh_ind(neigh)) = 1
+            call enqueue_node(stack_tail,nodes(stack_head%node_index)%neigh_ind(neigh))
+
+        END DO
+        visited(root_node)=1
+        call dequeue_node(stack_head)
+         
+
+        DO WHILE (ASSOCIATED(stack_head))
+           
+           next_dist = dist(stack_head%node_index) + 1
+           current_node = stack_head%node_index
+           
+           IF (visited(current_node)==0) THEN
+             
+              DO neigh=1,SIZE(nodes(stack_head%node_index)%neigh_ind)
+                 if (dist(nodes(stack_head%node_index)%neigh_ind(neigh)) == 0) then
+                    dist(nodes(stack_head%node_index)%neigh_ind(neigh)) = next_dist
+                 END IF
+                 call enqueue_node(stack_tail,nodes(stack_head%node_index)%neigh_ind(neigh))
+              END DO 
+               visited(current_node) = 1
+                
+               IF (nodes(stack_head%node_index)%uc_index .EQ. uc_index) THEN
+                 uc_tort(uc_index) = next_dist - 1
+                 EXIT
+              END IF
+     
+
+           END IF
+           call dequeue_node(stack_head)
+            
+        END DO   
+        
+      
+        call shut_down_queue(stack_head)
+
+     END SUBROUTINE torture_node
+
      SUBROUTINE torture(n,uc_nodes)
      ! Perform tortuosity analysis on cluster using a BFS & OpenMP
      ! The nodes in the cluster are tortured in parallel until all
@@ -174,77 +288,52 @@ CONTAINS
      !      uc_nodes ([int]): array containing the indices of the unit cell nodes in the cluster
      ! Sets:
      !   uc_tort([int]: array containing the tortuosity for each unit cell node in cluster
-     
-    
 
         INTEGER,INTENT(IN):: n
         INTEGER,DIMENSION(n),INTENT(IN)::uc_nodes
 
-        TYPE(queued_node), POINTER:: stack_head, stack_tail
-        TYPE(queued_node), POINTER:: visited_head, visited_tail
-        INTEGER:: current_node, neigh, uc_node, uc_index, root_node, next_dist
-        LOGICAL::check
-
-        INTEGER,DIMENSION(size(NODES))::dist,visited
+        INTEGER:: uc_node, n_threads
   
+        n_threads = get_omp_threads()
+        call apply_omp_schedule()
+
         !loop over all unit cell nodes - with OpenMP
-        !$OMP PARALLEL DO private(uc_node,dist,stack_head,visited_head,stack_tail,visited)&
-        !$OMP& PRIVATE(visited_tail,root_node,uc_index,neigh,next_dist,current_node,check) &
-        !$OMP& SHARED(nodes,uc_nodes,uc_tort)
+        !$OMP PARALLEL DO SCHEDULE(RUNTIME) NUM_THREADS(n_threads) &
+        !$OMP& PRIVATE(uc_node) SHARED(nodes,uc_nodes,uc_tort)
         DO uc_node=1,n
-           dist(:) = 0
-           visited(:)=0          
-           
-           call initialise_queue(stack_head,stack_tail)
-           call initialise_queue(visited_head,visited_tail)
-         
-           stack_head%node_index = uc_nodes(uc_node)
+           call torture_node(uc_nodes(uc_node))
+        END DO
+      !$OMP END PARALLEL DO
 
-           root_node = uc_nodes(uc_node)
-           uc_index = nodes(root_node)%uc_index
+     END SUBROUTINE torture
 
-            DO neigh=1,SIZE(nodes(stack_head%node_index)%neigh_ind)
-               dist(nodes(stack_head%node_index)%neigh_ind(neigh)) = 1
-               call enqueue_node(stack_tail,nodes(stack_head%node_index)%neigh_ind(neigh))
+     SUBROUTINE torture_graph(n,uc_nodes)
+     ! Perform tortuosity analysis on all periodic clusters in a graph at once
+     ! The unit cell nodes of every cluster are shared between the threads
+     ! with dynamic scheduling, so that many small clusters (or a few nodes
+     ! with long searches) do not leave threads idle
+     ! Args:
+     !      n(int): total number of unit cell nodes in the periodic clusters
+     !      uc_nodes ([int]): array containing the indices of the unit cell nodes in the clusters
+     ! Sets:
+     !   uc_tort([int]: array containing the tortuosity for each unit cell node
 
-           END DO
-           visited(root_node)=1
-           call dequeue_node(stack_head)
-            
+        INTEGER,INTENT(IN):: n
+        INTEGER,DIMENSION(n),INTENT(IN)::uc_nodes
 
-           DO WHILE (ASSOCIATED(stack_head))
-              
-              next_dist = dist(stack_head%node_index) + 1
-              current_node = stack_head%node_index
-              
-              IF (visited(current_node)==0) THEN
-                
-                 DO neigh=1,SIZE(nodes(stack_head%node_index)%neigh_ind)
-                    if (dist(nodes(stack_head%node_index)%neigh_ind(neigh)) == 0) then
-                       dist(nodes(stack_head%node_index)%neigh_ind(neigh)) = next_dist
-                    END IF
-                    call enqueue_node(stack_tail,nodes(stack_head%node_index)%neigh_ind(neigh))
-                 END DO 
-                  visited(current_node) = 1
-                   
-                  IF (nodes(stack_head%node_index)%uc_index .EQ. uc_index) THEN
-                    uc_tort(uc_index) = next_dist - 1
-                    EXIT
-                 END IF
-        
+        INTEGER:: uc_node, n_threads, chunk
 
-              END IF
-              call dequeue_node(stack_head)
-               
-           END DO   
-           
-         
-           call shut_down_queue(stack_head)
+        n_threads = get_omp_threads()
+        chunk = MAX(omp_chunk_size,1)
 
-       END DO
-      !$OMP END PARALLEL DO
+        !$OMP PARALLEL DO SCHEDULE(DYNAMIC,chunk) NUM_THREADS(n_threads) &
+        !$OMP& PRIVATE(uc_node) SHARED(nodes,uc_nodes,uc_tort)
+        DO uc_node=1,n
+           call torture_node(uc_nodes(uc_node))
+        END DO
+        !$OMP END PARALLEL DO
 
-     END SUBROUTINE torture
+     END SUBROUTINE torture_graph
 
 
 
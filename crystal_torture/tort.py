@@ -3,77 +3,328 @@
 This module provides a Python interface to Fortran tortuosity analysis functions
 using ctypes to load compiled Fortran extensions. It falls back gracefully to
 Python-only implementations when Fortran extensions are not available.
+
+ctypes releases the GIL for the duration of each Fortran call, so other Python
+threads keep running while a graph is tortured. The Fortran module holds a
+single node graph and uc_tort array for the whole process, so every sequence
+of calls that uploads, tortures or reads that state is serialised with
+state_lock.
 """
 from __future__ import print_function, absolute_import, division
 import logging
 import ctypes
 import ctypes.util
+import sys
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from crystal_torture.exceptions import FortranNotAvailableError
 
 _tort_lib: ctypes.CDLL | None
 _FORT_AVAILABLE: bool
+tort_mod: 'Tort_Mod | None'
 
-# Try to load the compiled Fortran library using ctypes
-try:
-    # Find the library file
-    package_dir = Path(__file__).parent
-    
-    # Look for the extension (platform-specific naming)
+# The library is located and loaded on first use rather than at import, so
+# importing this module stays cheap. _tort_lib, _FORT_AVAILABLE and tort_mod
+# are provided through the module __getattr__ until then.
+_LAZY_ATTRIBUTES = ("_tort_lib", "_FORT_AVAILABLE", "tort_mod")
+_opened = False
+_loaded = False
+_load_lock = threading.RLock()
+
+# Serialises access to the node graph and tortuosity array held in the Fortran
+# module, which are shared by every thread in the process.
+state_lock = threading.RLock()
+
+# OpenMP loop schedules, with the omp_sched_kind values used by the Fortran kernels.
+SCHEDULES = {"static": 1, "dynamic": 2, "guided": 3, "auto": 4}
+
+
+def _find_library(package_dir: Path, stem: str) -> Path | None:
+    """Find a compiled extension library in package_dir (platform-specific naming)."""
     import platform
     if platform.system() == "Darwin":  # macOS
-        lib_patterns = ["_tort*.dylib", "_tort*.so"]
+        lib_patterns = [f"{stem}*.dylib", f"{stem}*.so"]
     elif platform.system() == "Windows":
-        lib_patterns = ["_tort*.dll", "_tort*.pyd"]
+        lib_patterns = [f"{stem}*.dll", f"{stem}*.pyd"]
     else:  # Linux and others
-        lib_patterns = ["_tort*.so"]
-    
-    lib_file = None
+        lib_patterns = [f"{stem}*.so"]
+
     for pattern in lib_patterns:
         lib_files = list(package_dir.glob(pattern))
         if lib_files:
             # Sort to get the most specific match first
             lib_files.sort(key=lambda x: len(x.name), reverse=True)
-            lib_file = lib_files[0]
-            break
-    
-    if lib_file and lib_file.exists():
-        # Load the library
-        _tort_lib = ctypes.CDLL(str(lib_file))
-        
-        # Define function signatures for our C interface
-        # void allocate_nodes(int n, int n2)
-        _tort_lib.allocate_nodes.argtypes = [ctypes.c_int, ctypes.c_int]
-        _tort_lib.allocate_nodes.restype = None
-        
-        # void tear_down()
-        _tort_lib.tear_down.argtypes = []
-        _tort_lib.tear_down.restype = None
-        
-        # void set_neighbours(int ind, int uc_ind, int n, int* neigh)
-        _tort_lib.set_neighbours.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
-        _tort_lib.set_neighbours.restype = None
-        
-        # void torture(int n, int* uc_nodes)
-        _tort_lib.torture.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
-        _tort_lib.torture.restype = None
-        
-        # int get_uc_tort(int index)
-        _tort_lib.get_uc_tort.argtypes = [ctypes.c_int]
-        _tort_lib.get_uc_tort.restype = ctypes.c_int
-        
-        # int get_uc_tort_size()
-        _tort_lib.get_uc_tort_size.argtypes = []
-        _tort_lib.get_uc_tort_size.restype = ctypes.c_int
-        
-        _FORT_AVAILABLE = True
-    else:
-        _tort_lib = None
-        _FORT_AVAILABLE = False
-        
-except Exception:
-    _tort_lib = None
-    _FORT_AVAILABLE = False
+            return lib_files[0]
+    return None
+
+
+def _open_library() -> None:
+    """Load the compiled Fortran tort library using ctypes, once.
+
+    Sets _tort_lib and _FORT_AVAILABLE, falling back gracefully to None/False
+    when the extension is not available.
+    """
+    global _tort_lib, _FORT_AVAILABLE, _opened
+    if _opened:
+        return
+    with _load_lock:
+        if _opened:
+            return
+        try:
+            lib_file = _find_library(Path(__file__).parent, "_tort")
+
+            if lib_file and lib_file.exists():
+                # Load the library
+                lib = ctypes.CDLL(str(lib_file))
+
+                # Define function signatures for our C interface
+                # void allocate_nodes(int n, int n2)
+                lib.allocate_nodes.argtypes = [ctypes.c_int, ctypes.c_int]
+                lib.allocate_nodes.restype = None
+
+                # void tear_down()
+                lib.tear_down.argtypes = []
+                lib.tear_down.restype = None
+
+                # void set_neighbours(int ind, int uc_ind, int n, int* neigh)
+                lib.set_neighbours.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+                lib.set_neighbours.restype = None
+
+                # void torture(int n, int* uc_nodes)
+                lib.torture.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+                lib.torture.restype = None
+
+                # void torture_graph(int n, int* uc_nodes)
+                lib.torture_graph.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+                lib.torture_graph.restype = None
+
+                # int get_uc_tort(int index)
+                lib.get_uc_tort.argtypes = [ctypes.c_int]
+                lib.get_uc_tort.restype = ctypes.c_int
+
+                # int get_uc_tort_size()
+                lib.get_uc_tort_size.argtypes = []
+                lib.get_uc_tort_size.restype = ctypes.c_int
+
+                # void set_num_threads(int n)
+                lib.set_num_threads.argtypes = [ctypes.c_int]
+                lib.set_num_threads.restype = None
+
+                # int get_num_threads()
+                lib.get_num_threads.argtypes = []
+                lib.get_num_threads.restype = ctypes.c_int
+
+                # int get_num_threads_setting()
+                lib.get_num_threads_setting.argtypes = []
+                lib.get_num_threads_setting.restype = ctypes.c_int
+
+                # void set_schedule(int kind, int chunk)
+                lib.set_schedule.argtypes = [ctypes.c_int, ctypes.c_int]
+                lib.set_schedule.restype = None
+
+                # int get_schedule_kind(), int get_chunk_size()
+                lib.get_schedule_kind.argtypes = []
+                lib.get_schedule_kind.restype = ctypes.c_int
+                lib.get_chunk_size.argtypes = []
+                lib.get_chunk_size.restype = ctypes.c_int
+
+                _tort_lib = lib
+                _FORT_AVAILABLE = True
+            else:
+                _tort_lib = None
+                _FORT_AVAILABLE = False
+
+        except Exception:
+            _tort_lib = None
+            _FORT_AVAILABLE = False
+
+        _opened = True
+
+
+def _load_library() -> None:
+    """Load the Fortran library and create the tort_mod wrapper instance, once."""
+    global tort_mod, _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if _loaded:
+            return
+        _open_library()
+        tort_mod = Tort_Mod() if _FORT_AVAILABLE else None
+        _loaded = True
+
+
+def __getattr__(name: str):
+    """Load the Fortran library on first access to its module attributes."""
+    if name in _LAZY_ATTRIBUTES:
+        _load_library()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _check_num_threads(n: int | None) -> int:
+    """Validate a thread count, returning 0 (the OpenMP default) for None."""
+    if n is None:
+        return 0
+    if int(n) < 1:
+        raise ValueError(f"Number of OpenMP threads must be at least 1, got {n}")
+    return int(n)
+
+
+def _check_schedule(kind: str, chunk_size: int) -> int:
+    """Validate a schedule name and chunk size, returning the omp_sched_kind value."""
+    if kind not in SCHEDULES:
+        raise ValueError(f"Unknown OpenMP schedule {kind!r}; expected one of {list(SCHEDULES)}")
+    if int(chunk_size) < 0:
+        raise ValueError(f"OpenMP chunk size must be non-negative, got {chunk_size}")
+    return SCHEDULES[kind]
+
+
+def _schedule_name(kind: int) -> str:
+    """Return the schedule name for an omp_sched_kind value."""
+    return {value: name for name, value in SCHEDULES.items()}[kind]
+
+
+def set_num_threads(n: int | None) -> None:
+    """Set the number of OpenMP threads used by the Fortran torture kernel.
+
+    The setting is held by the library rather than the calling thread, so it
+    applies whichever Python thread calls torture.
+
+    Args:
+        n: Number of threads, or None to restore the OpenMP default
+            (OMP_NUM_THREADS, or the number of cores).
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+        ValueError: If n is less than 1.
+    """
+    n = _check_num_threads(n)
+    _open_library()
+    if _tort_lib is None:
+        raise FortranNotAvailableError()
+    _tort_lib.set_num_threads(n)
+
+
+def get_num_threads() -> int:
+    """Return the number of OpenMP threads the Fortran torture kernel will use.
+
+    Returns:
+        Number of threads (1 if Fortran or OpenMP is not available).
+    """
+    _open_library()
+    if _tort_lib is None:
+        return 1
+    return _tort_lib.get_num_threads()
+
+
+def _num_threads_setting() -> int | None:
+    """Return the thread count set with set_num_threads (None for the OpenMP default)."""
+    _open_library()
+    if _tort_lib is None:
+        raise FortranNotAvailableError()
+    return _tort_lib.get_num_threads_setting() or None
+
+
+def set_schedule(kind: str, chunk_size: int = 0) -> None:
+    """Set the OpenMP loop schedule used by the Fortran torture kernel.
+
+    The breadth-first search from each unit cell node does very uneven amounts
+    of work, so "dynamic" or "guided" can balance threads better than the
+    default "static".
+
+    Args:
+        kind: One of "static", "dynamic", "guided" or "auto".
+        chunk_size: Loop iterations handed out at a time (0 for the OpenMP default).
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+        ValueError: If kind is unknown or chunk_size is negative.
+    """
+    code = _check_schedule(kind, chunk_size)
+    _open_library()
+    if _tort_lib is None:
+        raise FortranNotAvailableError()
+    _tort_lib.set_schedule(code, int(chunk_size))
+
+
+def get_schedule() -> tuple[str, int]:
+    """Return the OpenMP loop schedule used by the Fortran torture kernel.
+
+    Returns:
+        The schedule name and chunk size (0 for the OpenMP default).
+
+    Raises:
+        FortranNotAvailableError: If Fortran extensions are not available.
+    """
+    _open_library()
+    if _tort_lib is None:
+        raise FortranNotAvailableError()
+    return _schedule_name(_tort_lib.get_schedule_kind()), _tort_lib.get_chunk_size()
+
+
+@contextmanager
+def openmp_settings(
+    num_threads: int | None = None,
+    schedule: str | None = None,
+    chunk_size: int = 0,
+) -> Iterator[None]:
+    """Scope the OpenMP thread count and schedule of the Fortran kernels.
+
+    Applies to both the torture (tort) and distance (dist) kernels, restoring
+    their previous settings on exit. Libraries that are not available are
+    skipped, since the Python fallbacks are single-threaded.
+
+    The settings are process-wide, so scopes entered from overlapping threads
+    undo each other on exit. With neither num_threads nor schedule given,
+    nothing is saved or restored, so callers that pass through an optional
+    setting do not disturb scopes entered by other threads.
+
+    Args:
+        num_threads: Number of threads, or None to leave the thread count unchanged.
+        schedule: "static", "dynamic", "guided" or "auto", or None to leave
+            the schedule unchanged.
+        chunk_size: Chunk size used with schedule (0 for the OpenMP default).
+
+    Raises:
+        ValueError: If num_threads, schedule or chunk_size is invalid.
+
+    Example:
+        >>> with openmp_settings(num_threads=2, schedule="dynamic"):
+        ...     graph.torture()
+    """
+    from crystal_torture import dist
+
+    if num_threads is not None:
+        _check_num_threads(num_threads)
+    if schedule is not None:
+        _check_schedule(schedule, chunk_size)
+    if num_threads is None and schedule is None:
+        yield
+        return
+
+    _open_library()
+    dist._load_library()
+    modules = []
+    if _tort_lib is not None:
+        modules.append(sys.modules[__name__])
+    if dist._dist_lib is not None:
+        modules.append(dist)
+    saved = [(module._num_threads_setting(), module.get_schedule()) for module in modules]
+    try:
+        for module in modules:
+            if num_threads is not None:
+                module.set_num_threads(num_threads)
+            if schedule is not None:
+                module.set_schedule(schedule, chunk_size)
+        yield
+    finally:
+        for module, (threads, (kind, chunk)) in zip(modules, saved):
+            module.set_num_threads(threads)
+            module.set_schedule(kind, chunk)
 
 
 class Tort_Mod:
@@ -85,10 +336,14 @@ class Tort_Mod:
         Raises:
             FortranNotAvailableError: If Fortran extensions are not available.
         """
+        _open_library()
         if not _FORT_AVAILABLE:
             raise FortranNotAvailableError()
         self._uc_tort_data: list[int] | None = None
         self._is_allocated = False
+        # A node of the graph currently uploaded (see set_fort_nodes), used to
+        # tell whether a graph's nodes are the ones held in the Fortran module.
+        self.owner: object | None = None
     
     def allocate_nodes(self, n: int, n2: int) -> None:
         """Allocate space for nodes and unit cell node tortuosity.
@@ -99,16 +354,20 @@ class Tort_Mod:
         """
         if _tort_lib is None:
             raise RuntimeError("Fortran library not available")
-        _tort_lib.allocate_nodes(n, n2)
-        self._is_allocated = True
+        with state_lock:
+            _tort_lib.allocate_nodes(n, n2)
+            self._is_allocated = True
+            self.owner = None
     
     def tear_down(self) -> None:
         """Free up space used to store nodes, tortuosity and neighbours."""
         if _tort_lib is None:
             raise RuntimeError("Fortran library not available")
-        _tort_lib.tear_down()
-        self._uc_tort_data = None
-        self._is_allocated = False
+        with state_lock:
+            _tort_lib.tear_down()
+            self._uc_tort_data = None
+            self._is_allocated = False
+            self.owner = None
     
     def set_neighbours(self, ind: int, uc_ind: int, n: int, neigh: list[int]) -> None:
         """Set the neighbour list and unit cell index for graph nodes.
@@ -132,7 +391,8 @@ class Tort_Mod:
             )
         # Convert Python list to ctypes array
         neigh_array = (ctypes.c_int * len(neigh))(*neigh)
-        _tort_lib.set_neighbours(ind, uc_ind, n, neigh_array)
+        with state_lock:
+            _tort_lib.set_neighbours(ind, uc_ind, n, neigh_array)
     
     def torture(self, n: int, uc_nodes: list[int]) -> None:
         """Perform tortuosity analysis on cluster using BFS & OpenMP.
@@ -158,7 +418,34 @@ class Tort_Mod:
             )
         # Convert Python list to ctypes array
         uc_nodes_array = (ctypes.c_int * len(uc_nodes))(*uc_nodes)
-        _tort_lib.torture(n, uc_nodes_array)
+        with state_lock:
+            _tort_lib.torture(n, uc_nodes_array)
+
+    def torture_graph(self, uc_nodes: list[int]) -> None:
+        """Perform tortuosity analysis on the UC nodes of several clusters at once.
+
+        All the nodes are shared between the OpenMP threads in a single
+        parallel region with dynamic scheduling (chunk size from set_schedule,
+        default 1), rather than one parallel region per cluster.
+
+        Args:
+            uc_nodes: List containing the indices of the unit cell nodes in all
+                the clusters to torture.
+
+        Raises:
+            FortranNotAvailableError: If Fortran extensions are not available.
+            RuntimeError: If Fortran nodes not properly initialized.
+        """
+        if _tort_lib is None:
+            raise FortranNotAvailableError()
+        if not self._is_allocated:
+            raise RuntimeError(
+                "Fortran nodes not properly initialized. Use graph_from_structure() "
+                "or clusters_from_structure() to set up tortuosity analysis properly."
+            )
+        uc_nodes_array = (ctypes.c_int * len(uc_nodes))(*uc_nodes)
+        with state_lock:
+            _tort_lib.torture_graph(len(uc_nodes), uc_nodes_array)
     
     @property
     def uc_tort(self) -> list[int]:
@@ -171,23 +458,17 @@ class Tort_Mod:
         if _tort_lib is None:
             return []
             
-        # Get the size of the array
-        size = _tort_lib.get_uc_tort_size()
-        if size <= 0:
-            return []
-        
-        # Create a list with the tortuosity values
-        result = []
-        for i in range(size):
-            tort_value = _tort_lib.get_uc_tort(i)
-            result.append(tort_value if tort_value >= 0 else 0)
+        with state_lock:
+            # Get the size of the array
+            size = _tort_lib.get_uc_tort_size()
+            if size <= 0:
+                return []
+            
+            # Create a list with the tortuosity values
+            result = []
+            for i in range(size):
+                tort_value = _tort_lib.get_uc_tort(i)
+                result.append(tort_value if tort_value >= 0 else 0)
         
         return result
 
-
-# Create the module instance
-tort_mod: 'Tort_Mod | None'
-if _FORT_AVAILABLE:
-    tort_mod = Tort_Mod()
-else:
-    tort_mod = None
\ No newline at end of file
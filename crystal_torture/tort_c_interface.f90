@@ -28,6 +28,43 @@ contains
         integer(c_int), intent(in) :: uc_nodes(n)
         call torture(n, uc_nodes)
     end subroutine c_torture
+
+    subroutine c_torture_graph(n, uc_nodes) bind(c, name='torture_graph')
+        integer(c_int), intent(in), value :: n
+        integer(c_int), intent(in) :: uc_nodes(n)
+        call torture_graph(n, uc_nodes)
+    end subroutine c_torture_graph
+    
+    subroutine c_set_num_threads(n) bind(c, name='set_num_threads')
+        integer(c_int), intent(in), value :: n
+        call set_omp_threads(n)
+    end subroutine c_set_num_threads
+
+    function c_get_num_threads() bind(c, name='get_num_threads') result(n)
+        integer(c_int) :: n
+        n = get_omp_threads()
+    end function c_get_num_threads
+
+    function c_get_num_threads_setting() bind(c, name='get_num_threads_setting') result(n)
+        integer(c_int) :: n
+        n = omp_threads
+    end function c_get_num_threads_setting
+
+    subroutine c_set_schedule(kind, chunk) bind(c, name='set_schedule')
+        integer(c_int), intent(in), value :: kind
+        integer(c_int), intent(in), value :: chunk
+        call set_omp_schedule(kind, chunk)
+    end subroutine c_set_schedule
+
+    function c_get_schedule_kind() bind(c, name='get_schedule_kind') result(kind)
+        integer(c_int) :: kind
+        kind = omp_schedule_kind
+    end function c_get_schedule_kind
+
+    function c_get_chunk_size() bind(c, name='get_chunk_size') result(chunk)
+        integer(c_int) :: chunk
+        chunk = omp_chunk_size
+    end function c_get_chunk_size
     
     function c_get_uc_tort(index) bind(c, name='get_uc_tort') result(tort_value)
         integer(c_int), intent(in), value :: index
@@ -0,0 +1,285 @@
+"""Streaming percolation and tortuosity analysis of MD trajectories."""
+
+import csv
+import re
+import shlex
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+from pymatgen.core import Lattice, Structure
+
+from crystal_torture.pymatgen_interface import VerletList, graph_from_structure
+
+# Columns written by write_trajectory_results, one row per minimal cluster.
+RESULT_COLUMNS = [
+    "frame",
+    "frac_percolating",
+    "cluster",
+    "size",
+    "periodic",
+    "tortuosity",
+]
+
+
+def _read_lines(handle: TextIO, n: int) -> list[str]:
+    """Read n lines from handle, raising ValueError on a truncated file."""
+    lines = []
+    for _ in range(n):
+        line = handle.readline()
+        if not line:
+            raise ValueError("Unexpected end of trajectory file")
+        lines.append(line)
+    return lines
+
+
+def frames_from_xdatcar(filename: str | Path) -> Iterator[Structure]:
+    """Lazily read the frames of a VASP XDATCAR file.
+
+    Handles both fixed-cell files (one header followed by configurations) and
+    variable-cell files (a header before every configuration).
+
+    Args:
+        filename: Path to the XDATCAR file.
+
+    Yields:
+        One pymatgen Structure per configuration.
+
+    Raises:
+        ValueError: If the file is malformed or truncated.
+    """
+    lattice: Lattice | None = None
+    species: list[str] = []
+    with open(filename) as handle:
+        while True:
+            line = handle.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            tokens = line.split()
+            if len(tokens) > 1 and tokens[1].lower().startswith("configuration"):
+                if lattice is None:
+                    raise ValueError(f"{filename}: configuration found before lattice header")
+                cartesian = tokens[0].lower().startswith(("c", "k"))
+                coords = np.loadtxt(
+                    _read_lines(handle, len(species)), usecols=(0, 1, 2), ndmin=2
+                )
+                yield Structure(
+                    lattice, species, coords, coords_are_cartesian=cartesian
+                )
+            else:
+                # Header: comment (already read), scale, lattice, species and counts.
+                header = _read_lines(handle, 6)
+                scale = float(header[0].split()[0])
+                matrix = np.loadtxt(header[1:4])
+                if scale < 0:
+                    scale = (-scale / abs(np.linalg.det(matrix))) ** (1 / 3)
+                lattice = Lattice(matrix * scale)
+                symbols = header[4].split()
+                counts = [int(count) for count in header[5].split()]
+                species = [
+                    symbol for symbol, count in zip(symbols, counts) for _ in range(count)
+                ]
+
+
+def _parse_extxyz_comment(comment: str) -> dict[str, str]:
+    """Parse the key=value pairs on an extended XYZ comment line."""
+    info = {}
+    for token in shlex.split(comment):
+        key, _, value = token.partition("=")
+        info[key.lower()] = value
+    return info
+
+
+def frames_from_extxyz(filename: str | Path) -> Iterator[Structure]:
+    """Lazily read the frames of an extended XYZ file.
+
+    Each frame must define a Lattice and a Properties entry with species and
+    pos columns in its comment line.
+
+    Args:
+        filename: Path to the extended XYZ file.
+
+    Yields:
+        One pymatgen Structure per frame.
+
+    Raises:
+        ValueError: If a frame has no lattice, lacks species/pos columns, or is truncated.
+    """
+    with open(filename) as handle:
+        while True:
+            line = handle.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            n_atoms = int(line.split()[0])
+            info = _parse_extxyz_comment(_read_lines(handle, 1)[0])
+            if "lattice" not in info:
+                raise ValueError(f"{filename}: extxyz frame without a Lattice is not periodic")
+            lattice = Lattice(np.array(info["lattice"].split(), dtype=float).reshape(3, 3))
+
+            columns: dict[str, tuple[int, int]] = {}
+            column = 0
+            properties = re.findall(
+                r"([^:]+):([SRIL]):(\d+)",
+                info.get("properties", "species:S:1:pos:R:3"),
+            )
+            for name, _, width in properties:
+                columns[name.lower()] = (column, int(width))
+                column += int(width)
+            if "species" not in columns or "pos" not in columns:
+                raise ValueError(f"{filename}: extxyz frame needs species and pos properties")
+
+            rows = [row.split() for row in _read_lines(handle, n_atoms)]
+            species_column = columns["species"][0]
+            pos_column = columns["pos"][0]
+            species = [row[species_column] for row in rows]
+            coords = np.array(
+                [row[pos_column:pos_column + 3] for row in rows], dtype=float
+            )
+            yield Structure(lattice, species, coords, coords_are_cartesian=True)
+
+
+def frames_from_file(filename: str | Path, fmt: str | None = None) -> Iterator[Structure]:
+    """Lazily read the frames of a trajectory file.
+
+    Args:
+        filename: Path to the trajectory file.
+        fmt: "xdatcar" or "extxyz". If None, guessed from the file name.
+
+    Yields:
+        One pymatgen Structure per frame.
+
+    Raises:
+        ValueError: If the format is not recognised.
+    """
+    if fmt is None:
+        name = Path(filename).name.lower()
+        if "xdatcar" in name:
+            fmt = "xdatcar"
+        elif name.endswith((".xyz", ".extxyz")):
+            fmt = "extxyz"
+        else:
+            raise ValueError(f"Cannot determine trajectory format of {filename}; pass fmt")
+    if fmt.lower() == "xdatcar":
+        return frames_from_xdatcar(filename)
+    if fmt.lower() == "extxyz":
+        return frames_from_extxyz(filename)
+    raise ValueError(f"Unknown trajectory format {fmt}")
+
+
+def analyse_trajectory(
+    frames: str | Path | Iterable[Structure],
+    rcut: float,
+    elements: set[str],
+    torture: bool = True,
+    fmt: str | None = None,
+    skin: float | None = None,
+) -> Iterator[dict]:
+    """Run the graph pipeline on each frame of a trajectory, one frame at a time.
+
+    Frames are read and analysed lazily, so only one frame's graph is held in
+    memory. The lattice image set-up of the neighbour search is cached, so it
+    is reused across frames that share a cell.
+
+    Args:
+        frames: Trajectory file name, or an iterable of pymatgen Structures.
+        rcut: Cut-off radii for node-node connections in forming clusters.
+        elements: Set of element strings to include in setting up graph.
+        torture: Whether to calculate tortuosity for periodic clusters (Fortran
+            if available, otherwise pure Python).
+        fmt: Trajectory format when frames is a file name (see frames_from_file).
+        skin: If given, reuse a VerletList with this skin across frames so the
+            full neighbour search is only repeated once sites have moved far enough.
+
+    Yields:
+        A dict per frame with keys "frame", "frac_percolating", "graph" and
+        "clusters". "clusters" lists a dict per minimal cluster, with keys
+        "site_indices", "size", "periodic" and "tortuosity".
+    """
+    from crystal_torture import tort
+
+    if isinstance(frames, (str, Path)):
+        frames = frames_from_file(frames, fmt=fmt)
+
+    verlet = VerletList(skin) if skin is not None else None
+    for index, structure in enumerate(frames):
+        graph = graph_from_structure(structure, rcut, elements, verlet=verlet)
+        if torture:
+            if tort.tort_mod is not None:
+                graph.torture()
+            else:
+                graph.torture_py()
+        else:
+            graph.set_minimal_clusters()
+        yield {
+            "frame": index,
+            "frac_percolating": graph.return_frac_percolating(),
+            "graph": graph,
+            "clusters": [
+                {
+                    "site_indices": sorted(min_clus.site_indices),
+                    "size": min_clus.size,
+                    "periodic": min_clus.periodic,
+                    "tortuosity": min_clus.tortuosity,
+                }
+                for min_clus in graph.minimal_clusters
+            ],
+        }
+
+
+def write_trajectory_results(results: Iterable[dict], filename: str | Path) -> int:
+    """Write per-frame results to a CSV table.
+
+    Each frame is written (and flushed) as it is produced, so a partial table
+    survives an interrupted run.
+
+    Args:
+        results: Per-frame results from analyse_trajectory.
+        filename: CSV file to write, with one row per minimal cluster per frame.
+
+    Returns:
+        Number of rows written.
+    """
+    rows = 0
+    for result in iter_write_trajectory_results(results, filename):
+        rows += len(result["clusters"])
+    return rows
+
+
+def iter_write_trajectory_results(
+    results: Iterable[dict], filename: str | Path
+) -> Iterator[dict]:
+    """Stream per-frame results to a CSV table, passing each frame through.
+
+    Like write_trajectory_results, but a generator, so it can be chained onto
+    analyse_trajectory; nothing is written until it is iterated.
+
+    Args:
+        results: Per-frame results from analyse_trajectory.
+        filename: CSV file to write, with one row per minimal cluster per frame.
+
+    Yields:
+        The per-frame results, unchanged.
+    """
+    with open(filename, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        for result in results:
+            clusters = sorted(result["clusters"], key=lambda c: c["site_indices"])
+            for cluster_index, cluster in enumerate(clusters):
+                writer.writerow(
+                    {
+                        "frame": result["frame"],
+                        "frac_percolating": result["frac_percolating"],
+                        "cluster": cluster_index,
+                        "size": cluster["size"],
+                        "periodic": cluster["periodic"],
+                        "tortuosity": cluster["tortuosity"],
+                    }
+                )
+            handle.flush()
+            yield result
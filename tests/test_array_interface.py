@@ -0,0 +1,124 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import dist, tort
+from crystal_torture.array_interface import (
+    analyse_arrays,
+    graph_from_arrays,
+    neighbour_pairs,
+    nodes_from_arrays,
+)
+from crystal_torture.pymatgen_interface import graph_from_structure, nodes_from_structure
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+class ArrayInterfaceTestCase(unittest.TestCase):
+    """Test the pymatgen-free array entry points."""
+
+    def setUp(self):
+        self.structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        self.matrix = self.structure.lattice.matrix
+        self.frac_coords = self.structure.frac_coords
+        self.symbols = [site.species_string for site in self.structure]
+        # Integer species codes, as a screening pipeline would hold them.
+        self.codes = np.array([{"Mg": 12, "Al": 13, "O": 8}[s] for s in self.symbols])
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_nodes_match_nodes_from_structure(self):
+        def key(nodes):
+            return sorted(
+                (n.index, n.element, n.uc_index, n.is_halo, tuple(sorted(n.neighbours_ind)))
+                for n in nodes
+            )
+
+        expected = nodes_from_structure(self.structure, 3.5, get_halo=True)
+        nodes = nodes_from_arrays(self.matrix, self.frac_coords, self.symbols, 3.5, get_halo=True)
+        self.assertEqual(key(nodes), key(expected))
+
+    def test_neighbour_pairs_numpy_fallback(self):
+        expected = neighbour_pairs(self.matrix, self.frac_coords, 3.5)
+        with patch("crystal_torture.array_interface.dist", None):
+            result = neighbour_pairs(self.matrix, self.frac_coords, 3.5)
+        for array, expected_array in zip(result[:3], expected[:3]):
+            np.testing.assert_array_equal(array, expected_array)
+        np.testing.assert_allclose(result[3], expected[3])
+
+    def test_neighbour_pairs_without_compiled_library(self):
+        expected = neighbour_pairs(self.matrix, self.frac_coords, 3.5)
+        dist._load_library()
+        with patch.object(dist, "_DIST_AVAILABLE", False), patch(
+            "crystal_torture.array_interface._stacked_neighbour_pairs"
+        ) as stacked:
+            result = neighbour_pairs(self.matrix, self.frac_coords, 3.5)
+        stacked.assert_not_called()
+        for array, expected_array in zip(result[:3], expected[:3]):
+            np.testing.assert_array_equal(array, expected_array)
+        np.testing.assert_allclose(result[3], expected[3])
+
+    def test_graph_matches_graph_from_structure(self):
+        expected = graph_from_structure(self.structure, 3.5, {"Mg", "Al"})
+        expected.torture_py()
+        graph = graph_from_arrays(self.matrix, self.frac_coords, self.codes, 3.5, {12, 13})
+        graph.torture_py()
+
+        def key(g):
+            return sorted(
+                (sorted(c.site_indices), c.periodic, c.tortuosity) for c in g.minimal_clusters
+            )
+
+        self.assertEqual(key(graph), key(expected))
+        self.assertIsNone(graph.structure)
+
+    def test_analyse_arrays(self):
+        results = analyse_arrays(self.matrix, self.frac_coords, self.codes, 3.5, {12})
+        expected = graph_from_structure(self.structure, 3.5, {"Mg"})
+        expected.torture_py()
+        min_clus = sorted(expected.minimal_clusters, key=lambda c: min(c.site_indices))
+
+        mg_sites = np.flatnonzero(self.codes == 12)
+        self.assertEqual(results["frac_percolating"], expected.return_frac_percolating())
+        np.testing.assert_array_equal(results["cluster"][self.codes != 12], -1)
+        self.assertTrue(np.all(results["cluster"][mg_sites] >= 0))
+        self.assertEqual(results["cluster_size"].tolist(), [c.size for c in min_clus])
+        self.assertEqual(results["cluster_periodic"].tolist(), [c.periodic for c in min_clus])
+        np.testing.assert_allclose(results["cluster_tortuosity"], [c.tortuosity for c in min_clus])
+        self.assertTrue(np.all(np.isnan(results["tortuosity"][self.codes != 12])))
+        self.assertFalse(np.any(np.isnan(results["tortuosity"][mg_sites])))
+
+    def test_analyse_arrays_without_torture(self):
+        results = analyse_arrays(
+            self.matrix, self.frac_coords, self.symbols, 3.5, {"Mg"}, torture=False
+        )
+        self.assertTrue(np.all(np.isnan(results["cluster_tortuosity"])))
+        self.assertEqual(results["cluster_size"].sum(), self.symbols.count("Mg"))
+
+    def test_unknown_species_raises_error(self):
+        with self.assertRaises(ValueError):
+            analyse_arrays(self.matrix, self.frac_coords, self.codes, 3.5, {3})
+        with self.assertRaises(ValueError):
+            analyse_arrays(self.matrix, self.frac_coords, self.codes, 3.5, set())
+
+    def test_does_not_import_pymatgen(self):
+        code = (
+            "import sys, numpy as np\n"
+            "from crystal_torture.array_interface import analyse_arrays\n"
+            "analyse_arrays(np.eye(3) * 2.0, [[0, 0, 0]], [3], 2.1, {3})\n"
+            "assert not any(m.startswith('pymatgen') for m in sys.modules)\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=TEST_DIR.parent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.async_interface import AsyncAnalyser
+from crystal_torture.batch import analyse_structure, graph_results
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+class AsyncInterfaceTestCase(unittest.TestCase):
+    """Test the asyncio wrappers around the graph pipeline."""
+
+    def setUp(self):
+        self.structures = [
+            Structure.from_file(str(STRUCTURE_FILES_DIR / name))
+            for name in ("POSCAR_2_clusters.vasp", "POSCAR_periodic_1.vasp")
+        ]
+        self.expected = [analyse_structure(s, 4.0, {"Li"}) for s in self.structures]
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_graph_from_structure_and_torture(self):
+        async def run():
+            async with AsyncAnalyser(max_workers=2) as analyser:
+                graphs = await asyncio.gather(
+                    *(analyser.graph_from_structure(s, 4.0, {"Li"}) for s in self.structures)
+                )
+                return await asyncio.gather(*(analyser.torture(graph) for graph in graphs))
+
+        graphs = asyncio.run(run())
+        self.assertEqual([graph_results(graph) for graph in graphs], self.expected)
+
+    def test_analyse_structure_is_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def tracked(*args, **kwargs):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            try:
+                return analyse_structure(*args, **kwargs)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        async def run():
+            async with AsyncAnalyser(max_workers=4, max_concurrency=2) as analyser:
+                return await asyncio.gather(
+                    *(analyser.analyse_structure(s, 4.0, {"Li"}) for s in self.structures * 4)
+                )
+
+        with patch("crystal_torture.batch.analyse_structure", tracked):
+            results = asyncio.run(run())
+        self.assertEqual(results, self.expected * 4)
+        self.assertLessEqual(running[1], 2)
+
+    def test_cancel_queued_call(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def blocking(structure, *args, **kwargs):
+            calls.append(structure)
+            started.set()
+            release.wait(10)
+            return {}
+
+        async def run():
+            async with AsyncAnalyser(max_workers=1, max_concurrency=1) as analyser:
+                first = asyncio.create_task(analyser.analyse_structure("first", 4.0, {"Li"}))
+                await asyncio.get_running_loop().run_in_executor(None, started.wait, 10)
+                queued = asyncio.create_task(analyser.analyse_structure("queued", 4.0, {"Li"}))
+                await asyncio.sleep(0.05)
+                queued.cancel()
+                release.set()
+                with self.assertRaises(asyncio.CancelledError):
+                    await queued
+                await first
+
+        with patch("crystal_torture.batch.analyse_structure", blocking):
+            asyncio.run(run())
+        self.assertEqual(calls, ["first"])
+
+    def test_process_executor(self):
+        async def run():
+            async with AsyncAnalyser(executor="process", max_workers=2) as analyser:
+                with self.assertRaises(ValueError):
+                    await analyser.graph_from_structure(self.structures[0], 4.0, {"Li"})
+                return await asyncio.gather(
+                    *(analyser.analyse_structure(s, 4.0, {"Li"}) for s in self.structures)
+                )
+
+        self.assertEqual(asyncio.run(run()), self.expected)
+
+    def test_invalid_and_closed(self):
+        with self.assertRaises(ValueError):
+            AsyncAnalyser(executor="cluster")
+        with self.assertRaises(ValueError):
+            AsyncAnalyser(max_concurrency=0)
+        analyser = AsyncAnalyser(max_workers=1)
+        analyser.close()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(analyser.analyse_structure(self.structures[0], 4.0, {"Li"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,330 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.batch import (
+    JSONLResultWriter,
+    ParquetResultWriter,
+    analyse_file,
+    completed_inputs,
+    expand_inputs,
+    read_results,
+    run_batch,
+)
+from crystal_torture.cli import main
+from crystal_torture.cost import CostModel
+from crystal_torture.pymatgen_interface import graph_from_file
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+analyse_file_unpatched = analyse_file
+
+
+def misbehaving_analyse_file(filename, *args, **kwargs):
+    """analyse_file that hangs or kills its process for files named accordingly."""
+    if "slow" in Path(filename).name:
+        time.sleep(60)
+    if "crash" in Path(filename).name:
+        os._exit(3)
+    return analyse_file_unpatched(filename, *args, **kwargs)
+
+
+def without_elapsed(records):
+    return sorted(
+        ({k: v for k, v in record.items() if k != "elapsed"} for record in records),
+        key=lambda record: record["file"],
+    )
+
+
+class BatchTestCase(unittest.TestCase):
+    """Test batch runs over structure files and the command-line interface."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tempdir.name)
+        for name in ("POSCAR_periodic_1.vasp", "POSCAR_periodic_2.vasp", "POSCAR_2_clusters.vasp"):
+            shutil.copy(STRUCTURE_FILES_DIR / name, self.dir / name)
+        self.pattern = str(self.dir / "POSCAR_*.vasp")
+        self.files = expand_inputs([self.pattern])
+        self.output = self.dir / "results.jsonl"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def run_cli(self, *args):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main([self.pattern, "--rcut", "4.0", "--elements", "Li", *args])
+        return status, stderr.getvalue()
+
+    def test_expand_inputs(self):
+        self.assertEqual([Path(f).name for f in self.files], [
+            "POSCAR_2_clusters.vasp", "POSCAR_periodic_1.vasp", "POSCAR_periodic_2.vasp",
+        ])
+        self.assertEqual(expand_inputs([self.pattern, self.files[0]]), self.files)
+        with self.assertRaises(ValueError):
+            expand_inputs([str(self.dir / "*.cif")])
+
+    def test_analyse_file_matches_graph(self):
+        filename = self.files[0]
+        graph = graph_from_file(filename, 4.0, {"Li"})
+        graph.torture_py()
+
+        record = analyse_file(filename, 4.0, {"Li"})
+
+        self.assertEqual(record["file"], filename)
+        self.assertEqual(record["frac_percolating"], graph.return_frac_percolating())
+        self.assertEqual(
+            sorted((c["size"], c["periodic"], c["tortuosity"]) for c in record["clusters"]),
+            sorted((c.size, c.periodic, c.tortuosity) for c in graph.minimal_clusters),
+        )
+        json.dumps(record)
+
+    def test_analyse_file_without_torture(self):
+        record = analyse_file(self.files[0], 4.0, {"Li"}, torture=False)
+        self.assertTrue(all(c["tortuosity"] is None for c in record["clusters"]))
+
+    def test_analyse_without_fortran(self):
+        expected = list(run_batch(self.files, 4.0, {"Li"}))
+        with patch.object(tort, "tort_mod", None):
+            record = analyse_file(self.files[0], 4.0, {"Li"})
+            records = list(run_batch(self.files, 4.0, {"Li"}))
+        self.assertEqual(record, {k: expected[0][k] for k in record})
+        self.assertTrue(all(r["status"] == "ok" for r in records))
+        self.assertEqual(without_elapsed(records), without_elapsed(expected))
+
+    def test_run_batch_workers_match_serial(self):
+        serial = list(run_batch(self.files, 4.0, {"Li"}))
+        parallel = list(run_batch(self.files, 4.0, {"Li"}, workers=2, omp_threads=1))
+        self.assertEqual([r["file"] for r in serial], self.files)
+        self.assertTrue(all(r["status"] == "ok" and r["error"] is None for r in serial))
+        self.assertEqual(without_elapsed(parallel), without_elapsed(serial))
+
+    def test_run_batch_records_errors(self):
+        bad = self.dir / "bad.vasp"
+        bad.write_text("not a structure\n")
+        files = [str(bad), *self.files]
+
+        for workers in (None, 2):
+            records = {r["file"]: r for r in run_batch(files, 4.0, {"Li"}, workers=workers)}
+            self.assertEqual(records[str(bad)]["status"], "error")
+            self.assertIsNone(records[str(bad)]["frac_percolating"])
+            self.assertTrue(records[str(bad)]["error"])
+            self.assertTrue(all(records[f]["status"] == "ok" for f in self.files))
+
+    @unittest.skipIf(
+        multiprocessing.get_start_method() != "fork", "patching workers needs fork"
+    )
+    def test_run_batch_isolates_timeouts_and_crashes(self):
+        slow = self.dir / "slow.vasp"
+        crash = self.dir / "crash.vasp"
+        for path in (slow, crash):
+            shutil.copy(self.files[0], path)
+        files = [str(slow), str(crash), *self.files]
+
+        with patch("crystal_torture.batch.analyse_file", misbehaving_analyse_file):
+            started = time.perf_counter()
+            records = {r["file"]: r for r in run_batch(files, 4.0, {"Li"}, workers=2, timeout=2)}
+
+        self.assertLess(time.perf_counter() - started, 30)
+        self.assertEqual(records[str(slow)]["status"], "timeout")
+        self.assertEqual(records[str(crash)]["status"], "crashed")
+        self.assertIn("3", records[str(crash)]["error"])
+        self.assertTrue(all(records[f]["status"] == "ok" for f in self.files))
+
+    def test_run_batch_dedup(self):
+        structure = Structure.from_file(self.files[0])
+        structure.translate_sites(list(range(len(structure))), [0.5, 0.25, 0])
+        translated = self.dir / "translated.vasp"
+        structure.to(filename=str(translated), fmt="poscar")
+        copied = self.dir / "copied.vasp"
+        shutil.copy(self.files[1], copied)
+        files = [*self.files, str(translated), str(copied)]
+        expected = {r["file"]: r for r in run_batch(files, 4.0, {"Li"})}
+
+        for workers, match in ((None, False), (2, True)):
+            records = list(run_batch(files, 4.0, {"Li"}, workers=workers, dedup=True, match=match))
+            self.assertEqual(sorted(r["file"] for r in records), sorted(files))
+            by_file = {r["file"]: r for r in records}
+            self.assertEqual(by_file[str(translated)]["duplicate_of"], self.files[0])
+            self.assertEqual(by_file[str(copied)]["duplicate_of"], self.files[1])
+            self.assertTrue(all(by_file[f]["duplicate_of"] is None for f in self.files))
+            for filename, record in by_file.items():
+                self.assertEqual(record["clusters"], expected[filename]["clusters"])
+                self.assertEqual(record["frac_percolating"], expected[filename]["frac_percolating"])
+
+    def test_run_batch_dedup_skips_large_structures(self):
+        copied = self.dir / "copied.vasp"
+        shutil.copy(self.files[0], copied)
+        files = [self.files[0], str(copied)]
+        li_sites = sum(site.species_string == "Li" for site in Structure.from_file(self.files[0]))
+
+        with patch("crystal_torture.fingerprint.MAX_DEDUP_SITES", li_sites - 1), patch(
+            "crystal_torture.fingerprint.structure_fingerprint"
+        ) as fingerprint:
+            records = list(run_batch(files, 4.0, {"Li"}, dedup=True))
+        fingerprint.assert_not_called()
+        self.assertEqual([r["duplicate_of"] for r in records], [None, None])
+        self.assertTrue(all(r["status"] == "ok" for r in records))
+
+    def test_run_batch_schedule_runs_largest_first(self):
+        bad = self.dir / "bad.vasp"
+        bad.write_text("not a structure\n")
+        large = self.dir / "large.vasp"
+        structure = Structure.from_file(self.files[2])
+        structure.make_supercell([2, 1, 1])
+        structure.to(filename=str(large), fmt="poscar")
+        files = [str(bad), *self.files, str(large)]
+        expected = {r["file"]: r for r in run_batch(files, 4.0, {"Li"})}
+        # Every structure is expensive enough to be given OpenMP threads.
+        model = CostModel({"fortran": (1.0, 1e-3, 0.0), "python": (1.0, 1e-3, 0.0)})
+
+        with patch("crystal_torture.batch.analyse_file", wraps=analyse_file) as analyse:
+            records = list(run_batch(files, 4.0, {"Li"}, schedule=True, cost_model=model))
+
+        self.assertEqual(records[0]["file"], str(large))
+        self.assertEqual(records[-1]["file"], str(bad))
+        self.assertEqual(records[-1]["status"], "error")
+        self.assertEqual(without_elapsed(records), without_elapsed(expected.values()))
+        engine = "fortran" if tort.tort_mod is not None else "python"
+        for call in analyse.call_args_list[:-1]:
+            self.assertEqual(call.kwargs["engine"], engine)
+            self.assertGreaterEqual(call.kwargs["omp_threads"], 1)
+
+        with patch("crystal_torture.batch.analyse_file", wraps=analyse_file) as analyse:
+            list(run_batch(files, 4.0, {"Li"}, omp_threads=1, schedule=True))
+        self.assertTrue(all(call.kwargs["omp_threads"] == 1 for call in analyse.call_args_list))
+
+        records = list(run_batch(files, 4.0, {"Li"}, workers=2, schedule=True))
+        self.assertEqual(without_elapsed(records), without_elapsed(expected.values()))
+
+    def test_timeout_without_workers_raises_error(self):
+        with self.assertRaises(ValueError):
+            next(run_batch(self.files, 4.0, {"Li"}, timeout=1))
+
+    def test_completed_inputs(self):
+        records = [
+            {"file": "a", "status": "error"},
+            {"file": "b", "status": "timeout"},
+            {"file": "a", "status": "ok"},
+            {"file": "c"},
+        ]
+        self.assertEqual(completed_inputs(records), {"a", "b", "c"})
+        self.assertEqual(completed_inputs(records, retry_failed=True), {"a", "c"})
+
+    def test_cli_writes_jsonl(self):
+        status, _ = self.run_cli("-o", str(self.output), "--workers", "2")
+        self.assertEqual(status, 0)
+        records = read_results(self.output)
+        self.assertEqual(sorted(r["file"] for r in records), self.files)
+        self.assertEqual(without_elapsed(records), without_elapsed(run_batch(self.files, 4.0, {"Li"})))
+
+    def test_cli_sqlite_resume_and_retry_failed(self):
+        output = self.dir / "results.sqlite"
+        bad = self.dir / "POSCAR_bad.vasp"
+        bad.write_text("not a structure\n")
+
+        status, stderr = self.run_cli("-o", str(output))
+        self.assertEqual(status, 1)
+        self.assertIn("POSCAR_bad.vasp: error", stderr)
+        self.assertEqual(len(read_results(output)), 4)
+
+        status, stderr = self.run_cli("-o", str(output), "--resume")
+        self.assertEqual(status, 0)
+        self.assertIn("4 of 4", stderr)
+
+        shutil.copy(self.files[0], bad)
+        status, stderr = self.run_cli("-o", str(output), "--resume", "--retry-failed")
+        self.assertEqual(status, 0)
+        self.assertIn("3 of 4", stderr)
+        records = read_results(output)
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[-1]["file"], str(bad))
+        self.assertEqual(records[-1]["status"], "ok")
+
+    def test_cli_resumes_partial_jsonl(self):
+        first = next(run_batch(self.files[:1], 4.0, {"Li"}))
+        with JSONLResultWriter(self.output) as writer:
+            writer.write(first)
+        # Simulate a run killed part way through writing its next record.
+        with open(self.output, "a") as handle:
+            handle.write('{"file": "trunc')
+
+        status, stderr = self.run_cli("-o", str(self.output), "--resume")
+
+        self.assertEqual(status, 0)
+        self.assertIn("1 of 3", stderr)
+        records = read_results(self.output)
+        self.assertEqual([r["file"] for r in records], self.files)
+        self.assertEqual(records[0], first)
+
+    def test_cli_stdout(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            status, _ = self.run_cli("--no-torture")
+        self.assertEqual(status, 0)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 3)
+
+    def test_cli_errors(self):
+        stderr = io.StringIO()
+        for args in (
+            [self.pattern, "--rcut", "4.0", "--elements", "Li", "--resume"],
+            [self.pattern, "--rcut", "4.0", "--elements", "Li", "--workers", "0"],
+            [str(self.dir / "*.cif"), "--rcut", "4.0", "--elements", "Li"],
+            [self.pattern, "--elements", "Li"],
+        ):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(stderr):
+                main(args)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not available")
+    def test_cli_writes_and_resumes_parquet(self):
+        output = self.dir / "results.parquet"
+        self.run_cli("-o", str(output))
+        records = read_results(output)
+        self.assertEqual(sorted(r["file"] for r in records), self.files)
+
+        status, stderr = self.run_cli("-o", str(output), "--resume")
+        self.assertIn("3 of 3", stderr)
+        self.assertEqual(read_results(output), records)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow not available")
+    def test_parquet_resumes_after_interrupted_run(self):
+        output = self.dir / "results.parquet"
+        records = list(run_batch(self.files, 4.0, {"Li"}))
+        with ParquetResultWriter(output) as writer:
+            writer.write(records[0])
+        # A killed run journals its records but never writes the Parquet file.
+        writer = ParquetResultWriter(output, resume=True)
+        writer.write(records[1])
+        writer._journal.close()
+        self.assertEqual(read_results(output), records[:2])
+
+        with ParquetResultWriter(output, resume=True) as resumed:
+            self.assertEqual(resumed.completed, records[:2])
+            resumed.write(records[2])
+        self.assertEqual(read_results(output), records)
+        self.assertFalse(resumed.journal_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,35 @@ TEST_DIR = Path(__file__).parent
 STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
 
 
+def linked_images(halo, steps):
+    """Return the connected component of the central image of one site in a halo.
+
+    Each image is linked to the images displaced by each of steps (wrapping
+    around the halo), and only images reachable from the central one are kept.
+    """
+    nx, ny, nz = halo
+    centre = (nx // 2, ny // 2, nz // 2)
+    nodes = {}
+    queue = [centre]
+    while queue:
+        position = queue.pop()
+        if position in nodes:
+            continue
+        index = (position[0] * ny + position[1]) * nz + position[2]
+        nodes[position] = Node(index, "Li", uc_index=0, is_halo=position != centre)
+        for step in steps:
+            for sign in (1, -1):
+                queue.append(tuple((p + sign * d) % n for p, d, n in zip(position, step, halo)))
+    for position, node in nodes.items():
+        node.neighbours = {
+            nodes[tuple((p + sign * d) % n for p, d, n in zip(position, step, halo))]
+            for step in steps
+            for sign in (1, -1)
+        } - {node}
+        node.neighbours_ind = {neigh.index for neigh in node.neighbours}
+    return set(nodes.values())
+
+
 @ddt
 class ClusterTestCase(unittest.TestCase):
     """ Test for Cluster Class"""
@@ -109,6 +138,22 @@ class ClusterTestCase(unittest.TestCase):
             set([4, 3, 3, 3, 3, 3, 3, 3]),
         )
 
+    @data("POSCAR_2_clusters.vasp")
+    def test_torture_cluster_after_another_upload(self, value):
+        clusterf = clusters_from_file(
+            filename=str(STRUCTURE_FILES_DIR / value), rcut=4.0, elements={"Li"}
+        ).pop()
+        # Uploading another structure replaces the node table in the Fortran module.
+        clusters_from_file(
+            filename=str(STRUCTURE_FILES_DIR / "POSCAR_periodic_2.vasp"), rcut=4.0, elements={"Li"}
+        )
+        clusterf.torture_fort()
+        tort.tort_mod.tear_down()
+
+        self.assertEqual(
+            sorted(node.tortuosity for node in clusterf.uc_nodes), [3, 3, 3, 3, 3, 3, 3, 4]
+        )
+
     @data("POSCAR_2_clusters.vasp")
     def test_minimal_cluster(self, value):
 
@@ -252,44 +297,66 @@ class ClusterTestCase(unittest.TestCase):
         self.assertEqual(clusters, set())
         
     def test_cluster_set_periodic_3d(self):
-        """Test set_periodic identifies 3D periodic cluster (27 images)."""
-        # Create 27 nodes with same uc_index (simulating 3x3x3 periodic images)
-        nodes = set()
-        for i in range(27):
-            node = Node(i, "Li", uc_index=0, is_halo=(i != 13), neighbours_ind=set())
-            nodes.add(node)
-        
-        cluster = Cluster(nodes)
+        """Test set_periodic identifies a cluster linked along all three axes as 3D."""
+        cluster = Cluster(linked_images((3, 3, 3), [(1, 0, 0), (0, 1, 0), (0, 0, 1)]))
         cluster.set_periodic()
-        
+
         self.assertEqual(cluster.periodic, 3)
-    
+
+    def test_cluster_set_periodic_non_cubic_halo(self):
+        """Test set_periodic identifies a 2D periodic cluster in a 3x3x1 halo."""
+        nodes = linked_images((3, 3, 1), [(1, 0, 0), (0, 1, 0)])
+        cluster = Cluster(nodes, halo=(3, 3, 1))
+        cluster.set_periodic()
+
+        self.assertEqual(cluster.periodic, 2)
+
+    def test_cluster_set_periodic_long_axis(self):
+        """Test set_periodic identifies a 1D periodic cluster in a 5x1x1 halo."""
+        cluster = Cluster(linked_images((5, 1, 1), [(1, 0, 0)]), halo=(5, 1, 1))
+        cluster.set_periodic()
+
+        self.assertEqual(cluster.periodic, 1)
+
+    def test_cluster_set_periodic_diagonal_chain(self):
+        """Test set_periodic identifies a chain of images along a cell diagonal as 1D."""
+        for halo in ((3, 3, 3), (3, 5, 3), (5, 3, 1)):
+            cluster = Cluster(linked_images(halo, [(1, 1, 0)]), halo=halo)
+            cluster.set_periodic()
+            self.assertEqual(cluster.periodic, 1, halo)
+
+    def test_cluster_set_periodic_partial_images_isolated(self):
+        """Test set_periodic treats an incomplete set of images as isolated."""
+        nodes = {
+            Node(i, "Li", uc_index=0, is_halo=(i != 4), neighbours_ind=set())
+            for i in (3, 4)
+        }
+        cluster = Cluster(nodes, halo=(3, 3, 1))
+        cluster.set_periodic()
+
+        self.assertEqual(cluster.periodic, 0)
+
+    def test_cluster_merge_keeps_halo(self):
+        """Test merged clusters keep the halo of the original cluster."""
+        cluster1 = Cluster({Node(0, "Li", uc_index=0, is_halo=False, neighbours_ind=set())}, halo=(3, 3, 1))
+        cluster2 = Cluster({Node(1, "Li", uc_index=0, is_halo=True, neighbours_ind=set())}, halo=(3, 3, 1))
+
+        self.assertEqual(cluster1.merge(cluster2).halo, (3, 3, 1))
+
     def test_cluster_set_periodic_2d(self):
-        """Test set_periodic identifies 2D periodic cluster (9 images)."""
-        # Create 9 nodes with same uc_index (simulating 3x3 periodic images)
-        nodes = set()
-        for i in range(9):
-            node = Node(i, "Li", uc_index=0, is_halo=(i != 4), neighbours_ind=set())
-            nodes.add(node)
-        
-        cluster = Cluster(nodes)
+        """Test set_periodic identifies a cluster linked along two axes as 2D."""
+        cluster = Cluster(linked_images((3, 3, 3), [(1, 0, 0), (0, 1, 1)]))
         cluster.set_periodic()
-        
+
         self.assertEqual(cluster.periodic, 2)
-    
+
     def test_cluster_set_periodic_1d(self):
-        """Test set_periodic identifies 1D periodic cluster (3 images)."""
-        # Create 3 nodes with same uc_index (simulating linear periodic images)
-        nodes = set()
-        for i in range(3):
-            node = Node(i, "Li", uc_index=0, is_halo=(i != 1), neighbours_ind=set())
-            nodes.add(node)
-        
-        cluster = Cluster(nodes)
+        """Test set_periodic identifies a cluster linked along one axis as 1D."""
+        cluster = Cluster(linked_images((3, 3, 3), [(0, 0, 1)]))
         cluster.set_periodic()
-        
+
         self.assertEqual(cluster.periodic, 1)
-    
+
     def test_cluster_set_periodic_0d_single_node(self):
         """Test set_periodic identifies isolated cluster (1 node)."""
         node = Node(0, "Li", uc_index=0, is_halo=False, neighbours_ind=set())
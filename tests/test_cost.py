@@ -0,0 +1,88 @@
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.cost import (
+    MIN_PARALLEL_COST,
+    CostModel,
+    cost_features,
+    omp_threads_for,
+    structure_features,
+)
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+class CostModelTestCase(unittest.TestCase):
+    """Test the run time model used to schedule batches."""
+
+    def setUp(self):
+        self.structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"))
+
+    def test_features_grow_with_size_rcut_and_fraction(self):
+        base = cost_features(100, 1000.0, 4.0, 0.5)
+        self.assertEqual(base[0], 1.0)
+        for larger in (
+            cost_features(200, 2000.0, 4.0, 0.5),
+            cost_features(100, 1000.0, 5.0, 0.5),
+            cost_features(100, 1000.0, 4.0, 1.0),
+        ):
+            self.assertTrue(np.all(larger[1:] > base[1:]))
+        self.assertTrue(np.all(cost_features(100, 1000.0, 4.0, 0.5, halo=(1, 1, 1))[1:] < base[1:]))
+
+    def test_structure_features(self):
+        count = sum(1 for site in self.structure if site.species_string == "Li")
+        np.testing.assert_allclose(
+            structure_features(self.structure, 4.0, {"Li"}),
+            cost_features(len(self.structure), self.structure.volume, 4.0,
+                count / len(self.structure)),
+        )
+
+    def test_structure_features_oxidation_state_decorated(self):
+        decorated = self.structure.copy()
+        decorated.add_oxidation_state_by_element({"Li": 1, "Al": 3, "O": -2})
+        np.testing.assert_allclose(
+            structure_features(decorated, 4.0, {"Li"}),
+            structure_features(self.structure, 4.0, {"Li"}),
+        )
+        self.assertGreater(structure_features(decorated, 4.0, {"Li"})[1], 0)
+
+    def test_fit_recovers_coefficients(self):
+        coefficients = {"fortran": (1e-3, 2e-6, 1e-8), "python": (2e-3, 3e-6, 5e-8)}
+        truth = CostModel(coefficients)
+        features = [cost_features(n, n * 10.0, 4.0, 0.5) for n in (50, 100, 200, 400, 800)]
+        samples = {
+            engine: [(f, truth.estimate(f, engine)) for f in features] for engine in coefficients
+        }
+
+        fitted = CostModel.fit(samples)
+
+        for engine, expected in coefficients.items():
+            np.testing.assert_allclose(fitted.coefficients[engine], expected, rtol=1e-6)
+
+    def test_estimate_and_best_engine(self):
+        model = CostModel({"fortran": (0.0, 1e-6, 0.0), "python": (0.0, 2e-6, 0.0)})
+        features = cost_features(100, 1000.0, 4.0)
+        self.assertAlmostEqual(model.estimate(features, "python"), 2 * model.estimate(features))
+        with self.assertRaises(ValueError):
+            model.estimate(features, "cuda")
+        with patch.object(tort, "tort_mod", object()):
+            self.assertEqual(model.best_engine(features), "fortran")
+        with patch.object(tort, "tort_mod", None):
+            self.assertEqual(model.best_engine(features), "python")
+
+    def test_omp_threads_for(self):
+        self.assertEqual(omp_threads_for(MIN_PARALLEL_COST / 2, 8, 1), 1)
+        self.assertEqual(omp_threads_for(10.0, 8, 1), 8)
+        self.assertEqual(omp_threads_for(10.0, 8, 3), 2)
+        self.assertEqual(omp_threads_for(10.0, 2, 4), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
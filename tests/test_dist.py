@@ -2,6 +2,7 @@
 Unit tests for crystal_torture/dist.py module.
 """
 import unittest
+from unittest.mock import patch
 import numpy as np
 from crystal_torture import dist
 from crystal_torture.pymatgen_interface import _python_dist, _python_shift_index
@@ -318,6 +319,185 @@ class TestDistModule(unittest.TestCase):
             pass  # Expected to fail
 
 
+class TestDist64(unittest.TestCase):
+    """Test the double precision, copy-free distance kernel."""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.coord1 = rng.random((30, 3)) * 10
+        self.coord2 = rng.random((20, 3)) * 10
+        diff = self.coord1[:, np.newaxis] - self.coord2[np.newaxis]
+        self.expected = np.sqrt((diff ** 2).sum(axis=2))
+
+    def test_matches_numpy_in_double_precision(self):
+        result = dist.dist64(self.coord1, self.coord2)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertEqual(result.shape, (30, 20))
+        np.testing.assert_allclose(result, self.expected, rtol=1e-14)
+
+    def test_writes_into_out(self):
+        out = np.full((30, 20), -1.0)
+        result = dist.dist64(self.coord1, self.coord2, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, self.expected, rtol=1e-14)
+
+    def test_non_contiguous_input(self):
+        result = dist.dist64(np.asfortranarray(self.coord1), self.coord2[::-1])
+        np.testing.assert_allclose(result, self.expected[:, ::-1], rtol=1e-14)
+
+    def test_pairs_within_cutoff(self):
+        i, j, d = dist.dist64(self.coord1, self.coord2, r=4.0)
+        expected_i, expected_j = np.nonzero(self.expected <= 4.0)
+        np.testing.assert_array_equal(i, expected_i)
+        np.testing.assert_array_equal(j, expected_j)
+        np.testing.assert_allclose(d, self.expected[expected_i, expected_j], rtol=1e-14)
+
+    def test_invalid_out_raises(self):
+        for out in (np.empty((20, 30)), np.empty((30, 20), dtype=np.float32),
+                    np.empty((30, 20), order="F")):
+            with self.assertRaises(ValueError):
+                dist.dist64(self.coord1, self.coord2, out=out)
+
+    def test_invalid_coords_raise(self):
+        with self.assertRaises(ValueError):
+            dist.dist64(np.zeros((4, 2)), self.coord2)
+
+    def test_python_fallback(self):
+        with patch("crystal_torture.dist._DIST_AVAILABLE", False):
+            result = dist.dist64(self.coord1, self.coord2)
+        np.testing.assert_allclose(result, self.expected, rtol=1e-14)
+
+
+class TestDistPairs(unittest.TestCase):
+    """Test the cut-off filtered sparse pair search."""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.coord1 = rng.random((40, 3)) * 8
+        self.coord2 = np.vstack([self.coord1[:10], rng.random((25, 3)) * 8])
+        self.dense = dist.dist64(self.coord1, self.coord2)
+
+    def assert_pairs_equal(self, pairs, expected_i, expected_j):
+        i, j, d = pairs
+        self.assertEqual(i.dtype, np.int64)
+        np.testing.assert_array_equal(i, expected_i)
+        np.testing.assert_array_equal(j, expected_j)
+        np.testing.assert_allclose(d, self.dense[expected_i, expected_j], rtol=1e-14)
+
+    def test_matches_dense_matrix(self):
+        expected_i, expected_j = np.nonzero(self.dense <= 3.0)
+        self.assert_pairs_equal(dist.dist_pairs(self.coord1, self.coord2, 3.0),
+                                expected_i, expected_j)
+
+    def test_rmin_excludes_coincident_sites(self):
+        expected_i, expected_j = np.nonzero((self.dense <= 3.0) & (self.dense > 1e-8))
+        i, j, d = dist.dist_pairs(self.coord1, self.coord2, 3.0, rmin=1e-8)
+        self.assert_pairs_equal((i, j, d), expected_i, expected_j)
+        self.assertFalse(np.any(d == 0.0))
+
+    def test_no_pairs(self):
+        i, j, d = dist.dist_pairs(self.coord1, self.coord2 + 100.0, 3.0)
+        self.assertEqual((len(i), len(j), len(d)), (0, 0, 0))
+
+    def test_empty_coords(self):
+        i, j, d = dist.dist_pairs(np.zeros((0, 3)), self.coord2, 3.0)
+        self.assertEqual(len(i), 0)
+
+    def test_python_fallback(self):
+        expected_i, expected_j = np.nonzero((self.dense <= 3.0) & (self.dense > 1e-8))
+        with patch("crystal_torture.dist._DIST_AVAILABLE", False):
+            pairs = dist.dist_pairs(self.coord1, self.coord2, 3.0, rmin=1e-8)
+        self.assert_pairs_equal(pairs, expected_i, expected_j)
+
+
+class TestShiftIndices(unittest.TestCase):
+    """Test the array-valued shift_index."""
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.indices = rng.integers(0, 27 * 10, size=200)
+        self.shifts = rng.integers(-2, 3, size=(200, 3))
+
+    def test_matches_scalar_shift_index(self):
+        result = dist.shift_indices(self.indices, self.shifts)
+        expected = [dist.shift_index(int(i), list(s)) for i, s in zip(self.indices, self.shifts)]
+        self.assertEqual(result.tolist(), expected)
+
+    def test_single_shift_is_broadcast(self):
+        result = dist.shift_indices(self.indices, [1, -1, 0])
+        expected = [dist.shift_index(int(i), [1, -1, 0]) for i in self.indices]
+        self.assertEqual(result.tolist(), expected)
+
+    def test_empty(self):
+        self.assertEqual(len(dist.shift_indices([], [0, 0, 0])), 0)
+
+    def test_negative_index_raises(self):
+        with self.assertRaises(ValueError):
+            dist.shift_indices([3, -1], [0, 0, 0])
+
+    def test_mismatched_shift_raises(self):
+        with self.assertRaises(ValueError):
+            dist.shift_indices([1, 2, 3], [[0, 0, 0], [1, 1, 1]])
+
+    def test_non_cubic_halo(self):
+        halo = (5, 3, 1)
+        result = dist.shift_indices(self.indices, self.shifts, halo)
+        x = (self.indices // 3 % 5 + self.shifts[:, 0]) % 5
+        y = (self.indices % 3 + self.shifts[:, 1]) % 3
+        expected = 15 * (self.indices // 15) + x * 3 + y
+        self.assertEqual(result.tolist(), expected.tolist())
+
+    def test_non_cubic_halo_numpy_fallback(self):
+        expected = dist.shift_indices(self.indices, self.shifts, (2, 5, 3))
+        with patch("crystal_torture.dist._DIST_AVAILABLE", False):
+            result = dist.shift_indices(self.indices, self.shifts, (2, 5, 3))
+        np.testing.assert_array_equal(result, expected)
+
+    def test_invalid_halo_raises(self):
+        with self.assertRaises(ValueError):
+            dist.shift_indices([1, 2], [0, 0, 0], (3, 0, 3))
+
+    def test_numpy_fallback(self):
+        expected = dist.shift_indices(self.indices, self.shifts)
+        with patch("crystal_torture.dist._DIST_AVAILABLE", False):
+            result = dist.shift_indices(self.indices, self.shifts)
+        np.testing.assert_array_equal(result, expected)
+
+
+class TestDistOpenMPSettings(unittest.TestCase):
+    """Test OpenMP thread count and schedule control of the dist kernel."""
+
+    def tearDown(self):
+        if dist._DIST_AVAILABLE:
+            dist.set_num_threads(None)
+            dist.set_schedule("static")
+
+    @unittest.skipIf(not dist._DIST_AVAILABLE, "Fortran not available")
+    def test_settings_do_not_change_distances(self):
+        coords = np.random.default_rng(0).random((20, 3))
+        expected = dist.dist(coords, coords, 20)
+        dist.set_num_threads(2)
+        dist.set_schedule("dynamic", 3)
+        self.assertEqual(dist.get_num_threads(), 2)
+        self.assertEqual(dist.get_schedule(), ("dynamic", 3))
+        np.testing.assert_array_equal(dist.dist(coords, coords, 20), expected)
+
+    def test_dist_from_thread_pool(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        rng = np.random.default_rng(1)
+        coords = [rng.random((n, 3)) for n in (5, 50, 100, 200)] * 2
+        expected = [dist.dist(c, c, len(c)) for c in coords]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda c: dist.dist(c, c, len(c)), coords))
+        for result, reference in zip(results, expected):
+            np.testing.assert_array_equal(result, reference)
+
+    def test_invalid_schedule(self):
+        with self.assertRaises(ValueError):
+            dist.set_schedule("sometimes")
+
+
 class TestDistAvailability(unittest.TestCase):
     """Test how dist module handles Fortran availability."""
     
@@ -0,0 +1,115 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.fingerprint import (
+    GraphCache,
+    array_fingerprint,
+    default_matcher,
+    filter_species,
+    structure_fingerprint,
+)
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+class FingerprintTestCase(unittest.TestCase):
+    """Test structure fingerprints and the duplicate graph cache."""
+
+    def setUp(self):
+        self.structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"))
+        self.matrix = self.structure.lattice.matrix
+        self.frac_coords = self.structure.frac_coords
+        self.species = np.array([site.species_string for site in self.structure])
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def fingerprint(self, frac_coords=None, species=None):
+        return array_fingerprint(
+            self.matrix,
+            self.frac_coords if frac_coords is None else frac_coords,
+            self.species if species is None else species,
+        )
+
+    def test_invariant_to_site_order_and_translation(self):
+        expected = self.fingerprint()
+        order = np.random.default_rng(0).permutation(len(self.species))
+        self.assertEqual(self.fingerprint(self.frac_coords[order], self.species[order]), expected)
+        # Translate by the vector between two Li sites, wrapping through the cell.
+        shift = self.frac_coords[3] - self.frac_coords[0]
+        self.assertEqual(self.fingerprint(self.frac_coords + shift), expected)
+        self.assertEqual(self.fingerprint(self.frac_coords + [1, -2, 0]), expected)
+
+    def test_changes_with_sites_species_and_lattice(self):
+        expected = self.fingerprint()
+        moved = self.frac_coords.copy()
+        moved[0] += [0.1, 0, 0]
+        self.assertNotEqual(self.fingerprint(moved), expected)
+        swapped = self.species.copy()
+        swapped[[0, 10]] = swapped[[10, 0]]
+        self.assertNotEqual(self.fingerprint(species=swapped), expected)
+        self.assertNotEqual(
+            array_fingerprint(self.matrix * 1.01, self.frac_coords, self.species), expected
+        )
+
+    def test_structure_fingerprint_ignores_other_species(self):
+        other = self.structure.copy()
+        other.replace_species({"Al": "Ga"})
+        self.assertEqual(
+            structure_fingerprint(other, {"Li"}), structure_fingerprint(self.structure, {"Li"})
+        )
+        self.assertNotEqual(
+            structure_fingerprint(other, {"Li", "Al", "Ga"}),
+            structure_fingerprint(self.structure, {"Li", "Al", "Ga"}),
+        )
+
+    def test_oxidation_state_decorated_species(self):
+        decorated = self.structure.copy()
+        decorated.add_oxidation_state_by_element({"Li": 1, "Al": 3, "O": -2})
+        moved = decorated.copy()
+        moved.translate_sites([0], [0.1, 0, 0])
+        self.assertEqual(len(filter_species(decorated, {"Li"})), 8)
+        self.assertNotEqual(
+            structure_fingerprint(moved, {"Li"}), structure_fingerprint(decorated, {"Li"})
+        )
+
+        for matcher in (None, default_matcher()):
+            cache = GraphCache(4.0, {"Li"}, matcher=matcher)
+            graph = cache.graph(decorated)
+            self.assertIsNot(cache.graph(moved), graph)
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_invalid_tolerance_raises_error(self):
+        with self.assertRaises(ValueError):
+            array_fingerprint(self.matrix, self.frac_coords, self.species, tolerance=0)
+
+    def test_graph_cache(self):
+        translated = self.structure.copy()
+        translated.translate_sites(
+            list(range(len(translated))), self.frac_coords[3] - self.frac_coords[0]
+        )
+        moved = self.structure.copy()
+        moved.translate_sites([0], [0.1, 0, 0])
+
+        for matcher in (None, default_matcher()):
+            cache = GraphCache(4.0, {"Li"}, matcher=matcher)
+            graph = cache.graph(self.structure)
+            self.assertIs(cache.graph(translated), graph)
+            self.assertIsNot(cache.graph(moved), graph)
+            self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 2, 2))
+            self.assertIsNotNone(graph.minimal_clusters)
+            self.assertEqual(
+                sorted(c.tortuosity for c in graph.minimal_clusters if c.periodic),
+                [3.125],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
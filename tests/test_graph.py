@@ -58,6 +58,10 @@ class GraphTestCase(unittest.TestCase):
         self.cluster = Cluster({self.nodes.pop()})
         self.graph = Graph({self.cluster})
 
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
     def wrap_minimal_clusters(self):
         return self.graph.minimal_clusters
 
@@ -164,5 +168,82 @@ class GraphTestCase(unittest.TestCase):
             self.assertEqual(tort_value, 2)
 
 
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_torture_many_periodic_clusters(self):
+        """Test that all periodic clusters are tortured in one Fortran call."""
+        lattice = Lattice.cubic(4.0)
+        coords = [
+            [0.25, 0.25, 0.25], [0.75, 0.25, 0.25],
+            [0.25, 0.75, 0.75], [0.75, 0.75, 0.75],
+        ]
+        structure = Structure(lattice, ["Li"] * 4, coords)
+        graph = graph_from_structure(structure, rcut=2.5, elements={"Li"})
+        periodic = [cluster for cluster in graph.clusters if cluster.periodic > 0]
+        self.assertGreater(len(periodic), 1)
+
+        with patch.object(tort.tort_mod, "torture_graph",
+                          wraps=tort.tort_mod.torture_graph) as torture_graph:
+            graph.torture()
+        torture_graph.assert_called_once()
+        self.assertEqual(
+            len(torture_graph.call_args.args[0]),
+            sum(len(cluster.uc_nodes) for cluster in periodic),
+        )
+        self.assertEqual(graph.tortuosity, {0: 2, 1: 2, 2: 2, 3: 2})
+        for cluster in periodic:
+            self.assertEqual(cluster.tortuosity, 2)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_torture_matches_torture_py(self):
+        structure = Structure.from_file(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp")
+        graph_f = graph_from_structure(structure, rcut=4.0, elements={"Mg"})
+        graph_f.torture()
+        graph_p = graph_from_structure(structure, rcut=4.0, elements={"Mg"})
+        graph_p.torture_py()
+        self.assertEqual(graph_f.tortuosity, graph_p.tortuosity)
+        self.assertEqual(
+            sorted(cluster.tortuosity for cluster in graph_f.clusters if cluster.periodic > 0),
+            sorted(cluster.tortuosity for cluster in graph_p.clusters if cluster.periodic > 0),
+        )
+
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_torture_after_another_graph_is_set_up(self):
+        """Test that a graph is uploaded again if another graph replaced it in Fortran."""
+        spinel = Structure.from_file(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp")
+        graph = graph_from_structure(spinel, rcut=4.0, elements={"Mg"})
+        reference = graph_from_structure(spinel, rcut=4.0, elements={"Mg"})
+        reference.torture_py()
+        graph_from_file(str(STRUCTURE_FILES_DIR / "POSCAR_periodic_2.vasp"), 3.0, {"Li"})
+
+        graph.torture()
+        self.assertEqual(graph.tortuosity, reference.tortuosity)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_torture_from_thread_pool(self):
+        """Test that graphs can be set up and tortured concurrently from threads."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        structures = [
+            (Structure.from_file(STRUCTURE_FILES_DIR / filename), rcut, elements)
+            for filename, rcut, elements in [
+                ("POSCAR_SPINEL.vasp", 4.0, {"Mg"}),
+                ("POSCAR_periodic_1.vasp", 3.0, {"Li"}),
+                ("POSCAR_periodic_2.vasp", 3.0, {"Li"}),
+                ("POSCAR_periodic_3.vasp", 3.0, {"Li"}),
+            ]
+        ] * 2
+
+        def tortuosity(args, python=False):
+            graph = graph_from_structure(*args)
+            graph.torture_py() if python else graph.torture()
+            return graph.tortuosity
+
+        expected = [tortuosity(args, python=True) for args in structures]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(tortuosity, structures))
+        self.assertEqual(results, expected)
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
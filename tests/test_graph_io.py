@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from crystal_torture import tort
+from crystal_torture.graph import Graph
+from crystal_torture.graph_io import load_arrays
+from crystal_torture.pymatgen_interface import graph_from_file
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+def graph_key(graph):
+    """Reduce a graph to its clusters, nodes and results for comparison."""
+    return sorted(
+        (
+            cluster.periodic,
+            cluster.tortuosity,
+            tuple(cluster.halo),
+            tuple(
+                sorted(
+                    (
+                        node.index,
+                        node.element,
+                        node.uc_index,
+                        node.is_halo,
+                        node.tortuosity,
+                        tuple(sorted(n.index for n in node.neighbours)),
+                    )
+                    for node in cluster.nodes
+                )
+            ),
+        )
+        for cluster in graph.clusters
+    )
+
+
+def minimal_key(graph):
+    return sorted(
+        (sorted(c.site_indices), c.size, c.periodic, c.tortuosity)
+        for c in graph.minimal_clusters
+    )
+
+
+class GraphIOTestCase(unittest.TestCase):
+    """Test saving and loading graphs to .npz files."""
+
+    def setUp(self):
+        self.graph = graph_from_file(
+            str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"), 4.0, {"Li"}
+        )
+        self.graph.torture_py()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tempdir.name) / "graph.npz"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_round_trip(self):
+        self.graph.save(self.path)
+        loaded = Graph.load(self.path)
+
+        self.assertEqual(graph_key(loaded), graph_key(self.graph))
+        self.assertEqual(minimal_key(loaded), minimal_key(self.graph))
+        self.assertEqual(loaded.tortuosity, self.graph.tortuosity)
+        self.assertEqual(loaded.return_frac_percolating(), self.graph.return_frac_percolating())
+        self.assertEqual(loaded.structure, self.graph.structure)
+
+    def test_round_trip_compressed(self):
+        self.graph.save(self.path, compress=True)
+        self.assertEqual(graph_key(Graph.load(self.path)), graph_key(self.graph))
+
+    def test_round_trip_before_torture(self):
+        graph = graph_from_file(str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"), 4.0, {"Li"})
+        graph.save(self.path)
+        loaded = Graph.load(self.path)
+
+        self.assertIsNone(loaded.min_clusters)
+        self.assertIsNone(loaded.tortuosity)
+        loaded.torture_py()
+        graph.torture_py()
+        self.assertEqual(minimal_key(loaded), minimal_key(graph))
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_loaded_graph_can_be_tortured(self):
+        self.graph.save(self.path)
+        loaded = Graph.load(self.path)
+        loaded.torture()
+        self.assertEqual(minimal_key(loaded), minimal_key(self.graph))
+
+    def test_load_arrays_mmap(self):
+        self.graph.save(self.path)
+        arrays = load_arrays(self.path, mmap=True)
+        expected = load_arrays(self.path)
+
+        self.assertIsInstance(arrays["adjacency_indices"], np.memmap)
+        self.assertEqual(set(arrays), set(expected))
+        for name in expected:
+            np.testing.assert_array_equal(arrays[name], expected[name])
+
+    def test_load_arrays_mmap_compressed_raises_error(self):
+        self.graph.save(self.path, compress=True)
+        with self.assertRaises(ValueError):
+            load_arrays(self.path, mmap=True)
+
+    def test_newer_format_version_raises_error(self):
+        self.graph.save(self.path)
+        arrays = load_arrays(self.path)
+        arrays["format_version"] = np.array(99)
+        np.savez(self.path, **arrays)
+        with self.assertRaises(ValueError):
+            Graph.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Tests for lazy loading of the package, pymatgen and the Fortran libraries."""
+import subprocess
+import sys
+import unittest
+
+import crystal_torture
+
+
+def run_in_fresh_interpreter(code: str) -> str:
+    """Run code in a new Python process and return its stripped stdout."""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+IMPORT_TIME_CODE = """
+import time
+start = time.perf_counter()
+import crystal_torture
+{extra}
+print(time.perf_counter() - start)
+"""
+
+
+class LazyImportTestCase(unittest.TestCase):
+    """Test that importing crystal_torture defers heavy imports until first use."""
+
+    def test_import_does_not_load_pymatgen_or_fortran(self):
+        output = run_in_fresh_interpreter(
+            "import sys\n"
+            "import crystal_torture\n"
+            "print('pymatgen' in sys.modules,"
+            " 'crystal_torture.tort' in sys.modules,"
+            " 'crystal_torture.dist' in sys.modules)"
+        )
+        self.assertEqual(output, "False False False")
+
+    def test_import_tort_does_not_load_library(self):
+        output = run_in_fresh_interpreter(
+            "import crystal_torture.tort as tort, crystal_torture.dist as dist\n"
+            "print(tort._loaded, dist._loaded)\n"
+            "tort.tort_mod\n"
+            "dist.shift_index(0, [0, 0, 0])\n"
+            "print(tort._loaded, dist._loaded)"
+        )
+        self.assertEqual(output.splitlines(), ["False False", "True True"])
+
+    def test_lazy_attributes(self):
+        from crystal_torture import pymatgen_interface
+
+        self.assertIs(crystal_torture.graph_from_structure, pymatgen_interface.graph_from_structure)
+        self.assertIs(crystal_torture.clusters_from_file, pymatgen_interface.clusters_from_file)
+        self.assertIs(crystal_torture.pymatgen_interface, pymatgen_interface)
+        self.assertIn("graph_from_file", dir(crystal_torture))
+        with self.assertRaises(AttributeError):
+            crystal_torture.not_an_attribute
+
+    def test_import_time_benchmark(self):
+        """Bare package import should cost less than first use of the pymatgen interface."""
+        lazy = min(
+            float(run_in_fresh_interpreter(IMPORT_TIME_CODE.format(extra="")))
+            for _ in range(3)
+        )
+        eager = min(
+            float(run_in_fresh_interpreter(
+                IMPORT_TIME_CODE.format(extra="crystal_torture.graph_from_structure")
+            ))
+            for _ in range(3)
+        )
+        self.assertLess(
+            lazy,
+            eager,
+            f"import crystal_torture: {lazy:.4f} s, with pymatgen interface: {eager:.4f} s",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from pathlib import Path
+
+from crystal_torture import tort
+from crystal_torture.profiling import (
+    PipelineProfile,
+    StageProfile,
+    active_profile,
+    profile_stages,
+    stage,
+)
+from crystal_torture.pymatgen_interface import graph_from_file
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+PIPELINE_STAGES = [
+    "structure_filter",
+    "neighbour_search",
+    "halo_creation",
+    "node_construction",
+    "fortran_upload",
+    "clustering",
+]
+
+
+class ProfilingTestCase(unittest.TestCase):
+    """Test per-stage instrumentation of the graph pipeline."""
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_stage_is_noop_without_profile(self):
+        self.assertIsNone(active_profile())
+        with stage("anything"):
+            pass
+        graph = graph_from_file(str(STRUCTURE_FILES_DIR / "POSCAR_UC.vasp"), 4.0, {"Li"})
+        self.assertIsNone(graph.profile)
+
+    def test_stage_records(self):
+        profile = PipelineProfile()
+        with stage("work", profile):
+            sum(range(10000))
+        (record,) = profile.stages
+        self.assertIsInstance(record, StageProfile)
+        self.assertEqual(record.name, "work")
+        self.assertGreaterEqual(record.wall_time, 0.0)
+        self.assertGreaterEqual(record.cpu_time, 0.0)
+        self.assertEqual(set(record.as_dict()), {
+            "name", "wall_time", "cpu_time", "peak_rss", "peak_rss_increase"
+        })
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_graph_profile(self):
+        seen = []
+        with profile_stages(callback=seen.append) as profile:
+            graph = graph_from_file(
+                str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"), 4.0, {"Li"}
+            )
+        self.assertIsNone(active_profile())
+        graph.torture()
+
+        self.assertIs(graph.profile, profile)
+        names = [record.name for record in profile.stages]
+        for name in PIPELINE_STAGES + ["torture", "minimal_clusters"]:
+            self.assertIn(name, names)
+        self.assertLess(names.index("neighbour_search"), names.index("clustering"))
+        self.assertEqual(names[-2:], ["torture", "minimal_clusters"])
+        self.assertEqual(seen, profile.stages)
+        self.assertEqual(len(profile.report()), len(profile.stages))
+        self.assertIn("neighbour_search", str(profile))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,18 @@
 import unittest
 import copy
+import numpy as np
 from unittest.mock import Mock
 from pathlib import Path
 from crystal_torture.node import Node
 from crystal_torture.cluster import Cluster
 from crystal_torture import tort
+from crystal_torture.array_interface import analyse_arrays
 from crystal_torture.pymatgen_doping import (
     count_sites,
     dope_structure,
     dope_structure_by_no,
+    analyse_doped_ensemble,
+    dope_structure_ensemble,
     sort_structure,
     index_sites,
     set_site_labels,
@@ -72,6 +76,99 @@ class PymatgenDopingTestCase(unittest.TestCase):
             self.assertEqual(no_dopants, dopants_Li)
             self.assertEqual(no_dopants, dopants_Al)
 
+    def test_sort_structure(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        structure.add_site_property("site_no", list(range(len(structure))))
+        shuffled = Structure.from_sites(structure.sites[::-1])
+
+        sorted_structure = sort_structure(shuffled, ["O", "Mg", "Al"])
+
+        species = [site.species_string for site in sorted_structure]
+        self.assertEqual(species, ["O"] * 32 + ["Mg"] * 8 + ["Al"] * 16)
+        site_nos = sorted_structure.site_properties["site_no"]
+        self.assertEqual(site_nos[:32], list(range(55, 23, -1)))
+        self.assertEqual(site_nos[32:40], list(range(7, -1, -1)))
+        for site in sorted_structure:
+            original = structure[site.properties["site_no"]]
+            self.assertTrue(np.allclose(site.coords, original.coords))
+
+    def test_doping_seeded(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        structure.make_supercell([2, 2, 2])
+
+        doped = [
+            dope_structure(copy.deepcopy(structure), 0.25, "Mg", ["Li"], rng=seed)
+            for seed in (5, 5, 6)
+        ]
+        doped_by_no = [
+            dope_structure_by_no(copy.deepcopy(structure), 8, "Mg", ["Li"], rng=rng)
+            for rng in (np.random.default_rng(5), np.random.default_rng(5))
+        ]
+
+        self.assertEqual(doped[0], doped[1])
+        self.assertNotEqual(doped[0], doped[2])
+        self.assertEqual(doped_by_no[0], doped_by_no[1])
+        self.assertEqual(count_sites(doped[0], species={"Li"}), 16)
+
+    def test_dope_structure_ensemble(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        host = copy.deepcopy(structure)
+
+        doped = list(
+            dope_structure_ensemble(structure, 4, "Mg", ["Li", "Al"], conc=0.5, seed=7)
+        )
+
+        self.assertEqual(len(doped), 4)
+        self.assertEqual(structure, host)
+        for doped_structure in doped:
+            self.assertEqual(count_sites(doped_structure, species={"Li"}), 2)
+            self.assertEqual(count_sites(doped_structure, species={"Mg"}), 4)
+            self.assertEqual(count_sites(doped_structure, species={"Al"}), 18)
+
+    def test_dope_structure_ensemble_reproducible(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        structure.make_supercell([2, 2, 2])
+
+        serial = list(
+            dope_structure_ensemble(
+                structure, 6, "Mg", ["Li"], no_dopants=10, seed=11, species_only=True
+            )
+        )
+        parallel = list(
+            dope_structure_ensemble(
+                structure, 6, "Mg", ["Li"], no_dopants=10, seed=11, species_only=True, workers=2
+            )
+        )
+
+        for serial_species, parallel_species in zip(serial, parallel):
+            np.testing.assert_array_equal(serial_species, parallel_species)
+            self.assertEqual(np.count_nonzero(serial_species == "Li"), 10)
+        self.assertFalse(np.array_equal(serial[0], serial[1]))
+
+    def test_analyse_doped_ensemble(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        structure.make_supercell([2, 2, 2])
+
+        species = dope_structure_ensemble(
+            structure, 4, "Mg", ["Li"], no_dopants=32, seed=5, species_only=True
+        )
+        serial = list(
+            analyse_doped_ensemble(structure, 4, "Mg", ["Li"], 4.0, {"Li"}, no_dopants=32, seed=5)
+        )
+        parallel = list(
+            analyse_doped_ensemble(
+                structure, 4, "Mg", ["Li"], 4.0, {"Li"}, no_dopants=32, seed=5, workers=2
+            )
+        )
+
+        for sample_species, serial_result, parallel_result in zip(species, serial, parallel):
+            expected = analyse_arrays(
+                structure.lattice.matrix, structure.frac_coords, sample_species, 4.0, {"Li"}
+            )
+            for key, value in expected.items():
+                np.testing.assert_array_equal(serial_result[key], value)
+                np.testing.assert_array_equal(parallel_result[key], value)
+
     def test_errors(self):
         structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
         set_site_labels(structure, ["A"] * 8 + ["B"] * 16 + ["O"] * 32)
@@ -86,6 +183,12 @@ class PymatgenDopingTestCase(unittest.TestCase):
             sort_structure(structure, ["Li", "P", "T"])
         with self.assertRaises(ValueError):
             index_sites(structure)
+        with self.assertRaises(ValueError):
+            next(dope_structure_ensemble(structure, 1, "P", ["Li"], conc=0.5))
+        with self.assertRaises(ValueError):
+            next(dope_structure_ensemble(structure, 1, "Mg", ["Li"]))
+        with self.assertRaises(ValueError):
+            next(dope_structure_ensemble(structure, 1, "Mg", ["Li"], no_dopants=9))
 
 
 if __name__ == "__main__":
@@ -12,11 +12,19 @@ from crystal_torture.pymatgen_interface import (
     graph_from_structure,
     graph_from_file,
     filter_structure_by_species,
+    minimum_halo,
+    create_halo,
+    get_all_neighbors_and_image,
+    halo_neighbours,
+    halo_sites,
+    neighbour_pairs,
     set_fort_nodes
 )
 from crystal_torture.graph import Graph
 from pymatgen.core import Structure, Lattice
 from copy import deepcopy
+import numpy as np
+import warnings
 
 # Get the directory containing this test file
 TEST_DIR = Path(__file__).parent
@@ -134,7 +142,8 @@ class PymatgenTestCase(unittest.TestCase):
         mock_clusters_from_structure.assert_called_once_with(
             structure=mock_structure,
             rcut=rcut,
-            elements=elements
+            elements=elements,
+            halo=(3, 3, 3),
         )
         
         # Should return what clusters_from_structure returned
@@ -151,13 +160,28 @@ class PymatgenTestCase(unittest.TestCase):
         
         # Mock downstream calls so we're only testing immutability
         with patch('crystal_torture.pymatgen_interface.nodes_from_structure'), \
-             patch('crystal_torture.pymatgen_interface.set_fort_nodes'), \
+             patch('crystal_torture.array_interface.set_fort_nodes'), \
              patch('crystal_torture.pymatgen_interface.Structure.from_sites'):
              
             clusters_from_structure(structure, 3.0, {'Li'})
             
             self.assertEqual(structure, original_structure)
 
+    def test_graph_from_structure_without_fortran(self):
+        """Without the Fortran extension, graphs are built in Python and tortured with torture_py."""
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"))
+        expected = graph_from_structure(structure, 4.0, {"Li"})
+        expected.torture_py()
+
+        with patch.object(tort, "tort_mod", None):
+            graph = graph_from_structure(structure, 4.0, {"Li"})
+            graph.torture_py()
+
+        self.assertEqual(
+            sorted((c.size, c.periodic, c.tortuosity) for c in graph.minimal_clusters),
+            sorted((c.size, c.periodic, c.tortuosity) for c in expected.minimal_clusters),
+        )
+
     def test_cluster_periodic(self):
 
         clusters1 = clusters_from_file(
@@ -281,7 +305,7 @@ class PymatgenTestCase(unittest.TestCase):
         result = graph_from_structure(mock_structure, 3.0, {'Li', 'O'})
         
         # Assert - should delegate cleanly without any processing
-        mock_clusters_from_structure.assert_called_once_with(mock_structure, 3.0, {'Li', 'O'})
+        mock_clusters_from_structure.assert_called_once_with(mock_structure, 3.0, {'Li', 'O'}, verlet=None, halo=(3, 3, 3))
         mock_graph_class.assert_called_once_with(clusters=mock_clusters, structure=mock_structure)
         self.assertEqual(result, mock_graph)
     
@@ -292,8 +316,9 @@ class PymatgenTestCase(unittest.TestCase):
     ):
         """Test that graph_from_structure delegates cluster creation and handles structure filtering."""
         # Arrange
-        mock_structure = Mock()
-        mock_structure.symbol_set = {'Li', 'O', 'P'}  # Make it iterable for legitimate filtering
+        mock_structure = Structure(
+            Lattice.cubic(4.0), ["Li", "O", "P"], [[0, 0, 0], [0.5, 0, 0], [0, 0.5, 0]]
+        )
         mock_clusters = Mock()
         mock_graph = Mock()
         mock_clusters_from_structure.return_value = mock_clusters
@@ -303,7 +328,7 @@ class PymatgenTestCase(unittest.TestCase):
         result = graph_from_structure(mock_structure, 3.0, {'Li', 'O'})
         
         # Assert - should delegate cluster creation (the expensive part)
-        mock_clusters_from_structure.assert_called_once_with(mock_structure, 3.0, {'Li', 'O'})
+        mock_clusters_from_structure.assert_called_once_with(mock_structure, 3.0, {'Li', 'O'}, verlet=None, halo=(3, 3, 3))
         # Graph creation with filtered structure is legitimate
         mock_graph_class.assert_called_once()
         self.assertEqual(result, mock_graph)
@@ -356,7 +381,7 @@ class PymatgenTestCase(unittest.TestCase):
         graph = graph_from_structure(structure, 2.0, {"Li"})
         
         # Assert - should delegate cluster creation
-        mock_clusters_from_structure.assert_called_once_with(structure, 2.0, {"Li"})
+        mock_clusters_from_structure.assert_called_once_with(structure, 2.0, {"Li"}, verlet=None, halo=(3, 3, 3))
         
         # Should return Graph with the clusters
         self.assertIsInstance(graph, Graph)
@@ -383,15 +408,15 @@ class PymatgenTestCase(unittest.TestCase):
         
         graph = graph_from_structure(structure, 2.0, {"Li"})
         
-        mock_clusters_from_structure.assert_called_once_with(structure, 2.0, {"Li"})
+        mock_clusters_from_structure.assert_called_once_with(structure, 2.0, {"Li"}, verlet=None, halo=(3, 3, 3))
         mock_filter.assert_called_once_with(structure, ["Li"])
         
         self.assertIsInstance(graph, Graph)
         self.assertEqual(graph.clusters, mock_clusters)
         self.assertEqual(graph.structure, mock_filtered_structure)
         
-    @patch('crystal_torture.pymatgen_interface.clusters_from_nodes')
-    @patch('crystal_torture.pymatgen_interface.set_fort_nodes') 
+    @patch('crystal_torture.array_interface.clusters_from_nodes')
+    @patch('crystal_torture.array_interface.set_fort_nodes')
     def test_clusters_from_structure_delegates_correctly(self, mock_set_fort, mock_clusters_from_nodes):
         """Test that clusters_from_structure delegates to clusters_from_nodes correctly."""
         # Arrange
@@ -416,9 +441,104 @@ class PymatgenTestCase(unittest.TestCase):
         nodes = {node}
         
         # Mock Fortran as unavailable
-        with patch('crystal_torture.pymatgen_interface.tort', None):
+        with patch('crystal_torture.array_interface.tort', None):
             with self.assertRaises(FortranNotAvailableError):
                 set_fort_nodes(nodes)
 
+    def _slab(self):
+        """Square net of Li with vacuum along c, connected only within the ab plane."""
+        return Structure(Lattice.tetragonal(2.0, 10.0), ["Li", "Li"], [[0, 0, 0], [0.5, 0.5, 0]])
+
+    def test_diagonal_chain_periodic_for_mixed_halos(self):
+        """A chain along a+b is 1D whatever the halo, including halos with coprime dimensions."""
+        structure = Structure(Lattice([[5, 0, 0], [-4, 3, 0], [0, 0, 10]]), ["Li"], [[0, 0, 0]])
+        for halo in ((3, 3, 3), (5, 5, 5), (3, 3, 1), (3, 5, 3), (5, 3, 3), (3, 5, 1)):
+            clusters = clusters_from_structure(structure, 3.5, {"Li"}, halo=halo)
+            self.assertEqual([cluster.periodic for cluster in clusters], [1], halo)
+
+    def test_minimum_halo_slab(self):
+        self.assertEqual(minimum_halo(self._slab(), 2.1), (3, 3, 1))
+
+    def test_minimum_halo_isolated(self):
+        structure = Structure(Lattice.cubic(10.0), ["Li", "Li"], [[0, 0, 0], [0.1, 0, 0]])
+        self.assertEqual(minimum_halo(structure, 1.5), (1, 1, 1))
+
+    def test_slab_minimum_halo_matches_default_halo(self):
+        structure = self._slab()
+        graphs = [
+            graph_from_structure(structure, 2.1, {"Li"}, halo=halo)
+            for halo in [(3, 3, 3), minimum_halo(structure, 2.1)]
+        ]
+        for graph in graphs:
+            graph.torture_py()
+        default, minimal = (
+            sorted((c.periodic, c.tortuosity, c.size) for c in graph.minimal_clusters)
+            for graph in graphs
+        )
+        self.assertEqual(minimal, default)
+        self.assertEqual(minimal[0][0], 2)
+
+    def test_nodes_from_structure_halo_size(self):
+        nodes = nodes_from_structure(self._slab(), 2.1, get_halo=True, halo=(3, 3, 1))
+        self.assertEqual(len(nodes), 18)
+        self.assertEqual(
+            sorted(node.index for node in nodes if not node.is_halo), [4, 13]
+        )
+
+    def test_too_small_halo_warns(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            nodes_from_structure(self._slab(), 2.1, get_halo=True, halo=(3, 1, 1))
+        self.assertTrue(any("too small" in str(w.message) for w in caught))
+
+    def test_invalid_halo_raises_error(self):
+        with self.assertRaises(ValueError):
+            nodes_from_structure(self._slab(), 2.1, get_halo=True, halo=(3, 3))
+
+    def test_halo_neighbours_match_create_halo(self):
+        structure = self._slab()
+        neighbours = get_all_neighbors_and_image(structure, 2.1, include_index=True)
+        _, expected = create_halo(deepcopy(structure), neighbours, (3, 3, 1))
+        self.assertEqual(halo_neighbours(neighbours, (3, 3, 1)), expected)
+
+    def test_halo_sites_match_supercell(self):
+        structure = Structure(Lattice.cubic(3.0), ["Li", "O"], [[0, 0, 0], [0.5, 0.5, 0.5]])
+        supercell, _ = create_halo(deepcopy(structure), [[], []], (3, 1, 2))
+        uc_index, species, image, is_halo = halo_sites([0, 1], (3, 1, 2))
+
+        self.assertEqual(len(uc_index), len(supercell))
+        self.assertEqual(
+            [["Li", "O"][code] for code in species],
+            [site.species_string for site in supercell],
+        )
+        np.testing.assert_array_equal(uc_index, [0] * 6 + [1] * 6)
+        self.assertEqual(np.flatnonzero(~is_halo).tolist(), [3, 9])
+        np.testing.assert_array_equal(image[3], [0, 0, 0])
+        np.testing.assert_array_equal(image[0], [-1, 0, -1])
+        np.testing.assert_array_equal(image[11], [1, 0, 0])
+
+    def test_neighbour_pairs_match_get_all_neighbors_and_image(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        neighbours = get_all_neighbors_and_image(structure, 3.5, include_index=True)
+        pair_i, pair_j, images, distances = neighbour_pairs(
+            structure.lattice.matrix, structure.frac_coords, 3.5
+        )
+        flat = [n for site_neighbours in neighbours for n in site_neighbours]
+        self.assertEqual(
+            pair_i.tolist(),
+            [i for i, site_neighbours in enumerate(neighbours) for _ in site_neighbours],
+        )
+        self.assertEqual(pair_j.tolist(), [int(n[2]) for n in flat])
+        self.assertEqual([tuple(image) for image in images.tolist()], [tuple(n[3]) for n in flat])
+        np.testing.assert_allclose(distances, [n[1] for n in flat])
+
+    def test_graph_from_structure_does_not_copy_structure(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        structure_before = structure.copy()
+        with patch("copy.deepcopy", side_effect=AssertionError("structure copied")):
+            graph = graph_from_structure(structure, 3.5, {"Mg"})
+        self.assertEqual(structure, structure_before)
+        self.assertEqual(graph.structure.symbol_set, ("Mg",))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
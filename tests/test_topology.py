@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.array_interface import analyse_arrays, neighbour_pairs
+from crystal_torture.topology import NeighbourTopology
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+def _analyse_attached(shared, species, elements):
+    """Attach a shared topology in a worker process and analyse one configuration."""
+    return shared.attach().analyse(species, elements)
+
+
+def assert_results_equal(result, expected):
+    assert result.keys() == expected.keys()
+    for key, value in expected.items():
+        np.testing.assert_array_equal(result[key], value)
+
+
+class NeighbourTopologyTestCase(unittest.TestCase):
+    """Test the shareable host neighbour topology."""
+
+    def setUp(self):
+        self.structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        self.matrix = self.structure.lattice.matrix
+        self.frac_coords = np.mod(self.structure.frac_coords, 1)
+        self.topology = NeighbourTopology.from_structure(self.structure, 3.5)
+        # Half of the Mg sites swapped for Li.
+        self.species = np.array([site.species_string for site in self.structure], dtype=object)
+        self.species[[0, 2, 4, 6]] = "Li"
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_csr_layout(self):
+        pair_i, pair_j, images, _ = neighbour_pairs(self.matrix, self.frac_coords, 3.5)
+        self.assertEqual(self.topology.no_sites, len(self.structure))
+        np.testing.assert_array_equal(
+            np.repeat(np.arange(len(self.structure)), np.diff(self.topology.indptr)), pair_i
+        )
+        np.testing.assert_array_equal(self.topology.indices, pair_j)
+        np.testing.assert_array_equal(self.topology.images, images)
+
+    def test_pairs_match_neighbour_search_of_subset(self):
+        keep = np.isin(self.species, ["Li", "Mg"])
+        pair_i, pair_j, images, _ = neighbour_pairs(self.matrix, self.frac_coords[keep], 3.5)
+        result_i, result_j, result_images = self.topology.pairs(keep)
+
+        np.testing.assert_array_equal(result_i, pair_i)
+        self.assertEqual(
+            sorted(zip(result_i, result_j, map(tuple, result_images))),
+            sorted(zip(pair_i, pair_j, map(tuple, images))),
+        )
+
+    def test_analyse_matches_analyse_arrays(self):
+        for elements in ({"Li"}, {"Li", "Mg"}, {"Al"}):
+            expected = analyse_arrays(self.matrix, self.frac_coords, self.species, 3.5, elements)
+            assert_results_equal(self.topology.analyse(self.species, elements), expected)
+
+    def test_wrong_number_of_species_raises_error(self):
+        with self.assertRaises(ValueError):
+            self.topology.graph(self.species[:-1], {"Li"})
+
+    def test_share_and_attach(self):
+        with self.topology.share() as shared:
+            attached = shared.attach()
+            for name in ("matrix", "frac_coords", "indptr", "indices", "images"):
+                np.testing.assert_array_equal(getattr(attached, name), getattr(self.topology, name))
+                self.assertFalse(getattr(attached, name).flags.writeable)
+            assert_results_equal(
+                attached.analyse(self.species, {"Li", "Mg"}),
+                self.topology.analyse(self.species, {"Li", "Mg"}),
+            )
+            del attached
+
+    def test_attach_in_worker_process(self):
+        expected = self.topology.analyse(self.species, {"Li", "Mg"})
+        with self.topology.share() as shared, ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(_analyse_attached, shared, self.species, {"Li", "Mg"}).result()
+        assert_results_equal(result, expected)
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir) / "topology.npz"
+            self.topology.save(path)
+            loaded = NeighbourTopology.load(path)
+
+            self.assertIsInstance(loaded.indices, np.memmap)
+            self.assertEqual(loaded.rcut, 3.5)
+            assert_results_equal(
+                loaded.analyse(self.species, {"Li"}), self.topology.analyse(self.species, {"Li"})
+            )
+            del loaded
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -372,6 +372,83 @@ class TestTortModule(unittest.TestCase):
         self.assertFalse(tort.tort_mod._is_allocated)  # Should be False after tear_down
 
 
+class TestOpenMPSettings(unittest.TestCase):
+    """Test OpenMP thread count and schedule control."""
+
+    def tearDown(self):
+        if tort.tort_mod is not None:
+            tort.set_num_threads(None)
+            tort.set_schedule("static")
+            tort.tort_mod.tear_down()
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_set_num_threads(self):
+        tort.set_num_threads(3)
+        self.assertEqual(tort.get_num_threads(), 3)
+        tort.set_num_threads(None)
+        self.assertGreaterEqual(tort.get_num_threads(), 1)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_set_schedule(self):
+        self.assertEqual(tort.get_schedule(), ("static", 0))
+        tort.set_schedule("guided", 8)
+        self.assertEqual(tort.get_schedule(), ("guided", 8))
+
+    def test_invalid_settings_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            tort.set_num_threads(0)
+        with self.assertRaises(ValueError):
+            tort.set_schedule("round-robin")
+        with self.assertRaises(ValueError):
+            tort.set_schedule("dynamic", -1)
+        with self.assertRaises(ValueError):
+            with tort.openmp_settings(schedule="round-robin"):
+                pass
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_openmp_settings_scopes_tort_and_dist(self):
+        from crystal_torture import dist
+        tort.set_num_threads(2)
+        with tort.openmp_settings(num_threads=4, schedule="dynamic", chunk_size=2):
+            self.assertEqual(tort.get_num_threads(), 4)
+            self.assertEqual(tort.get_schedule(), ("dynamic", 2))
+            self.assertEqual(dist.get_num_threads(), 4)
+            self.assertEqual(dist.get_schedule(), ("dynamic", 2))
+        self.assertEqual(tort.get_num_threads(), 2)
+        self.assertEqual(tort.get_schedule(), ("static", 0))
+        self.assertEqual(dist.get_schedule(), ("static", 0))
+        self.assertIsNone(dist._num_threads_setting())
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_openmp_settings_without_settings_restores_nothing(self):
+        tort.set_num_threads(2)
+        with tort.openmp_settings():
+            # Another thread changes the setting while this scope is open.
+            tort.set_num_threads(3)
+        self.assertEqual(tort.get_num_threads(), 3)
+        tort.set_num_threads(2)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_torture_independent_of_schedule(self):
+        nodes = [
+            Node(index=i, element="Li", uc_index=i % 2, is_halo=i >= 2,
+                 neighbours_ind=[(i + 1) % 4, (i - 1) % 4])
+            for i in range(4)
+        ]
+        for node in nodes:
+            node.neighbours = {nodes[j] for j in node.neighbours_ind}
+        results = []
+        for schedule in ("static", "dynamic", "guided"):
+            set_fort_nodes(set(nodes))
+            with tort.openmp_settings(num_threads=2, schedule=schedule, chunk_size=1):
+                Cluster(set(nodes)).torture_fort()
+            results.append([node.tortuosity for node in nodes[:2]])
+            tort.tort_mod.tear_down()
+        self.assertEqual(results[0], [2, 2])
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(results[2], results[0])
+
+
 class TestTortAvailability(unittest.TestCase):
     """Test how tort module handles Fortran availability."""
     
@@ -0,0 +1,135 @@
+import csv
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.pymatgen_interface import graph_from_structure
+from crystal_torture.trajectory import (
+    analyse_trajectory,
+    frames_from_extxyz,
+    frames_from_file,
+    frames_from_xdatcar,
+    iter_write_trajectory_results,
+    write_trajectory_results,
+)
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+def write_xdatcar(frames: list[Structure], filename: str) -> None:
+    """Write a fixed-cell XDATCAR from a list of structures with identical species order."""
+    symbols = [el.symbol for el in frames[0].composition.elements]
+    counts = [int(frames[0].composition[symbol]) for symbol in symbols]
+    with open(filename, "w") as handle:
+        handle.write("test\n1.0\n")
+        for vector in frames[0].lattice.matrix:
+            handle.write(" ".join(f"{x:.8f}" for x in vector) + "\n")
+        handle.write(" ".join(symbols) + "\n" + " ".join(map(str, counts)) + "\n")
+        for index, frame in enumerate(frames, start=1):
+            handle.write(f"Direct configuration=     {index}\n")
+            for coords in frame.frac_coords:
+                handle.write(" ".join(f"{x:.8f}" for x in coords) + "\n")
+
+
+def write_extxyz(frames: list[Structure], filename: str) -> None:
+    """Write an extended XYZ file from a list of structures."""
+    with open(filename, "w") as handle:
+        for frame in frames:
+            lattice = " ".join(f"{x:.8f}" for x in frame.lattice.matrix.flatten())
+            handle.write(
+                f'{len(frame)}\nLattice="{lattice}" Properties=species:S:1:pos:R:3 pbc="T T T"\n'
+            )
+            for site in frame:
+                x, y, z = site.coords
+                handle.write(f"{site.species_string} {x:.8f} {y:.8f} {z:.8f}\n")
+
+
+class TrajectoryTestCase(unittest.TestCase):
+    """Test streaming trajectory readers and per-frame analysis."""
+
+    def setUp(self):
+        structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_2_clusters.vasp"))
+        rng = np.random.default_rng(0)
+        self.frames = [structure] + [
+            Structure(
+                structure.lattice,
+                structure.species,
+                structure.cart_coords + rng.normal(scale=0.05, size=(len(structure), 3)),
+                coords_are_cartesian=True,
+            )
+            for _ in range(2)
+        ]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.xdatcar = os.path.join(self.tmpdir.name, "XDATCAR")
+        self.extxyz = os.path.join(self.tmpdir.name, "traj.extxyz")
+        write_xdatcar(self.frames, self.xdatcar)
+        write_extxyz(self.frames, self.extxyz)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        if tort.tort_mod is not None:
+            tort.tort_mod.tear_down()
+
+    def test_frames_from_xdatcar(self):
+        frames = list(frames_from_xdatcar(self.xdatcar))
+        self.assertEqual(len(frames), 3)
+        for frame, expected in zip(frames, self.frames):
+            self.assertEqual(frame.composition, expected.composition)
+            np.testing.assert_allclose(frame.frac_coords, expected.frac_coords, atol=1e-6)
+
+    def test_frames_from_extxyz(self):
+        frames = list(frames_from_extxyz(self.extxyz))
+        self.assertEqual(len(frames), 3)
+        for frame, expected in zip(frames, self.frames):
+            np.testing.assert_allclose(frame.cart_coords, expected.cart_coords, atol=1e-6)
+            np.testing.assert_allclose(frame.lattice.matrix, expected.lattice.matrix, atol=1e-6)
+
+    def test_frames_are_lazy(self):
+        frames = frames_from_file(self.xdatcar)
+        next(frames)
+        with open(self.xdatcar, "a") as handle:
+            handle.write("Direct configuration=     4\n")
+        with self.assertRaises(ValueError):
+            list(frames)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            frames_from_file("trajectory.dat")
+        with self.assertRaises(ValueError):
+            frames_from_file(self.xdatcar, fmt="lammps")
+
+    def test_analyse_trajectory_matches_graph_from_structure(self):
+        results = list(analyse_trajectory(self.xdatcar, 3.5, {"Li"}, torture=False))
+        self.assertEqual([result["frame"] for result in results], [0, 1, 2])
+        for result, frame in zip(results, frames_from_xdatcar(self.xdatcar)):
+            graph = graph_from_structure(frame, 3.5, {"Li"})
+            self.assertEqual(result["frac_percolating"], graph.return_frac_percolating())
+            self.assertEqual(len(result["clusters"]), 2)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_write_trajectory_results(self):
+        table = os.path.join(self.tmpdir.name, "results.csv")
+        results = list(
+            iter_write_trajectory_results(analyse_trajectory(self.extxyz, 4.0, {"Li"}), table)
+        )
+        with open(table) as handle:
+            rows = list(csv.DictReader(handle))
+        self.assertEqual(len(rows), sum(len(result["clusters"]) for result in results))
+
+        eager = os.path.join(self.tmpdir.name, "eager.csv")
+        self.assertEqual(write_trajectory_results(results, eager), len(rows))
+        with open(eager) as handle:
+            self.assertEqual(list(csv.DictReader(handle)), rows)
+        self.assertEqual([row["frame"] for row in rows], ["0", "1", "2"])
+        self.assertEqual(float(rows[0]["tortuosity"]), results[0]["clusters"][0]["tortuosity"])
+
+
+if __name__ == "__main__":
+    unittest.main()
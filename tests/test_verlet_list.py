@@ -0,0 +1,119 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+from pymatgen.core import Structure
+
+from crystal_torture import tort
+from crystal_torture.pymatgen_interface import (
+    VerletList,
+    get_all_neighbors_and_image,
+    graph_from_structure,
+    neighbour_pairs,
+)
+
+# Get the directory containing this test file
+TEST_DIR = Path(__file__).parent
+STRUCTURE_FILES_DIR = TEST_DIR / "STRUCTURE_FILES"
+
+
+def neighbour_keys(neighbours):
+    """Reduce neighbour lists to sorted (index, image) pairs for comparison."""
+    return [
+        sorted((int(n[2]), tuple(int(x) for x in n[3])) for n in site_neighbours)
+        for site_neighbours in neighbours
+    ]
+
+
+class VerletListTestCase(unittest.TestCase):
+    """Test reuse of neighbour lists between displaced structures."""
+
+    def setUp(self):
+        self.structure = Structure.from_file(str(STRUCTURE_FILES_DIR / "POSCAR_SPINEL.vasp"))
+        self.rng = np.random.default_rng(0)
+
+    def displaced(self, scale, shift=0.0):
+        return Structure(
+            self.structure.lattice,
+            self.structure.species,
+            self.structure.cart_coords
+            + self.rng.normal(scale=scale, size=(len(self.structure), 3))
+            + shift,
+            coords_are_cartesian=True,
+            to_unit_cell=True,
+        )
+
+    def test_pairs_match_get_neighbors(self):
+        verlet = VerletList(skin=0.6)
+        structure = self.displaced(0.05)
+        pair_i, pair_j, images, _ = verlet.pairs(
+            structure.lattice.matrix,
+            structure.frac_coords,
+            [site.species_string for site in structure],
+            3.0,
+        )
+        keys = [[] for _ in range(len(structure))]
+        for i, j, image in zip(pair_i, pair_j, images):
+            keys[i].append((int(j), tuple(int(x) for x in image)))
+        self.assertEqual(
+            [sorted(k) for k in keys],
+            neighbour_keys(verlet.get_neighbors(structure, 3.0, include_index=True)),
+        )
+
+    def test_reuse_matches_full_search(self):
+        verlet = VerletList(skin=0.6)
+        for _ in range(4):
+            structure = self.displaced(0.04)
+            self.assertEqual(
+                neighbour_keys(verlet.get_neighbors(structure, 3.0, include_index=True)),
+                neighbour_keys(get_all_neighbors_and_image(structure, 3.0, include_index=True)),
+            )
+        self.assertEqual(verlet.n_builds, 1)
+        self.assertEqual(verlet.n_reuses, 3)
+
+    def test_sites_crossing_cell_boundary(self):
+        verlet = VerletList(skin=0.6)
+        reference = self.displaced(0.0)
+        verlet.get_neighbors(reference, 3.0, include_index=True)
+        # Shift every site so those on the x = 0 face wrap into the opposite face.
+        structure = self.displaced(0.0, shift=np.array([-0.2, 0.0, 0.0]))
+        wrapped = structure.frac_coords[:, 0] - reference.frac_coords[:, 0] > 0.5
+        self.assertTrue(np.any(wrapped))
+        self.assertEqual(
+            neighbour_keys(verlet.get_neighbors(structure, 3.0, include_index=True)),
+            neighbour_keys(get_all_neighbors_and_image(structure, 3.0, include_index=True)),
+        )
+        self.assertEqual(verlet.n_builds, 1)
+
+    def test_rebuild_when_skin_exceeded(self):
+        verlet = VerletList(skin=0.1)
+        verlet.get_neighbors(self.displaced(0.0), 3.0)
+        verlet.get_neighbors(self.displaced(0.2), 3.0)
+        self.assertEqual(verlet.n_builds, 2)
+        verlet.get_neighbors(self.structure, 2.5)
+        self.assertEqual(verlet.n_builds, 3)
+
+    def test_negative_skin(self):
+        with self.assertRaises(ValueError):
+            VerletList(skin=-0.1)
+
+    @unittest.skipIf(tort.tort_mod is None, "Fortran not available")
+    def test_graph_from_structure_with_verlet(self):
+        verlet = VerletList(skin=0.5)
+        for _ in range(3):
+            structure = self.displaced(0.03)
+            graph = graph_from_structure(structure, 4.0, {"Mg"}, verlet=verlet)
+            graph.torture()
+            reference = graph_from_structure(structure, 4.0, {"Mg"})
+            reference.torture()
+            self.assertEqual(graph.tortuosity, reference.tortuosity)
+            self.assertEqual(
+                sorted(c.periodic for c in graph.clusters),
+                sorted(c.periodic for c in reference.clusters),
+            )
+        self.assertEqual(verlet.n_builds, 1)
+        tort.tort_mod.tear_down()
+
+
+if __name__ == "__main__":
+    unittest.main()